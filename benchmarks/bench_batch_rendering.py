@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+bench_batch_rendering.py
+
+renders the diagrams of the lattices of sources into files with render_lattices(..), as __main__ does with -I -O,
+one after another and in the worker processes of a WorkerPool, and reports the time spent per figure and in all.
+No display is needed: figures are drawn under the Agg backend.
+
+usage: python benchmarks/bench_batch_rendering.py [-G] [-f file] [-n max_sources] [-j n_workers] [-o output_dir] [--formats png,svg,pdf]
+"""
+
+## imports
+import argparse
+import contextlib
+import io
+import tempfile
+from bench_utils import *
+
+##
+def render (lattices: list, output_dir: str, formats: list, pool, generalized: bool) -> list:
+    "renders lattices into output_dir with their printing discarded and returns the files and seconds per lattice"
+    with contextlib.redirect_stdout (io.StringIO ()):
+        return pyPLB.render_lattices (lattices, output_dir, formats = formats, pool = pool, generalized = generalized, zscores_from_targets = False)
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of batch rendering into files")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample1.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-n', '--max_sources', type = int, default = 8)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    parser.add_argument ('-o', '--output_dir', type = str, default = None)
+    parser.add_argument ('--formats', type = str, default = "png")
+    args = parser.parse_args ()
+    ##
+    import matplotlib
+    matplotlib.use ("Agg")
+    sources  = read_sources (args.file)[:args.max_sources]
+    lattices = [ pyPLB.PatternLattice (pyPLB.Pattern (s, gap_mark = "_"), generalized = args.generalized) for s in sources ]
+    formats  = args.formats.split (",")
+    output_dir = args.output_dir or tempfile.mkdtemp (prefix = "pyPLB-")
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(lattices)} lattices; formats: {formats}; output_dir: {output_dir}")
+    ##
+    with pyPLB.WorkerPool (args.n_workers) as pool:
+        pool.get_pool () # started apart from the timing
+        for name, used_pool in [ ("serial", None), (f"{pool.n_workers} workers", pool) ]:
+            results, spent = timed (render, lattices, output_dir, formats, used_pool, args.generalized)
+            for output_files, per_figure in results:
+                assert all (os.path.getsize (x) > 0 for x in output_files)
+            figures = [ per_figure for _, per_figure in results ]
+            print (f"#{name}: {spent:.3f} s in all; per figure {min(figures):.3f} - {max(figures):.3f} s, {sum(figures):.3f} s summed")
+
+### end of file
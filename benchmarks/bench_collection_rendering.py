@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+bench_collection_rendering.py
+
+times draw_network(..) of a merged lattice into a PNG file, with edges drawn by nx.draw_networkx(..), a patch per edge,
+and by draw_lattice_collections(..), a single LineCollection and scatter, chosen by collection_threshold, and checks
+that both color the nodes the same way.
+
+usage: python benchmarks/bench_collection_rendering.py [-G] [-f file] [-L layout] [-o output_dir] [--skip_patches]
+"""
+
+## imports
+import argparse
+import contextlib
+import io
+import tempfile
+import numpy as np
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+##
+def draw (N: list, zscores: dict, layout: str, output_file: str, collection_threshold: int):
+    "draws N into output_file with printing discarded and returns the colors of the nodes drawn"
+    import matplotlib.pyplot as plt
+    with contextlib.redirect_stdout (io.StringIO ()):
+        pyPLB.draw_network (N, layout = layout, zscores = zscores, label_sample_n = 5, output_files = [ output_file ], collection_threshold = collection_threshold)
+    return output_file
+
+##
+def get_node_colors (N: list, zscores: dict, layout: str, collection_threshold: int) -> np.ndarray:
+    "returns the RGBA colors of the nodes of the figure drawn, before it is saved"
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PathCollection
+    with contextlib.redirect_stdout (io.StringIO ()):
+        pyPLB.draw_network (N, layout = layout, zscores = zscores, label_sample_n = 5, output_files = [ ], collection_threshold = collection_threshold)
+    ax = plt.gca ()
+    colors = [ c.get_facecolors () for c in ax.collections if isinstance (c, PathCollection) ][0]
+    plt.close ("all")
+    return colors
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of collection-based rendering")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-L', '--layout', type = str, default = "Multi_partite")
+    parser.add_argument ('-o', '--output_dir', type = str, default = None)
+    parser.add_argument ('--skip_patches', action = 'store_true', default = False)
+    args = parser.parse_args ()
+    ##
+    import matplotlib
+    matplotlib.use ("Agg")
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = False)
+    N = list (pyPLB.make_links_ranked (M.links).items())
+    output_dir = args.output_dir or tempfile.mkdtemp (prefix = "pyPLB-")
+    os.makedirs (output_dir, exist_ok = True)
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(M.nodes)} nodes, {len(M.links)} links; output_dir: {output_dir}")
+    ##
+    if not args.skip_patches:
+        ## colors are compared on figures left unsaved
+        plt_colors = get_node_colors (N, M.source_zscores, args.layout, None)
+        col_colors = get_node_colors (N, M.source_zscores, args.layout, 0)
+        assert np.allclose (plt_colors, col_colors)
+        _, spent = timed (draw, N, M.source_zscores, args.layout, os.path.join (output_dir, "patches.png"), None)
+        print (f"#patch per edge: {spent:.3f} s")
+    _, spent = timed (draw, N, M.source_zscores, args.layout, os.path.join (output_dir, "collection.png"), 0)
+    print (f"#collection:     {spent:.3f} s")
+
+### end of file
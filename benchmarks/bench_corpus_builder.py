@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+bench_corpus_builder.py
+
+compares the peak memory and time of building the merged lattice of a corpus as __main__ does by default,
+with a PatternLattice per source kept in a list and merged afterwards, with CorpusLatticeBuilder,
+which streams sources from a generator into one NodeIndex, and checks that they give the same nodes and links.
+
+usage: python benchmarks/bench_corpus_builder.py [-G] [-f file]
+"""
+
+## imports
+import time
+import functools
+import argparse
+import tracemalloc
+from bench_utils import *
+
+### Functions
+##
+def build_by_lattices (sources: list, generalized: bool):
+    "builds lattices of all sources, merges them, and generates links"
+    lattices = [ pyPLB.PatternLattice (pyPLB.Pattern (s, gap_mark = "_"), generalized = generalized) for s in sources ]
+    params   = dict (gen_links_internally = False, use_mp = False, generalized = generalized, reflexive = True, reductive = True, check = False)
+    merged   = functools.reduce (lambda La, Lb: La.merge_lattices (Lb, **params), lattices)
+    return merged.update_links (reflexive = True)
+
+##
+def build_by_stream (sources: list, generalized: bool):
+    "streams sources into a CorpusLatticeBuilder and generates links once"
+    builder = pyPLB.CorpusLatticeBuilder (generalized = generalized)
+    builder.add_sources (pyPLB.Pattern (s, gap_mark = "_") for s in sources)
+    return builder.build (use_mp = False)
+
+##
+def measure (build, sources: list, generalized: bool):
+    "returns the result of build with its time and peak memory"
+    tracemalloc.start ()
+    start  = time.perf_counter ()
+    result = build (sources, generalized)
+    spent  = time.perf_counter () - start
+    peak   = tracemalloc.get_traced_memory ()[1]
+    tracemalloc.stop ()
+    return result, spent, peak
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of CorpusLatticeBuilder")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    args = parser.parse_args ()
+    ##
+    sources = read_sources (args.file)
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(sources)} sources")
+    M, spent, peak = measure (build_by_lattices, sources, args.generalized)
+    print (f"#lattices then merger: {spent:.3f}s; peak {peak / 2**20:.1f} MiB; {len(M.nodes)} nodes, {len(M.links)} links")
+    S, spent, peak = measure (build_by_stream, sources, args.generalized)
+    print (f"#streamed builder:     {spent:.3f}s; peak {peak / 2**20:.1f} MiB; {len(S.nodes)} nodes, {len(S.links)} links")
+    assert [ p.form for p in S.nodes ] == [ p.form for p in M.nodes ]
+    assert [ link.form_paired for link in S.links ] == [ link.form_paired for link in M.links ]
+    support = S.node_index.support
+    print (f"#nodes supported by one source: {sum(1 for n in support.values() if n == 1)}; most supported: {max(support.values())} sources")
+
+### end of file
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+bench_graph_assembly.py
+
+times the graph assembly of draw_network(..), assemble_lattice_graph(..), on the links of a merged lattice against the
+loop draw_network(..) ran before, kept here as the reference, which checked lists for membership and computed ranks
+per link, and times rendering apart from assembly. Under each pruning setting, no bounds, a lower bound, an upper bound
+and both, it checks that both give the same nodes with their ranks, in the same order, edges, instances and pruned count.
+
+usage: python benchmarks/bench_graph_assembly.py [-G] [-f file] [-l lower_bound] [-u upper_bound] [-n max_sources] [-R]
+"""
+
+## imports
+import argparse
+import contextlib
+import io
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+from pyPLB import get_rank_of_list, count_items
+
+##
+def assemble_lattice_graph_reference (N: dict, zscores: dict, zscore_lb = None, zscore_ub = None, use_directed_graph: bool = True, check: bool = False) -> tuple:
+    "returns the graph, instances and pruned count as draw_network(..) made them before assemble_lattice_graph(..)"
+    import networkx as nx
+
+    ## define graph
+    if use_directed_graph:
+        G = nx.DiGraph()
+    else:
+        G = nx.Graph() # does not accept connectionstyle specification
+    ##
+    try:
+        rank_max = max(int(x[0]) for x in list(N))
+    except ValueError:
+        rank_max = 3
+    ##
+    node_dict = { }
+    instances = [ ] # register instances
+    pruned_node_count = 0
+    for rank, links in sorted (N, reverse = True): # be careful on list up direction
+        L, R, E = [], [], []
+        for link in links:
+            if check:
+                print(f"#adding link at rank {rank}: {link}")
+            ## process nodes
+            gap_mark      = link.gap_mark
+            node1, node2  = link.form_paired
+            node1_rank    = get_rank_of_list (node1, gap_mark)
+            node2_rank    = get_rank_of_list (node2, gap_mark)
+
+            ## register node for instances
+            if count_items (node1, gap_mark) == 0 and node1 not in instances:
+                instances.append (node1)
+            if count_items (node2, gap_mark) == 0 and node2 not in instances:
+                instances.append (node2)
+
+            ## assign z-scores
+            try:
+                node1_zscore = zscores[node1]
+            except KeyError:
+                node1_zscore = 0
+            try:
+                node2_zscore = zscores[node2]
+            except KeyError:
+                node2_zscore = 0
+
+            ## add nodes
+            ## when lowerbound and upperbound z-score pruning is applied
+            if zscore_ub is not None and zscore_lb is not None: # z-score pruning
+                ## node1
+                if node1_zscore >= zscore_lb and node1_zscore <= zscore_ub and node1_rank == rank and not node1 in L:
+                    L.append (node1)
+                else:
+                    print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## node2
+                if node2_zscore >= zscore_lb and node2_zscore <= zscore_ub:
+                    if node2_rank == rank + 1 and not node2 in R:
+                        R.append (node2)
+                    elif not node2 in L:
+                        L.append (node2)
+                else:
+                    print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## process edges
+                if node1_zscore >= zscore_lb and node1_zscore <= zscore_ub and node2_zscore >= zscore_lb and node2_zscore <= zscore_ub:
+                    edge = (node1, node2)
+                    #edge = (node2, node1)
+                try:
+                    if edge and not edge in E:
+                        E.append (edge)
+                except UnboundLocalError:
+                    pass
+            ## when upperbound z-score pruning is applied
+            elif not zscore_ub is None: # z-score pruning
+                ## node1
+                if node1_zscore <= zscore_ub and not node1 in L:
+                    L.append (node1)
+                else:
+                    print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## node2
+                if node2_zscore <= zscore_ub and get_rank_of_list (node2, gap_mark) == rank and not node2 in R:
+                    R.append (node2)
+                elif node2_zscore <= zscore_ub and not node2 in L:
+                    R.append (node2)
+                else:
+                    print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## register instance nodes
+                if count_items (node2, gap_mark) == 0 and node2 not in instances:
+                    instances.append (node2)
+                ## process edges
+                if node1_zscore <= zscore_ub and node2_zscore <= zscore_ub:
+                    edge = (node1, node2)
+                try:
+                    if edge and not edge in E:
+                        E.append (edge)
+                except UnboundLocalError:
+                    pass
+            ## when lowerbound z-score pruning is applied
+            elif not zscore_lb is None: # z-score pruning applied
+                ## node1
+                if node1_zscore >= zscore_lb and not node1 in L:
+                    L.append (node1)
+                else:
+                    print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## node2
+                if node2_zscore >= zscore_lb and get_rank_of_list (node2, gap_mark) == rank and not node2 in R:
+                    R.append (node2)
+                elif node2_zscore >= zscore_lb and not node2 in L:
+                    R.append (node2)
+                else:
+                    print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
+                    pruned_node_count += 1
+                ## process edges
+                if node1_zscore >= zscore_lb and node2_zscore >= zscore_lb:
+                    edge = (node1, node2)
+                try:
+                    if edge and not edge in E:
+                        E.append (edge)
+                except UnboundLocalError:
+                    pass
+            ## when z-score pruning not applied
+            else:
+                ## node1
+                if node1_rank == rank and not node1 in L:
+                    L.append (node1)
+                ## node2
+                if node2_rank == rank + 1:
+                    if not node2 in R:
+                        R.append (node2)
+                elif node2_rank == rank and not node2 in L:
+                    L.append (node2)
+                ## process edges
+                if node1 and node2:
+                    edge = (node1, node2)
+                if edge and not edge in E:
+                    E.append (edge)
+        ## L, R, E created
+        ## populates nodes for G
+        ## forward rank scan = rank increments
+        #G.add_nodes_from (L, rank = rank)
+        #G.add_nodes_from (R, rank = rank + 1)
+        ## backward rank scan = rank decrements
+        G.add_nodes_from (R, rank = (rank_max - rank - 1))
+        G.add_nodes_from (L, rank = (rank_max - rank))
+        #G.add_nodes_from (R, rank = rank + 1)
+        #G.add_nodes_from (L, rank = rank)
+
+        ## populates edges for G
+        G.add_edges_from (E)
+
+    return G, instances, pruned_node_count
+
+##
+def get_state (result: tuple) -> tuple:
+    "returns what is compared between assembled graphs"
+    G, instances, pruned_node_count = result
+    return list (G.nodes (data = "rank")), list (G.edges ()), instances, pruned_node_count
+
+##
+def quietly (func, *args, **kwargs):
+    "calls func with its printing discarded"
+    with contextlib.redirect_stdout (io.StringIO ()):
+        return func (*args, **kwargs)
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of graph assembly for drawing")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-l', '--lower_bound', type = float, default = -0.5)
+    parser.add_argument ('-u', '--upper_bound', type = float, default = 1.0)
+    parser.add_argument ('-n', '--max_sources', type = int, default = None)
+    parser.add_argument ('-R', '--render', action = 'store_true', default = False)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file)[:args.max_sources], args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = False)
+    N = list (pyPLB.make_links_ranked (M.links).items())
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(M.nodes)} nodes, {len(M.links)} links")
+    ##
+    settings = [ (None, None), (args.lower_bound, None), (None, args.upper_bound), (args.lower_bound, args.upper_bound) ]
+    for lb, ub in settings:
+        expected, by_lists = timed (quietly, assemble_lattice_graph_reference, N, M.source_zscores, zscore_lb = lb, zscore_ub = ub)
+        result, by_sets    = timed (quietly, pyPLB.assemble_lattice_graph, N, M.source_zscores, zscore_lb = lb, zscore_ub = ub)
+        assert get_state (result) == get_state (expected)
+        print (f"#bounds ({lb}, {ub}): {result[0].number_of_nodes()} nodes, {result[0].number_of_edges()} edges, {result[2]} pruned; lists: {1000 * by_lists:.3f} ms; sets: {1000 * by_sets:.3f} ms")
+    ## rendering, apart from assembly, with a non-interactive backend
+    if args.render:
+        import matplotlib
+        matplotlib.use ("Agg")
+        import matplotlib.pyplot as plt
+        _, drawn = timed (quietly, pyPLB.draw_network, N, layout = "Multi_partite", zscores = M.source_zscores)
+        plt.close ("all")
+        _, assembled = timed (quietly, pyPLB.assemble_lattice_graph, N, M.source_zscores)
+        print (f"#draw_network: {drawn:.3f} s, of which assembly {1000 * assembled:.3f} ms and rendering {drawn - assembled:.3f} s")
+
+### end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+bench_incremental_links.py
+
+times a stepwise build, where links are updated after each source is merged as __main__ does with -S, with links
+generated again at each step and with links updated incrementally, against a one-shot build that merges all sources
+first and generates links once. Links of the incremental build are checked against those generated in full.
+
+usage: python benchmarks/bench_incremental_links.py [-G] [-f file] [-n max_sources]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+
+##
+def build_stepwise (lattices: list, generalized: bool, incremental: bool):
+    "merges lattices one by one, updating links at each step, and returns the merged lattice"
+    M = lattices[0]
+    for lattice in lattices[1:]:
+        M = M.merge_lattices (lattice, gen_links_internally = True, use_mp = False, generalized = generalized, reflexive = True, reductive = True, incremental = incremental, check = False)
+    return M
+
+##
+def build_at_once (lattices: list, generalized: bool):
+    "merges lattices one by one without links, generates links once, and returns the merged lattice"
+    M = lattices[0]
+    for lattice in lattices[1:]:
+        M = M.merge_lattices (lattice, gen_links_internally = False, use_mp = False, generalized = generalized, reflexive = True, reductive = True, check = False)
+    M.update_links (reflexive = True, use_mp = False)
+    return M
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of incremental link update")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-n', '--max_sources', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    sources  = read_sources (args.file)[:args.max_sources]
+    patterns = sorted ([ pyPLB.Pattern (s, gap_mark = "_") for s in sources ], key = len)
+    lattices = [ pyPLB.PatternLattice (p, generalized = args.generalized) for p in patterns ]
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(lattices)} sources")
+    ##
+    full, t_full = timed (build_stepwise, lattices, args.generalized, False)
+    incr, t_incr = timed (build_stepwise, lattices, args.generalized, True)
+    once, t_once = timed (build_at_once, lattices, args.generalized)
+    ##
+    expected = sorted (link.form_paired for link in once.links)
+    for M in [ full, incr ]:
+        assert sorted (link.form_paired for link in M.links) == expected
+        assert M.link_sources == once.link_sources and M.link_targets == once.link_targets
+    print (f"#{len(once.nodes)} nodes, {len(once.links)} links")
+    print (f"#stepwise, full:        {t_full:.3f} s")
+    print (f"#stepwise, incremental: {t_incr:.3f} s")
+    print (f"#one-shot:              {t_once:.3f} s")
+
+### end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+bench_ipc.py
+
+compares multiprocess link generation on a merged lattice that ships Pattern pairs to workers
+(classify_relations_mp2) with the one that ships int-encoded forms through shared memory
+(classify_relations_shm), reporting IPC bytes per link and checking that the links agree.
+
+usage: python benchmarks/bench_ipc.py [-G] [-f file] [-j n_workers]
+"""
+
+## imports
+import pickle
+import argparse
+from itertools import product
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of IPC in multiprocess link generation")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    print (f"#file: {args.file}; generalized: {args.generalized}; merged lattice with {len(M.nodes)} nodes")
+    ## IPC of Pattern pairs, estimated by pickling what classify_relations_mp2 sends and receives
+    with pyPLB.WorkerPool (args.n_workers) as pool:
+        _, mp2_time = timed (M.update_links, reflexive = True, use_mp = True, use_index = False, use_shm = False, execution = "process", pool = pool)
+    expected = [ link.form_paired for link in M.links ]
+    mp2_bytes = 0
+    for rank in sorted (list (M.ranked_nodes)):
+        L = M.ranked_nodes[rank]
+        R = M.ranked_nodes.get (rank + 1, []) + L
+        mp2_bytes += sum (len (pickle.dumps (pair)) for pair in product (R, L))
+    mp2_bytes += sum (len (pickle.dumps ([ (link.left, link.right) ])) for link in M.links)
+    print (f"#Pattern pairs: {mp2_time:.3f}s; IPC about {mp2_bytes} bytes for {len(expected)} links ({mp2_bytes / len(expected):.1f} B/link)")
+    ## IPC of int-encoded forms
+    with pyPLB.WorkerPool (args.n_workers) as pool:
+        _, shm_time = timed (M.update_links, reflexive = True, use_mp = True, use_index = False, use_shm = True, execution = "process", pool = pool)
+    assert [ link.form_paired for link in M.links ] == expected
+    print (f"#shared memory: {shm_time:.3f}s; {pool.report()}")
+
+### end of file
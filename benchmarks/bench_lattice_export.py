@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_lattice_export.py
+
+writes a merged lattice with z-scores to GraphML, GEXF, DOT and JSON Lines with PatternLattice.export(..), streaming
+nodes and links, and reports the time and the peak of memory allocated (tracemalloc) for each, against building
+a networkx graph of the same nodes and links and writing it with nx.write_graphml(..). It checks the files by reading
+GraphML and GEXF back with networkx, JSON Lines line by line, and DOT by counting node and edge statements.
+
+usage: python benchmarks/bench_lattice_export.py [-G] [-f file] [-o output_dir]
+"""
+
+## imports
+import argparse
+import json
+import math
+import re
+import tempfile
+import tracemalloc
+import networkx as nx
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+##
+def measured (func, *args, **kwargs):
+    "returns a triple of the result of func, the seconds spent and the peak of memory allocated in MB, traced in another call"
+    result, spent = timed (func, *args, **kwargs)
+    tracemalloc.start ()
+    func (*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory ()
+    tracemalloc.stop ()
+    return result, spent, peak / 2**20
+
+##
+def write_through_networkx (M, path: str) -> None:
+    "builds a networkx graph of M with the fields export(..) writes and writes it in GraphML"
+    G = nx.DiGraph ()
+    support = M.get_support ()
+    for p in M.nodes:
+        G.add_node (p.form, form = pyPLB.as_label (p.form, sep = " "), content = json.dumps ([ list(c) for c in p.content ]), rank = pyPLB.get_rank_of_list (p.form, M.gap_mark), support = support.get (p.form, 1), source_zscore = float(M.source_zscores.get (p.form, 0)), target_zscore = float(M.target_zscores.get (p.form, 0)))
+    for link in M.links:
+        G.add_edge (*link.form_paired, link_type = link.link_type)
+    nx.write_graphml (G, path)
+
+##
+def check_files (M, paths: dict) -> None:
+    "asserts that the files written hold the nodes and links of M with their fields"
+    n_nodes, n_links = len(M.nodes), len(M.links)
+    labels = { pyPLB.as_label (p.form, sep = " "): p for p in M.nodes }
+    ## GraphML and GEXF read back
+    for fmt in [ "graphml", "gexf" ]:
+        G = nx.read_graphml (paths[fmt]) if fmt == "graphml" else nx.read_gexf (paths[fmt])
+        assert G.number_of_nodes () == n_nodes and G.number_of_edges () == n_links, fmt
+        for _, data in G.nodes (data = True):
+            p = labels[data["form"]]
+            assert data["rank"] == pyPLB.get_rank_of_list (p.form, M.gap_mark)
+            assert json.loads (data["content"]) == [ list(c) for c in p.content ]
+            for name, zscores in [ ("source_zscore", M.source_zscores), ("target_zscore", M.target_zscores) ]:
+                if p.form in zscores:
+                    assert math.isclose (data[name], zscores[p.form])
+                else:
+                    assert name not in data # not computed for p
+    ## JSON Lines
+    with open (paths["jsonl"]) as f:
+        records = [ json.loads (line) for line in f ]
+    nodes = [ r for r in records if r["type"] == "node" ]
+    links = [ r for r in records if r["type"] == "link" ]
+    assert len(nodes) == n_nodes and len(links) == n_links
+    forms = [ tuple(r["form"]) for r in nodes ]
+    assert forms == [ p.form for p in M.nodes ]
+    assert [ (forms[r["source"]], forms[r["target"]]) for r in links ] == [ link.form_paired for link in M.links ]
+    ## DOT
+    with open (paths["dot"]) as f:
+        lines = f.read ().splitlines ()
+    assert sum (1 for x in lines if " -> " in x) == n_links and sum (1 for x in lines if re.match (r"n\d+ \[", x)) == n_nodes
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of streaming graph export")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-o', '--output_dir', type = str, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = False)
+    pyPLB.gen_zscores_from_targets (M, gap_mark = "_", use_robust_zscore = False)
+    output_dir = args.output_dir or tempfile.mkdtemp (prefix = "pyPLB-")
+    os.makedirs (output_dir, exist_ok = True)
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(M.nodes)} nodes, {len(M.links)} links; output_dir: {output_dir}")
+    ##
+    paths = { }
+    for fmt in [ "graphml", "gexf", "dot", "jsonl" ]:
+        paths[fmt] = os.path.join (output_dir, f"lattice.{fmt}")
+        _, spent, peak = measured (M.export, paths[fmt])
+        print (f"#{fmt:8s} streamed: {spent:.3f} s, peak {peak:.2f} MB, {os.path.getsize (paths[fmt])} bytes")
+    _, spent, peak = measured (write_through_networkx, M, os.path.join (output_dir, "networkx.graphml"))
+    print (f"#graphml  through networkx: {spent:.3f} s, peak {peak:.2f} MB")
+    check_files (M, paths)
+    print (f"#files checked")
+
+### end of file
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+bench_lattice_nodes.py
+
+compares the closed-form node enumeration of Pattern.build_lattice_nodes with
+the fixed-point iteration it replaced (Pattern.build_lattice_nodes_iteratively)
+for source lengths 3 to 14.
+
+usage: python benchmarks/bench_lattice_nodes.py [-G] [-K] [--min_size n] [--max_size n]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of lattice node enumeration")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-K', '--use_compact_patterns', action = 'store_true', default = False)
+    parser.add_argument ('--min_size', type = int, default = 3)
+    parser.add_argument ('--max_size', type = int, default = 14)
+    parser.add_argument ('--max_iterative_size', type = int, default = 14, help = "skip the iterative engine beyond this size")
+    parser.add_argument ('-r', '--repeat', type = int, default = 3)
+    args = parser.parse_args ()
+    ##
+    if args.use_compact_patterns:
+        pattern_class = pyPLB.CompactPattern
+    else:
+        pattern_class = pyPLB.Pattern
+    ##
+    print (f"#generalized: {args.generalized}; pattern class: {pattern_class.__name__}")
+    print (f"{'size':>4s} {'nodes':>7s} {'iterative (ms)':>15s} {'closed form (ms)':>17s} {'speedup':>8s}")
+    for size in range (args.min_size, args.max_size + 1):
+        source = make_synthetic_sources (1, size, seed = size)[0]
+        p = pattern_class (source, gap_mark = "_")
+        nodes, closed = timed (p.build_lattice_nodes, generalized = args.generalized, repeat = args.repeat)
+        if size <= args.max_iterative_size:
+            old_nodes, iterative = timed (p.build_lattice_nodes_iteratively, generalized = args.generalized, repeat = args.repeat)
+            assert [ x.paired for x in old_nodes ] == [ x.paired for x in nodes ]
+            print (f"{size:4d} {len(nodes):7d} {1000 * iterative:15.2f} {1000 * closed:17.2f} {iterative / closed:8.2f}")
+        else:
+            print (f"{size:4d} {len(nodes):7d} {'-':>15s} {1000 * closed:17.2f} {'-':>8s}")
+
+### end of file
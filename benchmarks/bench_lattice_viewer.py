@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+bench_lattice_viewer.py
+
+writes the HTML viewer of a merged lattice with write_lattice_viewer(..) and reports the time spent and the size of
+the file, against the size of the same data in plain JSON, nodes as lists of segments and edges as pairs of them,
+then writes it again within a byte budget and checks that levels are left out from the highest rank to keep it.
+
+usage: python benchmarks/bench_lattice_viewer.py [-G] [-f file] [-o output] [-b max_bytes]
+"""
+
+## imports
+import argparse
+import json
+import tempfile
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the HTML viewer")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-o', '--output', type = str, default = None)
+    parser.add_argument ('-b', '--max_bytes', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = False)
+    output = args.output or os.path.join (tempfile.mkdtemp (prefix = "pyPLB-"), "lattice.html")
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(M.nodes)} nodes, {len(M.links)} links; output: {output}")
+    ##
+    result, spent = timed (M.export_html, output)
+    assert result["nodes"] == len(M.nodes) and result["levels_left_out"] == 0
+    plain = json.dumps ({ "nodes": [ [ list(p.form), M.source_zscores.get (p.form) ] for p in M.nodes ],
+                          "edges": [ [ list(l), list(r) ] for l, r in (link.form_paired for link in M.links) ] })
+    print (f"#viewer: {result['bytes']} bytes ({result['bytes'] / len(M.nodes):.1f} per node) in {spent:.3f} s; {result['segments']} segments")
+    print (f"#plain JSON data alone: {len(plain.encode ())} bytes")
+    ## a budget of half the size leaves out the highest ranks
+    max_bytes = args.max_bytes or result["bytes"] // 2
+    budgeted, _ = timed (M.export_html, output, max_bytes = max_bytes)
+    assert budgeted["bytes"] <= max_bytes and budgeted["levels_left_out"] > 0
+    print (f"#within {max_bytes} bytes: {budgeted['bytes']} bytes; {budgeted['levels']} levels, {budgeted['nodes']} nodes, {budgeted['edges']} edges; {budgeted['levels_left_out']} levels left out")
+
+### end of file
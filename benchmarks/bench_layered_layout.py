@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+bench_layered_layout.py
+
+times layered_layout(..), the rank-based layout with barycenter crossing reduction selected by -L Layered, against
+nx.multipartite_layout(..), the default, and counts the edge crossings between adjacent layers of both, on the graph
+that draw_network(..) assembles for a merged lattice and on a random layered graph of n nodes (10^5 by default).
+
+usage: python benchmarks/bench_layered_layout.py [-G] [-f file] [-n n_nodes] [-l n_layers] [-d degree] [-s sweeps]
+"""
+
+## imports
+import argparse
+import contextlib
+import io
+import numpy as np
+import networkx as nx
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+##
+def count_inversions (values: np.ndarray) -> int:
+    "returns the number of pairs out of order in values, by merge sort"
+    values = list(values)
+    count  = 0
+    width  = 1
+    while width < len(values):
+        merged = [ ]
+        for start in range (0, len(values), 2 * width):
+            left, right = values[start:start + width], values[start + width:start + 2 * width]
+            i = j = 0
+            while i < len(left) and j < len(right):
+                if right[j] < left[i]:
+                    merged.append (right[j]); j += 1
+                    count += len(left) - i
+                else:
+                    merged.append (left[i]); i += 1
+            merged.extend (left[i:]); merged.extend (right[j:])
+        values = merged
+        width *= 2
+    return count
+
+##
+def count_crossings (G, positions: dict) -> int:
+    "returns the number of crossings among edges between adjacent layers, with layers on x and orders on y"
+    xs = { x for x, _ in positions.values() }
+    layer_of = { x: i for i, x in enumerate (sorted (xs)) }
+    groups = { }
+    for u, v in G.edges():
+        (xu, yu), (xv, yv) = positions[u], positions[v]
+        lu, lv = layer_of[xu], layer_of[xv]
+        if abs(lu - lv) != 1:
+            continue
+        if lu > lv:
+            yu, yv, lu = yv, yu, lv
+        groups.setdefault (lu, [ ]).append ((yu, yv))
+    total = 0
+    for pairs in groups.values():
+        pairs.sort ()
+        total += count_inversions (np.array ([ b for _, b in pairs ]))
+    return total
+
+##
+def make_layered_graph (n_nodes: int, n_layers: int, degree: int, seed: int = 0):
+    "returns a random directed graph of n_nodes nodes in n_layers layers, with degree edges from each node to the next layer"
+    rng    = np.random.default_rng (seed)
+    layers = np.sort (rng.integers (0, n_layers, n_nodes))
+    G = nx.DiGraph ()
+    for i, k in enumerate (layers):
+        G.add_node (i, rank = int(k))
+    starts = np.searchsorted (layers, np.arange (n_layers + 1))
+    for k in range (n_layers - 1):
+        members, successors = np.arange (starts[k], starts[k + 1]), np.arange (starts[k + 1], starts[k + 2])
+        if len(members) == 0 or len(successors) == 0:
+            continue
+        targets = rng.choice (successors, size = (len(members), degree))
+        G.add_edges_from ((int(u), int(v)) for u, row in zip (members, targets) for v in row)
+    return G
+
+##
+def compare (name: str, G, sweeps: int, with_crossings: bool = True):
+    "prints the time spent and crossings of both layouts of G"
+    default, by_networkx = timed (nx.multipartite_layout, G, subset_key = "rank", scale = -1)
+    layered, by_numpy    = timed (pyPLB.layered_layout, G, subset_key = "rank", sweeps = sweeps, scale = -1)
+    assert set(layered) == set(G) and all (np.allclose (default[x][0], layered[x][0]) for x in G) # same layers
+    print (f"#{name}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    if with_crossings:
+        print (f"#multipartite_layout: {by_networkx:.3f} s; {count_crossings (G, default)} crossings")
+        print (f"#layered_layout:      {by_numpy:.3f} s; {count_crossings (G, layered)} crossings")
+    else:
+        print (f"#multipartite_layout: {by_networkx:.3f} s")
+        print (f"#layered_layout:      {by_numpy:.3f} s")
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the layered layout")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-n', '--n_nodes', type = int, default = 10**5)
+    parser.add_argument ('-l', '--n_layers', type = int, default = 10)
+    parser.add_argument ('-d', '--degree', type = int, default = 3)
+    parser.add_argument ('-s', '--sweeps', type = int, default = 4)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = False)
+    N = list (pyPLB.make_links_ranked (M.links).items())
+    with contextlib.redirect_stdout (io.StringIO ()):
+        G, _, _ = pyPLB.assemble_lattice_graph (N, M.source_zscores)
+    compare (f"lattice of {args.file}", G, args.sweeps)
+    ##
+    G = make_layered_graph (args.n_nodes, args.n_layers, args.degree)
+    compare ("random layered graph", G, args.sweeps, with_crossings = args.n_nodes <= 10**5)
+
+### end of file
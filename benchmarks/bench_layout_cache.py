@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+bench_layout_cache.py
+
+times LayoutCache.get_layout(..) on the graph draw_network(..) assembles for a merged lattice: a miss, which lays it
+out, a hit in memory, and a hit on disk, from a new cache on the same directory, for each layout given,
+and checks that the positions of hits are the ones computed and that the key does not depend on the order of nodes.
+
+usage: python benchmarks/bench_layout_cache.py [-G] [-f file] [-L layouts] [-d cache_dir]
+"""
+
+## imports
+import argparse
+import contextlib
+import io
+import tempfile
+import numpy as np
+import networkx as nx
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the layout cache")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-L', '--layouts', type = str, default = "Multi_partite,Layered,FR,KK")
+    parser.add_argument ('-d', '--cache_dir', type = str, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    N = list (pyPLB.make_links_ranked (M.links).items())
+    with contextlib.redirect_stdout (io.StringIO ()):
+        G, _, _ = pyPLB.assemble_lattice_graph (N)
+    G = nx.relabel_nodes (G, { x: pyPLB.as_label (x, sep = " ", add_sep_at_end = True) for x in G })
+    cache_dir = args.cache_dir or tempfile.mkdtemp (prefix = "pyPLB-")
+    print (f"#file: {args.file}; generalized: {args.generalized}; {G.number_of_nodes()} nodes, {G.number_of_edges()} edges; cache_dir: {cache_dir}")
+    ## the key is the same for the nodes and edges added in another order
+    H = nx.DiGraph ()
+    H.add_nodes_from (reversed (list (G.nodes (data = True))))
+    H.add_edges_from (reversed (list (G.edges ())))
+    assert pyPLB.LayoutCache.make_key (G, layout = "M") == pyPLB.LayoutCache.make_key (H, layout = "M")
+    _, hashing = timed (pyPLB.LayoutCache.make_key, G, layout = "M")
+    print (f"#key: {1000 * hashing:.3f} ms")
+    ##
+    cache = pyPLB.LayoutCache (cache_dir = cache_dir)
+    for layout in args.layouts.split (","):
+        (name, computed), missed = timed (cache.get_layout, G, layout)
+        (_, in_memory), by_memory = timed (cache.get_layout, G, layout)
+        (_, on_disk), by_disk = timed (pyPLB.LayoutCache (cache_dir = cache_dir).get_layout, G, layout)
+        for positions in [ in_memory, on_disk ]:
+            assert all (np.array_equal (positions[x], computed[x]) for x in G)
+        print (f"#{name}: miss {1000 * missed:.3f} ms; memory hit {1000 * by_memory:.3f} ms; disk hit {1000 * by_disk:.3f} ms")
+    print (f"#{cache}")
+
+### end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+bench_link_construction.py
+
+compares link generation by construction (classify_relations_by_construction) with
+pairwise testing (classify_relations) on single-source lattices, and checks that
+links, link_sources and link_targets agree on every source of every file in data/.
+
+usage: python benchmarks/bench_link_construction.py [-G] [--max_size n] [files ...]
+"""
+
+## imports
+import glob
+import argparse
+from bench_utils import *
+
+### Functions
+##
+def link_data (lattice) -> tuple:
+    "returns what must agree between two ways of link generation"
+    links = [ (link.form_paired, link.content_paired) for link in lattice.links ]
+    return links, dict (lattice.link_sources), dict (lattice.link_targets)
+
+##
+def compare (pattern, generalized: bool) -> tuple:
+    "builds links of a single-source lattice both ways and returns their times after checking that they agree"
+    lattice = pyPLB.PatternLattice (pattern, generalized = generalized)
+    _, pairwise = timed (lattice.update_links, reflexive = True, use_mp = False, by_construction = False)
+    expected = link_data (lattice)
+    _, constructed = timed (lattice.update_links, reflexive = True, use_mp = False, by_construction = True)
+    assert link_data (lattice) == expected, f"links differ on {pattern}"
+    return len (lattice.nodes), len (lattice.links), pairwise, constructed
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of link generation by construction")
+    parser.add_argument ('files', type = str, nargs = '*')
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('--max_size', type = int, default = 10)
+    args = parser.parse_args ()
+    ##
+    files = args.files or sorted (glob.glob (os.path.join (data_dir, "*.csv")))
+    print (f"#generalized: {args.generalized}")
+    print (f"{'file':36s} {'sources':>7s} {'links':>7s} {'pairwise (s)':>13s} {'constructed (s)':>16s}")
+    for file_name in files:
+        sources = read_sources (file_name, max_size = args.max_size)
+        n_links, pairwise, constructed = 0, 0, 0
+        for s in sources:
+            _, l, t1, t2 = compare (pyPLB.Pattern (s, gap_mark = "_"), args.generalized)
+            n_links += l; pairwise += t1; constructed += t2
+        print (f"{os.path.basename(file_name):36s} {len(sources):7d} {n_links:7d} {pairwise:13.3f} {constructed:16.3f}")
+    ## scaling by source size
+    print (f"{'size':>4s} {'nodes':>7s} {'links':>7s} {'pairwise (s)':>13s} {'constructed (s)':>16s}")
+    for size in range (3, args.max_size + 1):
+        source = make_synthetic_sources (1, size, seed = size)[0]
+        n, l, t1, t2 = compare (pyPLB.Pattern (source, gap_mark = "_"), args.generalized)
+        print (f"{size:4d} {n:7d} {l:7d} {t1:13.3f} {t2:16.3f}")
+
+### end of file
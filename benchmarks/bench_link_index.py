@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+bench_link_index.py
+
+compares link generation on a merged lattice by ParentIndex lookup (classify_relations_indexed)
+with pairwise testing (classify_relations), rank by rank, and checks that they give the same links.
+
+usage: python benchmarks/bench_link_index.py [-G] [-f file]
+"""
+
+## imports
+import functools
+import argparse
+from bench_utils import *
+
+### Functions
+##
+def build_merged_lattice (sources: list, generalized: bool):
+    "builds the merged lattice of sources without links"
+    lattices = [ pyPLB.PatternLattice (pyPLB.Pattern (s, gap_mark = "_"), generalized = generalized) for s in sources ]
+    params   = dict (gen_links_internally = False, use_mp = False, generalized = generalized, reflexive = True, reductive = True, check = False)
+    return functools.reduce (lambda La, Lb: La.merge_lattices (Lb, **params), lattices)
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of indexed link generation")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    print (f"#file: {args.file}; generalized: {args.generalized}; merged lattice with {len(M.nodes)} nodes")
+    print (f"{'rank':>4s} {'pairs':>10s} {'links':>7s} {'pairwise (s)':>13s} {'indexed (s)':>12s} {'us/link':>8s}")
+    ranked_nodes = M.ranked_nodes
+    totals = [ 0, 0, 0, 0 ]
+    for rank in sorted (list (ranked_nodes)):
+        L = ranked_nodes[rank]
+        R = ranked_nodes.get (rank + 1, []) + L # reflexive, as gen_links does
+        pairwise_links, pairwise = timed (pyPLB.classify_relations, R, L)
+        indexed_links, indexed   = timed (pyPLB.classify_relations_indexed, R, L)
+        assert [ x.form_paired for x in indexed_links ] == [ x.form_paired for x in pairwise_links ]
+        n_links = len (indexed_links)
+        print (f"{rank:4d} {len(R) * len(L):10d} {n_links:7d} {pairwise:13.3f} {indexed:12.3f} {1e6 * indexed / max(n_links, 1):8.1f}")
+        for i, x in enumerate ([ len(R) * len(L), n_links, pairwise, indexed ]):
+            totals[i] += x
+    print (f"{'all':>4s} {totals[0]:10d} {totals[1]:7d} {totals[2]:13.3f} {totals[3]:12.3f} {1e6 * totals[3] / max(totals[1], 1):8.1f}")
+
+### end of file
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+bench_link_planner.py
+
+times link generation on a merged lattice in each execution mode (serial, thread, process) for indexed and
+pairwise methods, and shows the mode the LinkPlanner chooses with its thresholds, as calibrated or by default.
+
+usage: python benchmarks/bench_link_planner.py [-G] [-f file] [-j n_workers]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the link planner")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    planner = pyPLB.get_link_planner ()
+    print (f"#file: {args.file}; generalized: {args.generalized}; merged lattice with {len(M.nodes)} nodes")
+    print (f"#planner: {planner}")
+    expected = None
+    for use_index in [ True, False ]:
+        for execution in [ "serial", "thread", "process", "auto" ]:
+            with pyPLB.WorkerPool (args.n_workers) as pool:
+                _, spent = timed (M.update_links, reflexive = True, use_mp = True, use_index = use_index, execution = execution, pool = pool)
+            links = [ link.form_paired for link in M.links ]
+            if expected is None:
+                expected = links
+            assert links == expected
+            print (f"#{execution:>7s}: {spent:.3f}s; {planner.describe (M.link_plan)}")
+
+### end of file
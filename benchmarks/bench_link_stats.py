@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+bench_link_stats.py
+
+times the link statistics of a merged lattice: counting links by node and by rank with a LinkStats as gen_links(..)
+does, block by block, against the passes update_links(..) made after generation, make_links_ranked(..) and
+get_link_stats(..), and checks that both give the same ranked links, link sources and link targets.
+
+usage: python benchmarks/bench_link_stats.py [-G] [-f file] [-r repeat]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+##
+def count_by_passes (M):
+    "returns ranked links, link sources and link targets as update_links(..) got them from M.links"
+    ranked_links = pyPLB.make_links_ranked (M.links)
+    link_sources, link_targets = M.get_link_stats ()
+    return ranked_links, link_sources, link_targets
+
+##
+def count_by_blocks (M, blocks: list):
+    "returns ranked links, link sources and link targets counted by a LinkStats from blocks of links"
+    link_stats = pyPLB.LinkStats (M.nodes, M.gap_mark)
+    for links in blocks:
+        link_stats.add (links)
+    link_stats.close ()
+    return link_stats.ranked_links, link_stats.get_link_sources (), link_stats.get_link_targets ()
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of link statistics")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-r', '--repeat', type = int, default = 5)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    M.update_links (reflexive = True, use_mp = False)
+    ## blocks of links, in the order gen_links(..) finds them
+    blocks = M.classify_link_blocks (M.gen_link_blocks (reflexive = True), "indexed", "serial")
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(M.nodes)} nodes, {len(M.links)} links in {len(blocks)} blocks")
+    expected, by_passes = timed (count_by_passes, M, repeat = args.repeat)
+    result, by_blocks   = timed (count_by_blocks, M, blocks, repeat = args.repeat)
+    assert [ (rank, [ link.form_paired for link in links ]) for rank, links in result[0].items() ] == [ (rank, [ link.form_paired for link in links ]) for rank, links in expected[0].items() ]
+    assert result[1] == expected[1] and result[2] == expected[2]
+    print (f"#make_links_ranked + get_link_stats: {1000 * by_passes:.3f} ms")
+    print (f"#LinkStats, block by block:         {1000 * by_blocks:.3f} ms")
+
+### end of file
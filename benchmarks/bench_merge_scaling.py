@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+bench_merge_scaling.py
+
+measures how the merger of PatternLattices scales with the number of nodes accumulated.
+Sources are merged one by one as __main__ does, and the time per merge step is reported
+against the size of the accumulator, both for the accumulator updated in place and for
+a merged lattice rebuilt at each step (in_place = False). Time per incoming node should
+stay flat in place, since the cost of a merger is linear in the size of the incoming lattice.
+
+usage: python benchmarks/bench_merge_scaling.py [-G] [-f file]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "scaling benchmark of merge_lattices")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-r', '--repeat', type = int, default = 5)
+    args = parser.parse_args ()
+    ##
+    sources  = read_sources (args.file)
+    patterns = sorted ([ pyPLB.Pattern (s, gap_mark = "_") for s in sources ], key = len)
+    lattices = [ pyPLB.PatternLattice (p, generalized = args.generalized) for p in patterns ]
+    params   = dict (gen_links_internally = False, use_mp = False, generalized = args.generalized, reflexive = True, reductive = True, check = False)
+    ##
+    print (f"#file: {args.file}; generalized: {args.generalized}")
+    print (f"{'step':>5s} {'accumulated':>12s} {'incoming':>9s} {'rebuilt (ms)':>13s} {'in place (ms)':>14s} {'us/incoming':>12s}")
+    M = lattices[0]
+    total = 0
+    for i, lattice in enumerate (lattices[1:], start = 1):
+        n_nodes = len (M.nodes)
+        ## a rebuilt merger leaves M as it is
+        _, rebuilt = timed (M.merge_lattices, lattice, repeat = args.repeat, in_place = False, **params)
+        ## merging the same lattice again changes nothing, so repeating is fine
+        M_new, spent = timed (M.merge_lattices, lattice, repeat = args.repeat, **params)
+        total += spent
+        print (f"{i:5d} {n_nodes:12d} {len(lattice.nodes):9d} {1000 * rebuilt:13.3f} {1000 * spent:14.3f} {1e6 * spent / len(lattice.nodes):12.2f}")
+        M = M_new
+    print (f"#merged {len(lattices)} lattices into {len(M.nodes)} nodes in {total:.3f} s")
+
+### end of file
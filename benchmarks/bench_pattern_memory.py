@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+bench_pattern_memory.py
+
+compares memory retained by lattice nodes built with Pattern and with CompactPattern
+
+usage: python benchmarks/bench_pattern_memory.py [-G] [-f file] [-s sizes]
+"""
+
+## imports
+import gc
+import argparse
+import tracemalloc
+from bench_utils import *
+
+### Functions
+##
+def measure_nodes (sources: list, pattern_class, generalized: bool) -> tuple:
+    "returns the number of nodes and the bytes they retain"
+    gc.collect ()
+    tracemalloc.start ()
+    base  = tracemalloc.get_traced_memory ()[0]
+    nodes = [ ]
+    for s in sources:
+        nodes.extend (pattern_class (s, gap_mark = "_").build_lattice_nodes (generalized = generalized))
+    gc.collect ()
+    used  = tracemalloc.get_traced_memory ()[0] - base
+    tracemalloc.stop ()
+    return len (nodes), used
+
+##
+def report (label: str, sources: list, generalized: bool) -> None:
+    n, plain   = measure_nodes (sources, pyPLB.Pattern, generalized)
+    _, compact = measure_nodes (sources, pyPLB.CompactPattern, generalized)
+    print (f"{label:28s} nodes: {n:8d}  Pattern: {plain/n:8.1f} B/node  CompactPattern: {compact/n:8.1f} B/node  ratio: {plain/compact:5.2f}")
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "memory benchmark of Pattern backends")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-s', '--sizes', type = int, nargs = '+', default = [ 4, 6, 8, 10 ])
+    parser.add_argument ('-n', '--sample_n', type = int, default = 10)
+    args = parser.parse_args ()
+    ##
+    print (f"#generalized: {args.generalized}")
+    report (args.file, read_sources (args.file), args.generalized)
+    for size in args.sizes:
+        report (f"synthetic {args.sample_n} x {size}", make_synthetic_sources (args.sample_n, size), args.generalized)
+
+### end of file
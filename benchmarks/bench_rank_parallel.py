@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+bench_rank_parallel.py
+
+compares link generation on a merged lattice run serially, with one process task per rank ("ranks"),
+and with cost-balanced tiles ("process"), and checks that they give the same links in the same order.
+
+usage: python benchmarks/bench_rank_parallel.py [-G] [-P] [-f file] [-j n_workers]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of rank-parallel link generation")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-P', '--pairwise', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    print (f"#file: {args.file}; generalized: {args.generalized}; pairwise: {args.pairwise}; merged lattice with {len(M.nodes)} nodes")
+    expected = None
+    for execution in [ "serial", "ranks", "process" ]:
+        with pyPLB.WorkerPool (args.n_workers) as pool:
+            _, spent = timed (M.update_links, reflexive = True, use_mp = True, use_index = not args.pairwise, execution = execution, pool = pool)
+        links = [ link.form_paired for link in M.links ]
+        if expected is None:
+            expected = links
+        assert links == expected
+        print (f"#{execution:>7s}: {spent:.3f}s for {len(links)} links; {pool.report()}")
+
+### end of file
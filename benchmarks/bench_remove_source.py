@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+bench_remove_source.py
+
+slides a window of sources over a file, removing the oldest source and adding a new one at each step, with links and
+z-scores kept up to date incrementally, and times the steps against rebuilding the lattice of the window from scratch.
+It first checks that adding a source and removing it leaves the lattice as it was, down to the order of nodes and
+links, the content of nodes and z-scores, and at the end that the window matches the lattice rebuilt for it.
+
+usage: python benchmarks/bench_remove_source.py [-G] [-Z] [-f file] [-w window]
+"""
+
+## imports
+import argparse
+import math
+from bench_utils import *
+
+##
+def build (sources: list, generalized: bool, robust: bool):
+    "returns the merged PatternLattice of sources with links and z-scores"
+    builder = pyPLB.CorpusLatticeBuilder (generalized, track_content = True).add_sources (sources)
+    M = builder.build (use_mp = False)
+    pyPLB.gen_zscores_from_sources (M, gap_mark = "_", use_robust_zscore = robust)
+    pyPLB.gen_zscores_from_targets (M, gap_mark = "_", use_robust_zscore = robust)
+    return M
+
+##
+def get_state (M, ordered: bool = True) -> dict:
+    "returns what is compared between lattices, as sets of forms and content if not ordered"
+    arrange = list if ordered else sorted
+    content = (lambda p: tuple([ tuple(c) for c in p.content ])) if ordered else (lambda p: tuple([ frozenset(c) for c in p.content ]))
+    return dict (nodes        = arrange ([ (p.form, content (p)) for p in M.nodes ]),
+                 support      = dict (M.get_support ()),
+                 links        = arrange ([ link.form_paired for link in M.links ]),
+                 ranked_links = { rank: arrange ([ link.form_paired for link in links ]) for rank, links in M.ranked_links.items() },
+                 link_sources = dict (M.link_sources),
+                 link_targets = dict (M.link_targets))
+
+##
+def assert_same (M, N, ordered: bool = True):
+    "asserts that lattices M and N are the same"
+    assert get_state (M, ordered) == get_state (N, ordered)
+    for a, b in [ (M.source_zscores, N.source_zscores), (M.target_zscores, N.target_zscores) ]:
+        assert a.keys() == b.keys() and all(math.isclose (a[x], b[x], abs_tol = 1e-9) for x in a)
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of source removal for a sliding window")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-Z', '--robust_zscore', action = 'store_true', default = False)
+    parser.add_argument ('-w', '--window', type = int, default = 20)
+    args = parser.parse_args ()
+    ##
+    sources = read_sources (args.file)
+    window  = sources[:args.window]
+    print (f"#file: {args.file}; generalized: {args.generalized}; window of {len(window)} in {len(sources)} sources")
+    ## add-then-remove leaves a lattice as if the source had never been added
+    M = build (window, args.generalized, args.robust_zscore)
+    for source in sources[args.window:]:
+        M.add_source (source)
+        M.remove_source (source)
+    assert_same (M, build (window, args.generalized, args.robust_zscore))
+    print (f"#add-then-remove of {len(sources) - len(window)} sources: identical")
+    ## slide the window
+    slid, rebuilt = 0.0, 0.0
+    for source in sources[args.window:]:
+        _, spent = timed (M.remove_source, window[0])
+        slid += spent
+        _, spent = timed (M.add_source, source)
+        slid += spent
+        window = window[1:] + [ source ]
+        N, spent = timed (build, window, args.generalized, args.robust_zscore)
+        rebuilt += spent
+    assert_same (M, N, ordered = False)
+    n_steps = len(sources) - args.window
+    print (f"#{n_steps} steps; {len(M.nodes)} nodes, {len(M.links)} links at the end")
+    print (f"#sliding: {1000 * slid / max(n_steps, 1):.3f} ms/step")
+    print (f"#rebuilt: {1000 * rebuilt / max(n_steps, 1):.3f} ms/step")
+
+### end of file
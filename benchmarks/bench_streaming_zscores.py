@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_streaming_zscores.py
+
+builds the merged lattice of each data file stepwise, source by source, with links updated incrementally and
+StreamingZScores of link counts fed the counts changed, as gen_zscores_streaming(..) lets a LinkMaintainer do,
+and after each step compares the z-scores streamed with those calculated exactly by calc_zscores_by_rank(..).
+It reports, per file, the largest errors of medians, MADs and z-scores over all steps, streamed exactly (which should
+only differ by rounding of Welford's updates) and sketched with few bins, which makes sketches collapse into
+logarithmic bins of relative accuracy alpha. It also times feeding streams against
+calculating z-scores exactly after each step.
+
+usage: python benchmarks/bench_streaming_zscores.py [-G] [-Z] [-f file ...] [-n max_sources] [-a alpha] [-b max_bins]
+"""
+
+## imports
+import argparse
+import glob
+import os
+from bench_utils import *
+
+##
+def feed (M, streams: tuple, forms: set):
+    "feeds streams the link counts of forms changed, as a LinkMaintainer does"
+    for stats, stream in zip ([ M.link_sources, M.link_targets ], streams):
+        stream.update ({ form: stats.get (form, 0) for form in forms })
+        stream.refresh ()
+
+##
+def get_errors (M, streams: tuple, robust: bool) -> tuple:
+    "returns the largest errors of medians, MADs and z-scores of streams against exact calculation, and the time of the latter"
+    import numpy as np
+    errors = [ 0.0, 0.0, 0.0 ]
+    spent  = 0.0
+    for stats, stream in zip ([ M.link_sources, M.link_targets ], streams):
+        (plain, robust_zscores), time_used = timed (pyPLB.calc_zscores_by_rank, stats, gap_mark = "_")
+        spent += time_used
+        expected = robust_zscores if robust else plain
+        zscores  = pyPLB.StreamedZScores (stream, robust)
+        assert expected.keys() == zscores.keys()
+        errors[2] = max([ errors[2] ] + [ abs(zscores[x] - expected[x]) for x in expected ])
+        for rank, (_, _, median, MAD) in stream.summaries.items():
+            dist = [ stats[x] for x in stream.members[rank] ]
+            exact_median = np.median (dist)
+            errors[0] = max(errors[0], abs(median - exact_median) / exact_median)
+            exact_MAD = np.median (np.abs (np.array (dist) - exact_median))
+            if exact_MAD > 0:
+                errors[1] = max(errors[1], abs(MAD - exact_MAD) / exact_MAD)
+    return errors, spent
+
+##
+def run (sources: list, generalized: bool, robust: bool, **params) -> tuple:
+    """
+    builds lattices stepwise with links updated incrementally, feeding streams of link counts after each step,
+    and returns the largest errors, the time of feeding streams, and that of calculating z-scores exactly
+    """
+    lattices = [ pyPLB.PatternLattice (pyPLB.Pattern (s, gap_mark = "_"), generalized = generalized) for s in sources ]
+    merge    = dict (gen_links_internally = True, use_mp = False, generalized = generalized, reflexive = True, reductive = True, incremental = True, check = False)
+    M = lattices[0].merge_lattices (lattices[1], **merge)
+    streams = tuple ([ pyPLB.StreamingZScores.from_counts (stats, "_", **params) for stats in [ M.link_sources, M.link_targets ] ])
+    errors = [ 0.0, 0.0, 0.0 ]
+    streamed, exact = 0.0, 0.0
+    for lattice in lattices[2:]:
+        M.get_node_index ().merge ([ p for p in lattice.nodes if len(p) > 0 ])
+        new_links = M.get_link_maintainer (True).update ()
+        _, spent = timed (feed, M, streams, { form for link in new_links for form in link.form_paired })
+        streamed += spent
+        step_errors, spent = get_errors (M, streams, robust)
+        exact += spent
+        errors = [ max(a, b) for a, b in zip (errors, step_errors) ]
+    return errors, streamed, exact
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "error bounds and speed of streamed z-scores")
+    parser.add_argument ('-f', '--files', type = str, nargs = '*', default = None)
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-Z', '--robust_zscore', action = 'store_true', default = False)
+    parser.add_argument ('-n', '--max_sources', type = int, default = 40)
+    parser.add_argument ('-a', '--alpha', type = float, default = 0.01)
+    parser.add_argument ('-b', '--max_bins', type = int, default = 4)
+    args = parser.parse_args ()
+    ##
+    files = args.files or sorted (os.path.basename (x) for x in glob.glob (os.path.join (data_dir, "*.csv")))
+    print (f"#generalized: {args.generalized}; robust: {args.robust_zscore}; sketched with alpha = {args.alpha}, max_bins = {args.max_bins}")
+    print (f"#{'file':<34s} {'mode':>8s} {'median':>9s} {'MAD':>9s} {'z-score':>9s} {'streamed':>9s} {'exact':>9s}")
+    for file_name in files:
+        sources = read_sources (file_name)[:args.max_sources]
+        if len(sources) < 3:
+            continue
+        for mode, params in [ ("exact", dict (exact = True)), ("sketched", dict (alpha = args.alpha, max_bins = args.max_bins)) ]:
+            errors, streamed, exact = run (sources, args.generalized, args.robust_zscore, **params)
+            print (f"{file_name:<35s} {mode:>8s} {errors[0]:9.2e} {errors[1]:9.2e} {errors[2]:9.2e} {streamed:8.3f}s {exact:8.3f}s")
+
+### end of file
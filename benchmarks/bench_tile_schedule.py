@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+bench_tile_schedule.py
+
+compares multiprocess pairwise link generation on a merged lattice rank by rank with
+cost-balanced tiles of all ranks run at once, showing per-rank costs and per-worker busy time.
+
+usage: python benchmarks/bench_tile_schedule.py [-G] [-f file] [-j n_workers]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the tile scheduler")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    print (f"#file: {args.file}; generalized: {args.generalized}; merged lattice with {len(M.nodes)} nodes")
+    ranks = sorted (list (M.ranked_nodes))
+    block_sizes = [ (len (M.ranked_nodes.get (rank + 1, [])) + len (M.ranked_nodes[rank]), len (M.ranked_nodes[rank])) for rank in ranks ]
+    for rank, (n_R, n_L) in zip (ranks, block_sizes):
+        print (f"#rank {rank:2d}: {n_R:5d} x {n_L:5d} = {n_R * n_L:9d} pairs")
+    ##
+    expected = None
+    for balance in [ False, True ]:
+        with pyPLB.WorkerPool (args.n_workers) as pool:
+            _, spent = timed (M.update_links, reflexive = True, use_mp = True, use_index = False, balance = balance, execution = "process", pool = pool)
+        links = [ link.form_paired for link in M.links ]
+        if expected is None:
+            expected = links
+        assert links == expected
+        label = "balanced tiles" if balance else "rank by rank"
+        print (f"#{label}: {spent:.3f}s; {pool.report()}")
+    tiles = pyPLB.schedule_tiles (block_sizes, pool.n_workers)
+    print (f"#{len(tiles)} tiles of {min(t[3] for t in tiles)} to {max(t[3] for t in tiles)} pairs")
+
+### end of file
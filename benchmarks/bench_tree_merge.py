@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+bench_tree_merge.py
+
+compares merging per-source lattices one by one with functools.reduce(..), as __main__ does by default,
+with merge_lattices_in_tree(..), serially and on a WorkerPool, and checks that they give the same nodes.
+
+usage: python benchmarks/bench_tree_merge.py [-G] [-f file] [-j n_workers]
+"""
+
+## imports
+import functools
+import argparse
+from bench_utils import *
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of merger in a binary tree")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-XiY-max9.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    sources  = read_sources (args.file)
+    lattices = [ pyPLB.PatternLattice (pyPLB.Pattern (s, gap_mark = "_"), generalized = args.generalized) for s in sources ]
+    params   = dict (gen_links_internally = False, use_mp = False, generalized = args.generalized, reflexive = True, reductive = True, check = False)
+    print (f"#file: {args.file}; generalized: {args.generalized}; {len(lattices)} lattices")
+    ## reduce returns a new lattice at the first step, so the lattices stay as they are
+    M, spent = timed (functools.reduce, lambda La, Lb: La.merge_lattices (Lb, **params), lattices)
+    expected = set (p.form for p in M.nodes)
+    print (f"#reduce: {spent:.3f}s for {len(M.nodes)} nodes")
+    T, spent = timed (pyPLB.merge_lattices_in_tree, lattices, **params)
+    assert set (p.form for p in T.nodes) == expected and len(T.nodes) == len(M.nodes)
+    print (f"#tree, serial: {spent:.3f}s")
+    with pyPLB.WorkerPool (args.n_workers) as pool:
+        T, spent = timed (pyPLB.merge_lattices_in_tree, lattices, **dict (params, use_mp = True, pool = pool))
+    assert set (p.form for p in T.nodes) == expected and len(T.nodes) == len(M.nodes)
+    print (f"#tree, on pool: {spent:.3f}s; {pool.report()}")
+
+### end of file
@@ -0,0 +1,55 @@
+## imports
+import os
+import re
+import sys
+import time
+import random
+
+## make pyPLB importable when a benchmark is run from anywhere
+repo_dir = os.path.dirname (os.path.dirname (os.path.abspath (__file__)))
+if repo_dir not in sys.path:
+    sys.path.insert (0, repo_dir)
+data_dir = os.path.join (repo_dir, "data")
+
+import pyPLB
+
+### Functions
+##
+def read_sources (file_name: str, field_sep: str = ",", comment_escapes: list = ['#', '%'], max_size: int = None) -> list:
+    "reads a data file the way pyPLB's __main__ does with default settings and returns a list of segment lists"
+    path = file_name if os.path.exists (file_name) else os.path.join (data_dir, file_name)
+    with open (path) as f:
+        lines = [ line.strip() for line in f.readlines() if len(line.strip()) > 0 and not line[0] in comment_escapes ]
+    ## remove inline comments
+    data = [ ]
+    for line in lines:
+        for mark in comment_escapes:
+            line = line.split(mark)[0]
+        data.append ([ field.strip().lower() for field in re.split (field_sep, line) ])
+    ## remove punctuations and split hyphenated tokens
+    punct_symbols = list(",.?!:;/\–~")
+    data = [ pyPLB.process_hyphenation ([ x for x in l if x not in punct_symbols ]) for l in data ]
+    data = [ l for l in data if len(l) > 0 ]
+    if max_size is not None:
+        data = [ l for l in data if len(l) <= max_size ]
+    return data
+
+##
+def make_synthetic_sources (n: int, size: int, alphabet: str = "abcdefghijklmnopqrstuvwxyz", seed: int = 0) -> list:
+    "returns n random sources of a given size"
+    rng = random.Random (seed)
+    return [ [ rng.choice (alphabet) for _ in range (size) ] for _ in range (n) ]
+
+##
+def timed (func, *args, repeat: int = 1, **kwargs):
+    "calls func repeat times and returns a pair of its last result and the best time in seconds"
+    best, result = None, None
+    for _ in range (repeat):
+        start  = time.perf_counter ()
+        result = func (*args, **kwargs)
+        spent  = time.perf_counter () - start
+        if best is None or spent < best:
+            best = spent
+    return result, best
+
+### end of file
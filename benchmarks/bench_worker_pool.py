@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+bench_worker_pool.py
+
+compares pairwise multiprocess link generation on a merged lattice with a temporary pool per rank
+against a persistent WorkerPool, and reports the pool overhead apart from the compute time.
+
+usage: python benchmarks/bench_worker_pool.py [-G] [-f file] [-j n_workers]
+"""
+
+## imports
+import argparse
+from bench_utils import *
+from bench_link_index import build_merged_lattice
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of WorkerPool")
+    parser.add_argument ('-f', '--file', type = str, default = "plb-sample2.csv")
+    parser.add_argument ('-G', '--generalized', action = 'store_true', default = False)
+    parser.add_argument ('-j', '--n_workers', type = int, default = None)
+    args = parser.parse_args ()
+    ##
+    M = build_merged_lattice (read_sources (args.file), args.generalized)
+    print (f"#file: {args.file}; generalized: {args.generalized}; merged lattice with {len(M.nodes)} nodes")
+    ## a temporary pool per rank, as before
+    _, per_rank = timed (M.update_links, reflexive = True, use_mp = True, use_index = False, execution = "process")
+    expected = [ link.form_paired for link in M.links ]
+    print (f"#temporary pools: {per_rank:.3f}s")
+    ## a persistent pool
+    with pyPLB.WorkerPool (args.n_workers) as pool:
+        _, persistent = timed (M.update_links, reflexive = True, use_mp = True, use_index = False, execution = "process", pool = pool)
+    assert [ link.form_paired for link in M.links ] == expected
+    print (f"#persistent pool: {persistent:.3f}s; {pool.report()}")
+
+### end of file
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+bench_zscores.py
+
+times the vectorized z-score engine, calc_zscores_by_rank(..), on the nodes of a generalized lattice of random sources
+grown to n nodes (10^6 by default), with link counts drawn at random, against the per-rank path that
+gen_zscores_from_sources(..) took before: make_ranked_dict(..), calc_*_by_rank(..) and calc_zscore(..) per node.
+The per-rank path is quadratic in ranks x nodes, so it is run on the first nodes up to --reference,
+where plain and robust z-scores of both are compared.
+
+usage: python benchmarks/bench_zscores.py [-n n_nodes] [-r reference] [-s source_size]
+"""
+
+## imports
+import argparse
+import random
+from bench_utils import *
+
+##
+def calc_zscores_by_rank_reference (link_dict: dict, gap_mark: str, robust: bool) -> dict:
+    "returns z-scores as gen_zscores_from_sources(..) computed them before the vectorized engine"
+    ranked = pyPLB.make_ranked_dict (link_dict, gap_mark = gap_mark)
+    averages_by_rank = pyPLB.calc_averages_by_rank (link_dict, ranked)
+    stdevs_by_rank   = pyPLB.calc_stdevs_by_rank (link_dict, ranked)
+    medians_by_rank  = pyPLB.calc_medians_by_rank (link_dict, ranked)
+    MADs_by_rank     = pyPLB.calc_MADs_by_rank (link_dict, ranked)
+    zscores = { }
+    for member, value in link_dict.items():
+        rank = pyPLB.get_rank_of_list (member, gap_mark = gap_mark)
+        zscores[member] = pyPLB.calc_zscore (value, averages_by_rank[rank], stdevs_by_rank[rank], medians_by_rank[rank], MADs_by_rank[rank], robust = robust)
+    return zscores
+
+##
+def make_link_counts (n_nodes: int, source_size: int, seed: int = 0) -> dict:
+    "returns a dict of random link counts of the forms of a generalized lattice of random sources with n_nodes nodes"
+    rng = random.Random (seed)
+    builder = pyPLB.CorpusLatticeBuilder (generalized = True)
+    for source in make_synthetic_sources (n_nodes, source_size, seed = seed):
+        builder.add_source (source)
+        if len(builder) >= n_nodes:
+            break
+    return { p.form: 1 + int(rng.expovariate (0.2)) for p in builder.index.nodes[:n_nodes] }
+
+## main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser (description = "benchmark of the vectorized z-score engine")
+    parser.add_argument ('-n', '--n_nodes', type = int, default = 10**6)
+    parser.add_argument ('-r', '--reference', type = int, default = 20000)
+    parser.add_argument ('-s', '--source_size', type = int, default = 8)
+    args = parser.parse_args ()
+    ##
+    counts, spent = timed (make_link_counts, args.n_nodes, args.source_size)
+    print (f"#{len(counts)} nodes of {len({ pyPLB.get_rank_of_list (x, '_') for x in counts })} ranks made in {spent:.1f} s")
+    ## agreement and speed on the first nodes
+    sample = dict (list (counts.items())[:args.reference])
+    (plain, robust), vectorized = timed (pyPLB.calc_zscores_by_rank, sample, gap_mark = "_")
+    for zscores, use_robust in [ (plain, False), (robust, True) ]:
+        expected, spent = timed (calc_zscores_by_rank_reference, sample, "_", use_robust)
+        error = max(abs(zscores[x] - expected[x]) for x in sample)
+        print (f"#{len(sample)} nodes, robust = {use_robust}: per-rank {spent:.3f} s; max abs difference {error:.2e}")
+        assert error < 1e-9
+    print (f"#{len(sample)} nodes, plain and robust: vectorized {vectorized:.3f} s")
+    ## all nodes
+    _, spent = timed (pyPLB.calc_zscores_by_rank, counts, gap_mark = "_")
+    print (f"#{len(counts)} nodes, plain and robust: vectorized {spent:.3f} s")
+
+### end of file
@@ -3,4 +3,6 @@
 from .utils import *
 from .pattern import *
 from .pattern_link import *
-from .pattern_lattice import *
\ No newline at end of file
+from .pattern_lattice import *
+from .lattice_viewer import *
+from .lattice_export import *
\ No newline at end of file
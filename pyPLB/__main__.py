@@ -56,11 +56,13 @@ from utils import *
 from pattern import *
 from pattern_link import *
 from pattern_lattice import *
+from lattice_viewer import *
+from lattice_export import *
 
 ## settings
 import argparse
 parser  = argparse.ArgumentParser(description = "")
-parser.add_argument('file', type= open, default= None)
+parser.add_argument('file', type= open, nargs= '?', default= None)
 parser.add_argument('-v', '--verbose', action= 'store_true', default= False)
 parser.add_argument('-w', '--detailed', action= 'store_true', default= False)
 parser.add_argument('-f', '--input_field_sep', type= str, default= ',')
@@ -77,6 +79,8 @@ parser.add_argument('-n', '--sample_n', type= int, default= None)
 parser.add_argument('-A', '--auto_figsize_adjust', action='store_true', default= False)
 #parser.add_argument('-S', '--sample_id', type= int, default= 1)
 parser.add_argument('-S', '--build_lattice_stepwise', action= 'store_true', default= False)
+parser.add_argument('-B', '--merge_in_binary_tree', action= 'store_true', default= False)
+parser.add_argument('-U', '--stream_sources', action= 'store_true', default= False)
 parser.add_argument('-I', '--draw_individual_lattices', action= 'store_true', default = False)
 parser.add_argument('-F', '--scaling_factor', type= float, default= 5)
 parser.add_argument('-z', '-zl', '--zscore_lowerbound', type= float, default= None)
@@ -87,9 +91,32 @@ parser.add_argument('-t', '--print_link_targets', action='store_true', default=
 parser.add_argument('-J', '--use_multibyte_chars', action= 'store_true', default = False)
 parser.add_argument('-L', '--layout', type= str, default= 'Multi_partite')
 parser.add_argument('-o', '--print_forms', action='store_true', default= False)
+parser.add_argument('-K', '--use_compact_patterns', action='store_true', default= False)
+parser.add_argument('-j', '--n_workers', type= int, default= None)
+parser.add_argument('-E', '--execution', type= str, choices= ['auto', 'serial', 'thread', 'process', 'ranks'], default= 'auto')
+parser.add_argument('--calibrate', action= 'store_true', default= False)
+parser.add_argument('-O', '--output_dir', type= str, default= None)
+parser.add_argument('--formats', type= str, default= 'png')
+parser.add_argument('--html', type= str, default= None)
+parser.add_argument('--export', type= str, action= 'append', default= [ ])
+parser.add_argument('--html_max_bytes', type= int, default= None)
+parser.add_argument('--collection_threshold', type= int, default= 2000)
+parser.add_argument('--layout_cache', type= str, nargs= '?', const= LayoutCache.get_default_dir (), default= None)
 
 ##
 args = parser.parse_args()
+
+## calibrate the thresholds of the link planner on this host and keep them for later runs
+if args.calibrate:
+    print(f"##Calibrating link planner ...")
+    planner = calibrate_link_planner (n_workers = args.n_workers, check = True)
+    print(f"#saved {planner} to {planner.save ()}")
+    exit()
+elif args.file is None:
+    parser.error ("the following arguments are required: file")
+for export_file in args.export:
+    if export_file.rsplit (".", 1)[-1].lower () not in lattice_writers:
+        parser.error (f"--export {export_file}: use one of the extensions {sorted (lattice_writers)}")
 ##
 file                    = args.file   # process a file when it exists
 verbose                 = args.verbose
@@ -107,6 +134,8 @@ sample_n                = args.sample_n
 generalized             = args.generalized
 reflexive               = args.unreflexive
 build_lattice_stepwise  = args.build_lattice_stepwise
+merge_in_binary_tree    = args.merge_in_binary_tree
+stream_sources          = args.stream_sources
 print_link_targets      = args.print_link_targets
 auto_figsize_adjust     = args.auto_figsize_adjust
 layout                  = args.layout
@@ -118,15 +147,25 @@ zscore_lowerbound       = args.zscore_lowerbound
 zscore_upperbound       = args.zscore_upperbound
 use_robust_zscore       = args.use_robust_zscore
 zscores_from_targets    = args.zscores_from_targets
+use_compact_patterns    = args.use_compact_patterns
+n_workers               = args.n_workers
+execution               = args.execution
+output_dir              = args.output_dir
+html_file               = args.html
+export_files            = args.export
+html_max_bytes          = args.html_max_bytes
+collection_threshold    = args.collection_threshold
+layout_cache            = None if args.layout_cache is None else LayoutCache (cache_dir = args.layout_cache)
+output_formats          = [ x.strip() for x in args.formats.split(",") if len(x.strip()) > 0 ]
 
 ### implications
 ## inspection paramters
 draw_inspection      = False
 mp_inspection        = False # This disables use of multiprocess
 if mp_inspection:
-    use_mp = False
-else:
-    use_mp = True
+    execution = "serial"
+## with "auto", the link planner chooses serial or parallel execution from the estimated work
+use_mp = execution != "serial"
 
 ## show paramters
 print(f"##Parameters")
@@ -147,6 +186,17 @@ print(f"#use_robust_zscore: {use_robust_zscore}")
 print(f"#zscore_lowerbound: {zscore_lowerbound}")
 print(f"#zscore_upperbound: {zscore_upperbound}")
 print(f"#zscores_from_targets: {zscores_from_targets}")
+print(f"#use_compact_patterns: {use_compact_patterns}")
+print(f"#n_workers: {n_workers}")
+print(f"#execution: {execution}")
+print(f"#merge_in_binary_tree: {merge_in_binary_tree}")
+print(f"#stream_sources: {stream_sources}")
+print(f"#output_dir: {output_dir}")
+print(f"#output_formats: {output_formats}")
+print(f"#html_file: {html_file}")
+print(f"#export_files: {export_files}")
+print(f"#collection_threshold: {collection_threshold}")
+print(f"#layout_cache: {layout_cache}")
 
 ### Functions
 ##
@@ -186,6 +236,33 @@ def parse_input (file, comment_escapes: list, field_sep: str, uncapitalize: bool
     ##
     return data
 
+##
+def get_output_files (stem: str) -> list:
+    "returns the files in output_dir to which a diagram is saved, one per format, or None to show it"
+    if output_dir is None:
+        return None
+    import os
+    os.makedirs (output_dir, exist_ok = True)
+    return [ os.path.join (output_dir, f"{stem}.{fmt}") for fmt in output_formats ]
+
+##
+def draw_merged_diagram (M, stem: str) -> None:
+    "draws the diagram of M, saved to files under stem if output_dir is given, and reports the time spent"
+    import time
+    ## exports and the viewer are written first, for lattices too large to draw
+    for export_file in export_files:
+        start = time.perf_counter()
+        export_format = M.export (export_file)
+        print(f"#exported {len(M.nodes)} nodes and {len(M.links)} links to {export_file} in {export_format} in {time.perf_counter() - start:.3f}s")
+    if html_file is not None:
+        start = time.perf_counter()
+        result = M.export_html (html_file, zscores_from_targets = zscores_from_targets, use_robust_zscore = use_robust_zscore, max_bytes = html_max_bytes)
+        print(f"#wrote {result['nodes']} nodes and {result['edges']} edges in {result['levels']} levels to {html_file} ({result['bytes']} bytes) in {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    M.draw_diagrams (layout = layout, generalized = generalized, label_sample_n = label_sample_n, use_robust_zscore = use_robust_zscore, zscore_lb = zscore_lowerbound, zscore_ub = zscore_upperbound, auto_figsize_adjust = auto_figsize_adjust, font_name = multibyte_font_name, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, output_files = get_output_files (stem), collection_threshold = collection_threshold, layout_cache = layout_cache, check = draw_inspection)
+    if output_dir is not None:
+        print(f"#rendered {stem} in {time.perf_counter() - start:.3f}s")
+
 ## process
 if not file is None:
     S0 = parse_input (file, comment_escapes = input_comment_escapes, field_sep = input_field_sep, uncapitalize = uncapitalize, remove_punctuations = remove_punctuations, split_hyphenation = split_hyphenation, check = False)
@@ -243,6 +320,9 @@ for i, s in enumerate(S):
 
 ## set font for Japanese character display
 import matplotlib
+## draw into files without a display
+if output_dir is not None:
+    matplotlib.use ("Agg")
 if use_multibyte_chars:
     from matplotlib import font_manager as Font_manager
     ## select font
@@ -272,11 +352,15 @@ print(f"multibyte_font_name: {multibyte_font_name}")
 print(f"matplotlib.rcParams['font.family']: {matplotlib.rcParams['font.family']}")
 
 ## generating patterns
+if use_compact_patterns:
+    pattern_class = CompactPattern
+else:
+    pattern_class = Pattern
 Patterns = [ ]
 for s in S:
     if verbose:
         print(f"#processing: {s}")
-    p = Pattern(s, gap_mark = gap_mark)
+    p = pattern_class(s, gap_mark = gap_mark)
     if detailed:
         print(f"#p: {p}")
     Patterns.append(p)
@@ -293,18 +377,28 @@ for i, pat in enumerate(Patterns):
             print(f"# gapped {i+1}: {g_pat}")
 ##
 #exit()
+## a pool of worker processes shared by the whole run, started only when needed
+worker_pool = WorkerPool (n_workers)
+
+## lattices of sources are not needed when sources are streamed into the merger
+if build_lattice_stepwise or print_forms or draw_individually:
+    stream_sources = False
+if stream_sources:
+    Sources = Patterns
+    Patterns = [ ]
 ##
 print(f"##Generating (generalized) PatternLattices ...")
 L = [ ]
 for i, p in enumerate(Patterns):
     print(f"#generating PatternLattice {i+1} from {p}")
     ## main
-    patlat = PatternLattice (p, generalized = generalized, reflexive = reflexive, check = False)
+    patlat = PatternLattice (p, generalized = generalized, reflexive = reflexive, execution = execution, pool = worker_pool, check = False)
     if detailed:
         pp.pprint(patlat)
     ##
     if verbose:
         print(f"#patlat.origin: {patlat.origin}")
+        print(f"#link plan: {LinkPlanner.describe (patlat.link_plan)}")
         if detailed:
             pp.pprint (patlat.origin)
     ##
@@ -338,18 +432,31 @@ if print_forms:
     for i, patlat in enumerate(L):
         for j, pat in enumerate(patlat):
             print(f"p{i:02d}.form{j:03d}: {joint.join(pat.get_form())}")
+    worker_pool.close ()
     exit()
 
 ## draw lattices and then quit without drawing the merged lattice
 if draw_individually:
     print(f"##Drawing diagrams individually")
-    for i, patlat in enumerate(L):
-        print(f"#drawing diagram from PatternLattice {i+1}")
-        patlat.draw_diagrams (layout = layout, generalized = generalized, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, font_name = multibyte_font_name, check = draw_inspection)
+    if output_dir is not None:
+        ## lattices are drawn into files in parallel
+        params  = dict (layout = layout, generalized = generalized, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, font_name = multibyte_font_name, collection_threshold = collection_threshold, layout_cache = layout_cache, check = draw_inspection)
+        results = render_lattices (L, output_dir, formats = output_formats, pool = worker_pool if use_mp else None, **params)
+        for i, (output_files, spent) in enumerate(results):
+            print(f"#rendered PatternLattice {i+1} to {output_files} in {spent:.3f}s")
+        print(f"#rendered {len(results)} diagrams in {sum(spent for _, spent in results):.3f}s of worker time")
+    else:
+        for i, patlat in enumerate(L):
+            print(f"#drawing diagram from PatternLattice {i+1}")
+            patlat.draw_diagrams (layout = layout, generalized = generalized, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, font_name = multibyte_font_name, collection_threshold = collection_threshold, layout_cache = layout_cache, check = draw_inspection)
+    worker_pool.close ()
     exit()
 
 ##
-print(f"##Merging {len(L)} PatternLattices ...")
+if stream_sources:
+    print(f"##Merging {len(Sources)} sources ...")
+else:
+    print(f"##Merging {len(L)} PatternLattices ...")
 simplified     = False
 label_sample_n = 5
 if simplified:
@@ -358,16 +465,17 @@ if simplified:
     if verbose:
         print(f"#La: {La}")
         print(f"#Lb: {Lb}")
-    M = La.merge_lattices (Lb, use_mp = use_mp, show_steps = True, check = False)
+    M = La.merge_lattices (Lb, use_mp = use_mp, execution = execution, pool = worker_pool, show_steps = True, check = False)
 elif build_lattice_stepwise:
     gen_links_internally = True
     print(f"##Mergig PatternLattices ...")
     for i, patlat in enumerate (L):
-        print(f"#processing pattern lattice {i+1}")
+        step = i + 1
+        print(f"#processing pattern lattice {step}")
         if i == 0:
             M = patlat
         else: ## merger
-            M = M.merge_lattices (patlat, gen_links_internally = gen_links_internally, use_mp = use_mp, generalized = generalized, reflexive = reflexive, reductive = True, show_steps = True, check = False)
+            M = M.merge_lattices (patlat, gen_links_internally = gen_links_internally, use_mp = use_mp, execution = execution, pool = worker_pool, generalized = generalized, reflexive = reflexive, reductive = True, incremental = True, show_steps = True, check = False)
             ## delete the original
             patplat = None
         ## check nodes in M
@@ -377,8 +485,10 @@ elif build_lattice_stepwise:
         ## genenrate links in delay
         if len(M.links) == 0 and not gen_links_internally:
             ## Don't do: M = M.update(...)
-            M.update_links (reflexive = reflexive, check = False) ## Crucially
+            M.update_links (reflexive = reflexive, use_mp = use_mp, execution = execution, pool = worker_pool, check = False) ## Crucially
         print(f"#generated {len(M.links)} links")
+        if hasattr (M, 'link_plan'):
+            print(f"#link plan: {LinkPlanner.describe (M.link_plan)}")
         ## checking links in M
         print(f"##Links")
         for i, link in enumerate(M.links):
@@ -394,16 +504,24 @@ elif build_lattice_stepwise:
             print(f"#node {node} has z-score {zscore: .3f}")
         ##
         print(f"##Results")
-        M.draw_diagrams (layout = layout, generalized = generalized, label_sample_n = label_sample_n, use_robust_zscore = use_robust_zscore, zscore_lb = zscore_lowerbound, zscore_ub = zscore_upperbound, auto_figsize_adjust = auto_figsize_adjust, font_name = multibyte_font_name, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, check = draw_inspection)
+        draw_merged_diagram (M, f"merged_step{step:03d}")
 else:
     gen_links_internally = False
-    M = functools.reduce (lambda La, Lb: La.merge_lattices (Lb, gen_links_internally = gen_links_internally, use_mp = use_mp, generalized = generalized, reflexive = reflexive, reductive = True, check = False), L)
+    if stream_sources:
+        builder = CorpusLatticeBuilder (generalized = generalized, gap_mark = gap_mark, pattern_class = pattern_class)
+        M = builder.add_sources (Sources).build (gen_links = gen_links_internally)
+        print(f"#{builder}")
+    elif merge_in_binary_tree:
+        M = merge_lattices_in_tree (L, gen_links_internally = gen_links_internally, use_mp = use_mp, execution = execution, pool = worker_pool, generalized = generalized, reflexive = reflexive, reductive = True, check = verbose)
+    else:
+        M = functools.reduce (lambda La, Lb: La.merge_lattices (Lb, gen_links_internally = gen_links_internally, use_mp = use_mp, execution = execution, pool = worker_pool, generalized = generalized, reflexive = reflexive, reductive = True, check = False), L)
 
     # The following process was isolated for memory conservation
     if len(M.links) == 0 and not gen_links_internally:
         print(f"##Generating links independently")
         ## Don't do: M = M.update(...)
-        M.update_links (reflexive = reflexive, use_mp = use_mp, check = False)
+        M.update_links (reflexive = reflexive, use_mp = use_mp, execution = execution, pool = worker_pool, check = False)
+        print(f"#link plan: {LinkPlanner.describe (M.link_plan)}")
 
     ##
     print(f"##Results")
@@ -432,9 +550,11 @@ else:
 
     ## draw diagram of M
     print(f"##Drawing a diagram from the merged PatternLattice")
-    M.draw_diagrams (layout = layout, generalized = generalized, label_sample_n = label_sample_n, use_robust_zscore = use_robust_zscore, zscore_lb = zscore_lowerbound, zscore_ub = zscore_upperbound, auto_figsize_adjust = auto_figsize_adjust, font_name = multibyte_font_name, zscores_from_targets = zscores_from_targets, scale_factor = scale_factor, check = draw_inspection)
+    draw_merged_diagram (M, "merged")
 
 ## conclude
+worker_pool.close ()
+print(f"#worker pool: {worker_pool.report()}")
 print(f"##built from {len(S)} sources: {[ as_label(x, sep = ',') for x in S ]}")
 
 ### end of file
@@ -0,0 +1,162 @@
+## imports libraries
+
+## import related modules
+try:
+    from .utils import *
+except ImportError:
+    from utils import *
+try:
+    from .pattern_lattice import *
+except ImportError:
+    from pattern_lattice import *
+
+### Functions
+
+##
+def iter_lattice_records (M):
+    """
+    takes a PatternLattice M and yields records of its nodes and then of its links, read from M.nodes and M.links as they go,
+    without a graph built: ("node", id, form, content, rank, support, source z-score, target z-score) for nodes, with ids
+    in the order of M.nodes and None for a z-score not computed, and ("link", id, source id, target id, link type, rank),
+    where the target instantiates the source and the rank is the higher of the ranks of its ends, for links.
+    """
+    import math
+    gap_mark = M.gap_mark
+    support  = M.get_support ()
+    source_zscores, target_zscores = M.source_zscores, M.target_zscores
+    ##
+    def get_zscore (zscores, form):
+        z = zscores.get (form) if zscores is not None else None
+        if z is None or math.isnan (z):
+            return None
+        return float(z)
+    ##
+    node_ids, ranks = { }, [ ]
+    for p in M.nodes:
+        if len(p) == 0 or p.form in node_ids:
+            continue
+        i = node_ids[p.form] = len(node_ids)
+        rank = get_rank_of_list (p.form, gap_mark)
+        ranks.append (rank)
+        yield ("node", i, p.form, p.content, rank, support.get (p.form, 1), get_zscore (source_zscores, p.form), get_zscore (target_zscores, p.form))
+    ##
+    for k, link in enumerate (M.links):
+        left, right = link.form_paired
+        i, j = node_ids[left], node_ids[right]
+        yield ("link", k, i, j, link.link_type, max(ranks[i], ranks[j]))
+
+##
+node_fields = [ ("form", "string"), ("content", "string"), ("rank", "int"), ("support", "int"), ("source_zscore", "double"), ("target_zscore", "double") ]
+link_fields = [ ("link_type", "string"), ("rank", "int") ]
+
+##
+def encode_node_fields (record: tuple) -> list:
+    "returns (name, value) pairs of the fields of a node record, with the form as a label and the content in JSON, skipping None"
+    import json
+    _, _, form, content, rank, support, source_zscore, target_zscore = record
+    values = [ as_label (form, sep = " "), json.dumps ([ list(c) for c in content ], ensure_ascii = False), rank, support, source_zscore, target_zscore ]
+    return [ (name, value) for (name, _), value in zip (node_fields, values) if value is not None ]
+
+##
+def write_graphml (M, f) -> None:
+    "writes M to a text file f in GraphML, a record at a time"
+    from xml.sax.saxutils import escape
+    f.write ('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write ('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+    for name, kind in node_fields:
+        f.write (f'<key id="n_{name}" for="node" attr.name="{name}" attr.type="{kind}"/>\n')
+    for name, kind in link_fields:
+        f.write (f'<key id="e_{name}" for="edge" attr.name="{name}" attr.type="{kind}"/>\n')
+    f.write ('<graph id="PatternLattice" edgedefault="directed">\n')
+    for record in iter_lattice_records (M):
+        if record[0] == "node":
+            data = "".join (f'<data key="n_{name}">{escape (str(value))}</data>' for name, value in encode_node_fields (record))
+            f.write (f'<node id="n{record[1]}">{data}</node>\n')
+        else:
+            _, k, i, j, link_type, rank = record
+            f.write (f'<edge id="e{k}" source="n{i}" target="n{j}"><data key="e_link_type">{escape (link_type)}</data><data key="e_rank">{rank}</data></edge>\n')
+    f.write ('</graph>\n</graphml>\n')
+
+##
+def write_gexf (M, f) -> None:
+    "writes M to a text file f in GEXF 1.3, a record at a time"
+    from xml.sax.saxutils import quoteattr
+    kinds = { "string": "string", "int": "integer", "double": "double" }
+    f.write ('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write ('<gexf xmlns="http://gexf.net/1.3" version="1.3">\n<graph defaultedgetype="directed" mode="static">\n')
+    f.write ('<attributes class="node">\n')
+    for name, kind in node_fields:
+        f.write (f'<attribute id="{name}" title="{name}" type="{kinds[kind]}"/>\n')
+    f.write ('</attributes>\n<attributes class="edge">\n')
+    for name, kind in link_fields:
+        f.write (f'<attribute id="{name}" title="{name}" type="{kinds[kind]}"/>\n')
+    f.write ('</attributes>\n<nodes>\n')
+    in_nodes = True
+    for record in iter_lattice_records (M):
+        if record[0] == "node":
+            fields = encode_node_fields (record)
+            values = "".join (f'<attvalue for="{name}" value={quoteattr (str(value))}/>' for name, value in fields)
+            f.write (f'<node id="{record[1]}" label={quoteattr (fields[0][1])}><attvalues>{values}</attvalues></node>\n')
+        else:
+            if in_nodes:
+                f.write ('</nodes>\n<edges>\n')
+                in_nodes = False
+            _, k, i, j, link_type, rank = record
+            f.write (f'<edge id="{k}" source="{i}" target="{j}"><attvalues><attvalue for="link_type" value={quoteattr (link_type)}/><attvalue for="rank" value="{rank}"/></attvalues></edge>\n')
+    if in_nodes:
+        f.write ('</nodes>\n<edges>\n')
+    f.write ('</edges>\n</graph>\n</gexf>\n')
+
+##
+def write_dot (M, f) -> None:
+    "writes M to a text file f in DOT, a record at a time"
+    def quote (value) -> str:
+        return '"' + str(value).replace ('\\', '\\\\').replace ('"', '\\"') + '"'
+    f.write ('digraph PatternLattice {\nrankdir=LR;\nnode [shape=box];\n')
+    for record in iter_lattice_records (M):
+        if record[0] == "node":
+            fields = encode_node_fields (record)
+            attrs = ", ".join ([ f"label={quote (fields[0][1])}" ] + [ f"{name}={quote (value)}" for name, value in fields ])
+            f.write (f'n{record[1]} [{attrs}];\n')
+        else:
+            _, k, i, j, link_type, rank = record
+            f.write (f'n{i} -> n{j} [link_type={quote (link_type)}, rank={quote (rank)}];\n')
+    f.write ('}\n')
+
+##
+def write_jsonl (M, f) -> None:
+    "writes M to a text file f in JSON Lines: a line on the lattice, then a line per node and a line per link"
+    import json
+    def dump (x: dict) -> str:
+        return json.dumps (x, separators = (',', ':'), ensure_ascii = False) + "\n"
+    f.write (dump ({ "type": "lattice", "gap_mark": M.gap_mark, "generalized": M.generalized }))
+    for record in iter_lattice_records (M):
+        if record[0] == "node":
+            _, i, form, content, rank, support, source_zscore, target_zscore = record
+            f.write (dump ({ "type": "node", "id": i, "form": list(form), "content": [ list(c) for c in content ], "rank": rank, "support": support, "source_zscore": source_zscore, "target_zscore": target_zscore }))
+        else:
+            _, k, i, j, link_type, rank = record
+            f.write (dump ({ "type": "link", "id": k, "source": i, "target": j, "link_type": link_type, "rank": rank }))
+
+##
+lattice_writers = { "graphml": write_graphml, "gexf": write_gexf, "dot": write_dot, "gv": write_dot, "jsonl": write_jsonl }
+
+##
+def write_lattice (M, path: str, format: str = None, check: bool = False) -> str:
+    """
+    writes a PatternLattice M to path in format, one of graphml, gexf, dot (or gv) and jsonl, taken from the extension
+    of path if not given, streaming nodes and links from M without building a graph, and returns the format
+    """
+    import os
+    if format is None:
+        format = os.path.splitext (path)[1].lstrip (".")
+    format = format.lower ()
+    if format not in lattice_writers:
+        raise ValueError (f"unknown export format: {format!r}; use one of {sorted (lattice_writers)}")
+    with open (path, "w", encoding = "utf-8") as f:
+        lattice_writers[format] (M, f)
+    if check:
+        print(f"#wrote {len(M.nodes)} nodes and {len(M.links)} links to {path} in {format}")
+    return format
+
+### end of file
@@ -0,0 +1,302 @@
+## imports libraries
+
+## import related modules
+try:
+    from .utils import *
+except ImportError:
+    from utils import *
+try:
+    from .pattern_lattice import *
+except ImportError:
+    from pattern_lattice import *
+
+### Functions
+
+##
+def make_viewer_levels (M, zscores: dict, use_robust_zscore: bool = False, check: bool = False) -> tuple:
+    """
+    takes a PatternLattice M and z-scores of its nodes and returns a triple of the segment vocabulary, a list of levels,
+    one per rank from the lowest, and a dict of color settings, for write_lattice_viewer(..).
+    Nodes get integer ids in the order of levels, and within a level in the order layered_layout(..) gives them.
+    A level has the forms of its nodes as lists of ids in the vocabulary, where 0 is the gap mark, their z-scores,
+    the positions of instances among them, and the edges, as flat pairs of node ids, of links whose higher end is in it,
+    so that edges of a level can be drawn as soon as it is loaded.
+    """
+    import networkx as nx
+    gap_mark = M.gap_mark
+    ## nodes by rank, ordered to reduce crossings
+    G = nx.DiGraph ()
+    for p in M.nodes:
+        G.add_node (p.form, rank = get_rank_of_list (p.form, gap_mark))
+    G.add_edges_from (link.form_paired for link in M.links if link.form_paired[0] in G and link.form_paired[1] in G)
+    positions = layered_layout (G, subset_key = "rank")
+    ranked = { }
+    for form, rank in G.nodes (data = "rank"):
+        ranked.setdefault (rank, [ ]).append (form)
+    ## vocabulary and node ids
+    vocab, vocab_ids = [ gap_mark ], { gap_mark: 0 }
+    node_ids = { }
+    levels = [ ]
+    for rank in sorted (ranked):
+        forms = sorted (ranked[rank], key = lambda form: positions[form][1])
+        level = { "rank": rank, "start": len(node_ids), "forms": [ ], "z": [ ], "instances": [ ], "edges": [ ] }
+        for i, form in enumerate (forms):
+            node_ids[form] = len(node_ids)
+            encoded = [ ]
+            for seg in form:
+                if seg not in vocab_ids:
+                    vocab_ids[seg] = len(vocab)
+                    vocab.append (seg)
+                encoded.append (vocab_ids[seg])
+            level["forms"].append (encoded)
+            z = zscores.get (form)
+            level["z"].append (None if z is None else round (float(z), 3))
+            if count_items (form, gap_mark) == 0:
+                level["instances"].append (i)
+        levels.append (level)
+    ## edges go to the level of their later end
+    level_of = { rank: k for k, rank in enumerate (sorted (ranked)) }
+    for u, v in G.edges ():
+        k = max (level_of[G.nodes[u]["rank"]], level_of[G.nodes[v]["rank"]])
+        levels[k]["edges"].extend ((node_ids[u], node_ids[v]))
+    ## colors as draw_network(..) makes them: instances at 0, and others at normalized z-scores padded by 0.25,
+    ## mapped to coolwarm over the range of values, as matplotlib does with node_color
+    max_val = round (1.5 * 2, 0) if use_robust_zscore else 2
+    values  = [ ]
+    for level in levels:
+        instances = set(level["instances"])
+        values.extend ([ 0.0 if i in instances else (0.5 if z is None else (z + 2) / (max_val + 2)) + 0.25 for i, z in enumerate (level["z"]) ])
+    from matplotlib import colormaps, colors
+    colormap = colormaps['coolwarm']
+    color_settings = { "min_val": -2, "max_val": max_val, "padding": 0.25,
+                       "vmin": min(values, default = 0), "vmax": max(values, default = 1),
+                       "colormap": [ colors.to_hex (colormap (i / 32)) for i in range (33) ] }
+    if check:
+        print(f"#viewer: {len(node_ids)} nodes in {len(levels)} levels; {len(vocab)} segments")
+    return vocab, levels, color_settings
+
+##
+def write_lattice_viewer (M, path: str, zscores: dict = None, use_robust_zscore: bool = False, title: str = None, max_bytes: int = None, check: bool = False) -> dict:
+    """
+    writes a single HTML file that shows the PatternLattice M offline in a browser, and returns a dict of what is written.
+    Levels made by make_viewer_levels(..) are embedded as compact JSON blocks, one per rank, which the viewer loads one
+    after another, drawing as it goes, on a canvas with rank filters and z-score bounds. With max_bytes, levels are
+    written from the lowest rank as long as the file stays within max_bytes, and the rest are left out.
+    """
+    import json
+    if zscores is None:
+        zscores = M.source_zscores
+    vocab, levels, color_settings = make_viewer_levels (M, zscores, use_robust_zscore = use_robust_zscore, check = check)
+    ##
+    def encode (x) -> str:
+        return json.dumps (x, separators = (',', ':'), ensure_ascii = False).replace ("</", "<\\/")
+    ##
+    if title is None:
+        title = f"{'g' if M.generalized else ''}PatternLattice of {len(M.nodes)} nodes and {len(M.links)} links"
+    meta = { "title": title, "vocab": vocab, "robust": use_robust_zscore, "colors": color_settings,
+             "ranks": [ level["rank"] for level in levels ], "sizes": [ len(level["forms"]) for level in levels ] }
+    ## levels within the budget
+    blocks = [ ]
+    size   = len(lattice_viewer_template.encode ()) + len(encode (meta).encode ()) + len(encode (title).encode ()) + 64
+    for k, level in enumerate (levels):
+        block = f'<script type="application/json" id="level-{k}">{encode (level)}</script>\n'
+        n_bytes = len(block.encode ())
+        if max_bytes is not None and size + n_bytes > max_bytes:
+            print(f"#viewer: {len(levels) - k} levels from rank {level['rank']} left out to keep {path} within {max_bytes} bytes")
+            break
+        blocks.append (block)
+        size += n_bytes
+    meta["n_levels"] = len(blocks)
+    ##
+    html = lattice_viewer_template.replace ("%%TITLE%%", title.replace ("&", "&amp;").replace ("<", "&lt;")).replace ("%%META%%", encode (meta)).replace ("%%LEVELS%%", "".join (blocks))
+    with open (path, "w", encoding = "utf-8") as f:
+        f.write (html)
+    result = { "path": path, "bytes": len(html.encode ()), "levels": len(blocks), "levels_left_out": len(levels) - len(blocks),
+               "nodes": sum (len(level["forms"]) for level in levels[:len(blocks)]), "edges": sum (len(level["edges"]) // 2 for level in levels[:len(blocks)]),
+               "segments": len(vocab) }
+    if check:
+        print(f"#viewer: {result}")
+    return result
+
+## the viewer: a canvas renderer with no dependency
+lattice_viewer_template = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%%TITLE%%</title>
+<style>
+body { margin: 0; font: 13px sans-serif; display: flex; flex-direction: column; height: 100vh; }
+#bar { padding: 6px; border-bottom: 1px solid #ccc; display: flex; gap: 12px; align-items: center; flex-wrap: wrap; }
+#bar input[type=number] { width: 5em; }
+#view { flex: 1; position: relative; }
+canvas { position: absolute; left: 0; top: 0; cursor: grab; }
+#tip { position: absolute; pointer-events: none; background: #fff; border: 1px solid #888; padding: 2px 4px; display: none; white-space: pre; }
+</style>
+</head>
+<body>
+<div id="bar">
+<b id="title"></b>
+<label>ranks <input id="rank-lb" type="number"> &ndash; <input id="rank-ub" type="number"></label>
+<label>z-scores <input id="z-lb" type="number" step="0.1"> &ndash; <input id="z-ub" type="number" step="0.1"></label>
+<label><input id="keep-instances" type="checkbox" checked> keep instances</label>
+<label><input id="show-labels" type="checkbox" checked> labels</label>
+<button id="fit">fit</button>
+<span id="status"></span>
+</div>
+<div id="view"><canvas id="canvas"></canvas><div id="tip"></div></div>
+<script type="application/json" id="meta">%%META%%</script>
+%%LEVELS%%<script>
+"use strict";
+const meta = JSON.parse (document.getElementById ("meta").textContent);
+const vocab = meta.vocab, C = meta.colors;
+const COL = 160, ROW = 14; // spacing of ranks and of nodes within a rank
+const levels = [ ];        // loaded levels
+const canvas = document.getElementById ("canvas"), ctx = canvas.getContext ("2d");
+const view = { x: 0, y: 0, scale: 1 };
+document.getElementById ("title").textContent = meta.title;
+const maxSize = Math.max (1, ...meta.sizes);
+
+function label (form) { return form.map (s => vocab[s]).join (" "); }
+function colorOf (level, i) {
+    let v;
+    if (level.instanceSet.has (i)) v = 0;
+    else v = (level.z[i] === null ? 0.5 : (level.z[i] - C.min_val) / (C.max_val - C.min_val)) + C.padding;
+    v = C.vmax > C.vmin ? (v - C.vmin) / (C.vmax - C.vmin) : 0.5;
+    return C.colormap[Math.max (0, Math.min (32, Math.round (32 * v)))];
+}
+function readNumber (id) { const v = document.getElementById (id).value; return v === "" ? null : Number (v); }
+function filters () {
+    return { rankLb: readNumber ("rank-lb"), rankUb: readNumber ("rank-ub"), zLb: readNumber ("z-lb"), zUb: readNumber ("z-ub"),
+             keepInstances: document.getElementById ("keep-instances").checked, labels: document.getElementById ("show-labels").checked };
+}
+function visible (level, i, f) {
+    if (f.rankLb !== null && level.rank < f.rankLb) return false;
+    if (f.rankUb !== null && level.rank > f.rankUb) return false;
+    if (f.keepInstances && level.instanceSet.has (i)) return true;
+    const z = level.z[i] === null ? 0 : level.z[i];
+    return !((f.zLb !== null && z < f.zLb) || (f.zUb !== null && z > f.zUb));
+}
+// nodes are placed by level (x) and by their order within it (y), centered
+function nodeX (k) { return k * COL; }
+function nodeY (level, i) { return (i - (level.forms.length - 1) / 2) * ROW; }
+const where = [ ]; // node id -> [level, index]
+
+function load (k) {
+    const level = JSON.parse (document.getElementById ("level-" + k).textContent);
+    level.k = k;
+    level.instanceSet = new Set (level.instances);
+    level.colors = level.forms.map ((_, i) => colorOf (level, i));
+    for (let i = 0; i < level.forms.length; i++) where[level.start + i] = [ k, i ];
+    levels.push (level);
+}
+function fit () {
+    const w = canvas.width, h = canvas.height;
+    const width = Math.max (1, meta.ranks.length - 1) * COL + COL, height = maxSize * ROW + ROW;
+    view.scale = Math.min (w / width, h / height);
+    view.x = w / 2 - (meta.ranks.length - 1) * COL / 2 * view.scale;
+    view.y = h / 2;
+    draw ();
+}
+function draw () {
+    const f = filters ();
+    ctx.setTransform (1, 0, 0, 1, 0, 0);
+    ctx.clearRect (0, 0, canvas.width, canvas.height);
+    ctx.setTransform (view.scale, 0, 0, view.scale, view.x, view.y);
+    // edges, in one path
+    ctx.beginPath ();
+    let nEdges = 0, nNodes = 0;
+    for (const level of levels) {
+        const e = level.edges;
+        for (let j = 0; j < e.length; j += 2) {
+            const [ ka, ia ] = where[e[j]], [ kb, ib ] = where[e[j + 1]];
+            const a = levels[ka], b = levels[kb];
+            if (!visible (a, ia, f) || !visible (b, ib, f)) continue;
+            ctx.moveTo (nodeX (ka), nodeY (a, ia));
+            ctx.lineTo (nodeX (kb), nodeY (b, ib));
+            nEdges++;
+        }
+    }
+    ctx.strokeStyle = "rgba(128,128,128,0.5)";
+    ctx.lineWidth = 0.5 / view.scale;
+    ctx.stroke ();
+    // nodes, within the view only
+    const r = Math.max (1.5 / view.scale, 2);
+    const top = -view.y / view.scale, bottom = (canvas.height - view.y) / view.scale;
+    const withLabels = f.labels && ROW * view.scale >= 9;
+    ctx.font = (11 / view.scale) + "px sans-serif";
+    ctx.textBaseline = "top";
+    for (const level of levels) {
+        const n = level.forms.length, offset = (n - 1) / 2;
+        const first = Math.max (0, Math.floor (top / ROW + offset) - 1), last = Math.min (n - 1, Math.ceil (bottom / ROW + offset) + 1);
+        const x = nodeX (level.k);
+        for (let i = 0; i < n; i++) {
+            if (!visible (level, i, f)) continue;
+            nNodes++;
+            if (i < first || i > last) continue;
+            const y = nodeY (level, i);
+            ctx.fillStyle = level.colors[i];
+            ctx.fillRect (x - r, y - r, 2 * r, 2 * r);
+            if (withLabels) {
+                ctx.fillStyle = "darkblue";
+                ctx.fillText (label (level.forms[i]), x + r, y + r);
+            }
+        }
+    }
+    document.getElementById ("status").textContent =
+        `levels ${levels.length}/${meta.ranks.length}` + (meta.n_levels < meta.ranks.length ? ` (${meta.ranks.length - meta.n_levels} left out)` : "") +
+        `; ${nNodes} nodes, ${nEdges} edges shown`;
+}
+function resize () {
+    const box = document.getElementById ("view").getBoundingClientRect ();
+    canvas.width = box.width; canvas.height = box.height;
+}
+function nodeAt (mx, my) {
+    const x = (mx - view.x) / view.scale, y = (my - view.y) / view.scale;
+    const k = Math.round (x / COL);
+    if (k < 0 || k >= levels.length || Math.abs (x - nodeX (k)) > COL / 2) return null;
+    const level = levels[k], i = Math.round (y / ROW + (level.forms.length - 1) / 2);
+    if (i < 0 || i >= level.forms.length || !visible (level, i, filters ())) return null;
+    return [ level, i ];
+}
+// interaction: drag to pan, wheel to zoom, hover for a node
+let drag = null;
+canvas.addEventListener ("mousedown", e => { drag = [ e.offsetX - view.x, e.offsetY - view.y ]; });
+window.addEventListener ("mouseup", () => { drag = null; });
+canvas.addEventListener ("mousemove", e => {
+    const tip = document.getElementById ("tip");
+    if (drag) { view.x = e.offsetX - drag[0]; view.y = e.offsetY - drag[1]; draw (); return; }
+    const hit = nodeAt (e.offsetX, e.offsetY);
+    if (!hit) { tip.style.display = "none"; return; }
+    const [ level, i ] = hit;
+    tip.textContent = `${label (level.forms[i])}\\nrank ${level.rank}; z-score ${level.z[i] === null ? "-" : level.z[i]}` + (level.instanceSet.has (i) ? "; instance" : "");
+    tip.style.left = (e.offsetX + 12) + "px"; tip.style.top = (e.offsetY + 12) + "px"; tip.style.display = "block";
+});
+canvas.addEventListener ("wheel", e => {
+    e.preventDefault ();
+    const factor = Math.exp (-e.deltaY / 500);
+    view.x = e.offsetX - (e.offsetX - view.x) * factor;
+    view.y = e.offsetY - (e.offsetY - view.y) * factor;
+    view.scale *= factor;
+    draw ();
+}, { passive: false });
+for (const id of [ "rank-lb", "rank-ub", "z-lb", "z-ub", "keep-instances", "show-labels" ])
+    document.getElementById (id).addEventListener ("input", draw);
+document.getElementById ("fit").addEventListener ("click", fit);
+window.addEventListener ("resize", () => { resize (); draw (); });
+// progressive loading: a level at a time, drawing after each
+resize ();
+fit ();
+let next = 0;
+function loadNext () {
+    if (next >= meta.n_levels) return;
+    load (next++);
+    draw ();
+    setTimeout (loadNext, 0);
+}
+loadNext ();
+</script>
+</body>
+</html>
+"""
+
+### end of file
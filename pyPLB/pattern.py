@@ -1,5 +1,6 @@
 ## imports
 #import array # turned out not to be suited
+import array # used only by CompactPattern
 #import numpy as np # turned out not to be suited
 #import awkward as ak # turned out not to be suited
 
@@ -131,6 +132,14 @@ def test_completion (P: list, gap_mark: str, check: bool = False) -> bool:
             return True
     return False
 
+##
+def gen_gap_masks (positions: list):
+    "generates the bitmasks of all subsets of positions in rank order, i.e., with fewer gaps first, without duplicates"
+    from itertools import combinations
+    for k in range (len(positions) + 1):
+        for chosen in combinations (positions, k):
+            yield sum (1 << i for i in chosen)
+
 ##
 class Pattern:
     # The idea of using NamedTuple turned out inadequate
@@ -164,8 +173,8 @@ class Pattern:
     def __eq__ (self, other):
         "defines response to '==' operator"
         # Multi-step returns get the judgement significantly faster
-        #if self.form_hash != other.form_hash:
-        #    return False
+        if self.form_hash != other.form_hash:
+            return False
         #if self is None or other is None:
         #    return False
         if len (self.form) != len (other.form):
@@ -177,6 +186,15 @@ class Pattern:
         else:
             return True
 
+    ## Patterns are hashed by form, consistently with __eq__
+    def __hash__ (self):
+        return self.form_hash
+
+    ## a hash is salted per process, so it is recomputed on unpickling
+    def __setstate__ (self, state):
+        self.__dict__.update (state)
+        self.form_hash = hash (self.form)
+
     ## define response to Pattern(None) is None
     def __bool__ (self):
         return self.paired is not None
@@ -328,6 +346,7 @@ class Pattern:
         q.boundary_mark = self.boundary_mark
         q.paired        = paired
         q.form          = q.get_form ()
+        q.form_hash     = hash (q.form)
         q.content       = q.get_content ()
         return q
 
@@ -337,6 +356,7 @@ class Pattern:
         try:
             #self.form = [ x[0] for x in self.paired ]
             self.form = tuple( [ x[0] for x in self.paired ] )
+            self.form_hash = hash (self.form)
             return self
         except (AttributeError, TypeError):
             return None
@@ -358,6 +378,31 @@ class Pattern:
         self.paired = tuple( [ (x, y) for x, y in zip (self.form, self.content) ] )
         return self
 
+    ##
+    def union_content (self, other):
+        """
+        takes a pair of Patterns of the same form and returns the content of self with that of other added position by position,
+        as merge_patterns(..) joins the content of equal forms but without repeating segments, or None if other adds nothing
+        """
+        content = None
+        for i, (mine, theirs) in enumerate (zip (self.content, other.content)):
+            extra = [ x for x in theirs if x not in mine ]
+            if len(extra) > 0:
+                if content is None:
+                    content = list (self.content)
+                ## a new list, since content lists are shared among gapped versions
+                content[i] = list (mine) + extra
+        if content is None:
+            return None
+        return tuple (content)
+
+    ##
+    def set_content (self, content: tuple):
+        "replaces the content of a Pattern, keeping its form"
+        self.content = tuple (content)
+        self.update_paired ()
+        return self
+
     ##
     def create_gapped_versions (self: list, check: bool = False) -> list:
         "create a list of gapped patterns in which each non-gap is replaced by a gap"
@@ -405,7 +450,8 @@ class Pattern:
                 form.append (self.gap_mark)
             else:
                 form.append (f)
-        self.form = form
+        self.form = tuple(form)
+        self.form_hash = hash (self.form)
         if check:
             print(f"# self.form: {self.form}")
         self.update_paired()
@@ -451,9 +497,55 @@ class Pattern:
                 return False
         return True
 
+    ##
+    def gapped_by_mask (self, mask: int):
+        "create a gapped pattern in which the segments at positions set in mask are replaced by gaps"
+        if mask == 0:
+            return self
+        gap_mark = self.gap_mark
+        gapped   = [ (gap_mark, c) if mask >> i & 1 else (f, c) for i, (f, c) in enumerate (self.paired) ]
+        ##
+        result        = Pattern([], gap_mark = gap_mark)
+        result.paired = gapped
+        result.update_form()
+        result.update_content()
+        return result
+
     ##
     def build_lattice_nodes (p, generalized: bool, check: bool = False):
-        "takes a pattern and returns a list of lattice nodes"
+        """
+        takes a pattern and returns a list of lattice nodes.
+        Nodes of a non-generalized lattice are enumerated in closed form, one per gap mask over the non-gap positions.
+        """
+        if check:
+            print (f"#p: {p}")
+        #
+        gap_mark  = p.gap_mark
+        positions = [ i for i, f in enumerate (p.form) if f != gap_mark ]
+        R         = [ p.gapped_by_mask (mask) for mask in gen_gap_masks (positions) ]
+        if check:
+            print(f"#R: {R}")
+
+        ## build generalized lattice
+        if generalized:
+            Q = R.copy()
+            ## right- and left-gapped versions can coincide, e.g., [_, a] + [_] and [_] + [a, _]
+            form_register = set()
+            for position in [ 'right', 'left', 'both' ]:
+                for r in R:
+                    q = r.add_gap_at_edge (position)
+                    if q.form not in form_register:
+                        Q.append(q)
+                        form_register.add (q.form)
+            if check:
+                print(f"#Q: {Q}")
+            R = Q
+        ## return result, sorted as __lt__ does but computing each form once
+        return sorted (R, key = lambda x: x.form)
+
+    ##
+    def build_lattice_nodes_iteratively (p, generalized: bool, check: bool = False):
+        "takes a pattern and returns a list of lattice nodes, reached by repeated gapping until a fully gapped node appears"
         if check:
             print (f"#p: {p}")
         #
@@ -461,7 +553,7 @@ class Pattern:
         size     = len(p.paired)
         R        = [p]
         ## main
-        form_register = [p.form]
+        form_register = { p.form }
         completed = False
         while not completed:
             if check:
@@ -477,7 +569,7 @@ class Pattern:
                         print(f"#g{i}: {g}")
                     if g.form not in form_register:
                         R.append (g)
-                        form_register.append(g.form)
+                        form_register.add (g.form)
             ## check termination
             if test_completion (R, gap_mark = gap_mark, check = False):
                 completed = True
@@ -485,12 +577,14 @@ class Pattern:
         ## build generalized lattice
         if generalized:
             Q = R.copy()
+            form_register = { q.form for q in Q }
             positions = [ 'right', 'left', 'both' ]
             for position in positions:
                 for r in R:
                     q = r.add_gap_at_edge (position)
-                    if q not in Q:
+                    if q.form not in form_register:
                         Q.append(q)
+                        form_register.add (q.form)
             if check:
                 print(f"#Q: {Q}")
             R = Q
@@ -576,4 +670,283 @@ class Pattern:
         #yield new # fails
         return new
 
+##
+class SegmentVocabulary:
+    "a shared table that interns segments (str) to small integers and back"
+    def __init__ (self):
+        self.ids      = { }
+        self.segments = [ ]
+
+    ##
+    def __len__ (self):
+        return len (self.segments)
+
+    ##
+    def __repr__ (self):
+        return f"{type(self).__name__} ({len(self.segments)} segments)"
+
+    ##
+    def intern (self, segment: str) -> int:
+        "returns the id of a segment, registering it when it is unseen"
+        try:
+            return self.ids[segment]
+        except KeyError:
+            i = len (self.segments)
+            self.ids[segment] = i
+            self.segments.append (segment)
+            return i
+
+    ##
+    def lookup (self, i: int) -> str:
+        "returns the segment of an id"
+        return self.segments[i]
+
+## the vocabulary shared by all CompactPatterns in a process
+segment_vocabulary = SegmentVocabulary ()
+
+##
+def rebuild_compact_pattern (segments: tuple, mask: int, content: tuple, gap_mark: str, boundary_mark: str):
+    "utility function for unpickling a CompactPattern, re-interning its segments in the receiving process"
+    vocab = CompactPattern.vocabulary
+    p = CompactPattern.__new__ (CompactPattern)
+    p.gap_mark      = gap_mark
+    p.boundary_mark = boundary_mark
+    p._ids          = array.array ('I', [ vocab.intern (x) for x in segments ])
+    p._mask         = mask
+    p._content      = content
+    p._hash         = hash (p.form)
+    return p
+
+##
+class CompactPattern:
+    """
+    memory-conserving alternative to Pattern, used when a lattice gets too big.
+    Segments are interned into the shared SegmentVocabulary and a pattern is held as an int array
+    plus a gap bitmask (bit i set = position i is a gap). Gapped versions of a source share its array.
+    form, content and paired are read-only views computed on access, so code that reads Patterns
+    works on CompactPatterns too, but update_form(), update_content() and the like are unavailable.
+    """
+    __slots__ = ('gap_mark', 'boundary_mark', '_ids', '_mask', '_content', '_hash')
+
+    ## the vocabulary is shared, not per-instance
+    vocabulary = segment_vocabulary
+
+    def __init__ (self, L: (list, tuple), gap_mark: str, boundary_mark: str = "#", check: bool = False):
+        "creates a CompactPattern object from a given L, a list of elements"
+        vocab = self.vocabulary
+        self.gap_mark      = gap_mark
+        self.boundary_mark = boundary_mark
+        ## Crucially, strip(..) as list_encode_for_pattern does
+        segments           = [ str(x).strip() for x in L if len(x) > 0 ]
+        self._ids          = array.array ('I', [ vocab.intern (x) for x in segments ])
+        self._mask         = sum (1 << i for i, x in enumerate (segments) if x == gap_mark)
+        ## None means the content of position i is [segment i], which is always the case until merger
+        self._content      = None
+        self._hash         = hash (self.form)
+
+    ##
+    @classmethod
+    def from_paired (cls, paired: list, gap_mark: str, boundary_mark: str = "#"):
+        "creates a CompactPattern from a list of (form, content) pairs"
+        vocab    = cls.vocabulary
+        ids      = [ ]
+        mask     = 0
+        standard = True
+        for i, (f, c) in enumerate (paired):
+            if f == gap_mark:
+                mask |= 1 << i
+            ## content is standard when it is the single segment that the form shows or hides
+            if isinstance (c, list) and len(c) == 1 and isinstance (c[0], str) and (f == gap_mark or f == c[0]):
+                ids.append (vocab.intern (c[0]))
+            else:
+                standard = False
+                ids.append (vocab.intern (f))
+        ##
+        p = cls.__new__ (cls)
+        p.gap_mark      = gap_mark
+        p.boundary_mark = boundary_mark
+        p._ids          = array.array ('I', ids)
+        p._mask         = mask
+        if standard:
+            p._content = None
+        else:
+            p._content = tuple([ c for f, c in paired ])
+        p._hash         = hash (p.form)
+        return p
+
+    ##
+    def derive (self, ids: array.array, mask: int):
+        "creates a sibling CompactPattern sharing gap_mark and boundary_mark"
+        p = CompactPattern.__new__ (CompactPattern)
+        p.gap_mark      = self.gap_mark
+        p.boundary_mark = self.boundary_mark
+        p._ids          = ids
+        p._mask         = mask
+        p._content      = None
+        p._hash         = hash (p.form)
+        return p
+
+    ##
+    def __reduce__ (self):
+        "pickles segments rather than ids, since a worker process has its own vocabulary"
+        lookup = self.vocabulary.lookup
+        return (rebuild_compact_pattern, (tuple([ lookup(i) for i in self._ids ]), self._mask, self._content, self.gap_mark, self.boundary_mark))
+
+    ## read-only views
+    @property
+    def form (self) -> tuple:
+        segments, gap_mark, mask = self.vocabulary.segments, self.gap_mark, self._mask
+        return tuple([ gap_mark if mask >> i & 1 else segments[x] for i, x in enumerate (self._ids) ])
+
+    ##
+    @property
+    def content (self) -> tuple:
+        if self._content is not None:
+            return self._content
+        segments = self.vocabulary.segments
+        return tuple([ [ segments[x] ] for x in self._ids ])
+
+    ##
+    @property
+    def paired (self) -> list:
+        return list (zip (self.form, self.content))
+
+    ##
+    @property
+    def form_hash (self) -> int:
+        return self._hash
+
+    ##
+    @property
+    def size (self) -> int:
+        return len (self._ids)
+
+    ##
+    @property
+    def rank (self) -> int:
+        return self.get_rank ()
+
+    ##
+    @property
+    def gap_size (self) -> int:
+        return self.get_gap_size ()
+
+    ##
+    @property
+    def content_size (self) -> int:
+        return self.get_substance_size ()
+
+    ## borrowed from Pattern as they only read views
+    __eq__               = Pattern.__eq__
+    __hash__             = Pattern.__hash__
+    __lt__               = Pattern.__lt__
+    __iter__             = Pattern.__iter__
+    __repr__             = Pattern.__repr__
+    separate_print       = Pattern.separate_print
+    get_form_size        = Pattern.get_form_size
+    get_content          = Pattern.get_content
+    get_content_size     = Pattern.get_content_size
+    get_substance        = Pattern.get_substance
+    get_gaps             = Pattern.get_gaps
+    includes             = Pattern.includes
+    union_content        = Pattern.union_content
+    group_patterns_by_size = Pattern.group_patterns_by_size
+    has_compatible_content = Pattern.has_compatible_content
+    build_lattice_nodes  = Pattern.build_lattice_nodes
+    build_lattice_nodes_iteratively = Pattern.build_lattice_nodes_iteratively
+    instantiates_or_not  = Pattern.instantiates_or_not
+
+    ##
+    def __bool__ (self):
+        return True
+
+    ##
+    def __len__ (self):
+        return len (self._ids)
+
+    ##
+    def get_form (self):
+        "takes a pattern and returns its form as tuple"
+        return self.form
+
+    ##
+    def get_gap_size (self):
+        "takes a pattern and returns the number of gap_marks in it"
+        return bin (self._mask).count ("1")
+
+    ## alias
+    count_gaps = get_gap_size
+
+    ##
+    def get_substance_size (self):
+        "takes a pattern and returns its rank, i.e., the number of non-gap elements"
+        return len (self._ids) - self.get_gap_size ()
+
+    ## alias
+    get_rank = get_substance_size
+
+    ##
+    def is_fully_gapped (self, gap_mark: str):
+        "tests if a given pattern has the fully gapped form"
+        return self._mask == (1 << len (self._ids)) - 1
+
+    ##
+    def create_gapped_versions (self, check: bool = False) -> list:
+        "create a list of gapped patterns in which each non-gap is replaced by a gap"
+        if self._content is not None:
+            return [ CompactPattern.from_paired (p.paired, self.gap_mark, self.boundary_mark) for p in Pattern.create_gapped_versions (self, check = check) ]
+        ## gapped versions share self._ids
+        ids, mask = self._ids, self._mask
+        R = [ self.derive (ids, mask | (1 << i)) for i in range (len (ids)) ]
+        if check:
+            for r in R:
+                print(f"#gapped: {r}")
+        return R
+
+    ##
+    def gapped_by_mask (self, mask: int):
+        "create a gapped pattern in which the segments at positions set in mask are replaced by gaps"
+        if mask == 0:
+            return self
+        if self._content is not None:
+            return CompactPattern.from_paired (Pattern.gapped_by_mask (self, mask).paired, self.gap_mark, self.boundary_mark)
+        return self.derive (self._ids, self._mask | mask)
+
+    ##
+    def add_gap_at_edge (self, position: str, edge_value: str = "#", check: bool = False):
+        "add a gap at edge of a pattern given"
+        if self._content is not None:
+            return CompactPattern.from_paired (Pattern.add_gap_at_edge (self, position, edge_value, check = check).paired, self.gap_mark, self.boundary_mark)
+        ##
+        edge  = self.vocabulary.intern (edge_value)
+        ids   = self._ids
+        n     = len (ids)
+        if position in [ 'Right', 'R', 'right' ]:
+            new_ids  = ids + array.array ('I', [ edge ])
+            new_mask = self._mask | (1 << n)
+        elif position in [ 'Left', 'L', 'left' ]:
+            new_ids  = array.array ('I', [ edge ]) + ids
+            new_mask = (self._mask << 1) | 1
+        elif position in [ 'Both', 'B', 'both' ]:
+            new_ids  = array.array ('I', [ edge ]) + ids + array.array ('I', [ edge ])
+            new_mask = (self._mask << 1) | 1 | (1 << (n + 1))
+        else:
+            raise ValueError (f"Specified position is undefined: {position}")
+        return self.derive (new_ids, new_mask)
+
+    ##
+    def set_content (self, content: tuple):
+        "replaces the content of a CompactPattern, keeping its form"
+        self._content = tuple (content)
+        return self
+
+    ##
+    def merge_patterns (self, other, reduction: bool = True, check: bool = False):
+        "take a pair of Patterns, merges one Pattern with another"
+        new = Pattern.merge_patterns (self, other, reduction = reduction, check = check)
+        ## keeps the void result of Pattern.merge_patterns as it is
+        if new is None or new is self or new.paired is None:
+            return new
+        return CompactPattern.from_paired (new.paired, self.gap_mark, self.boundary_mark)
+
 ### end of file
@@ -1,4 +1,5 @@
 ## imports libraries
+from collections.abc import Mapping
 
 ## import related modules
 try:
@@ -75,7 +76,7 @@ def test_pairs_for_ISA (r: list, l: list, check: bool = False) -> list:
         return False
 
 ##
-def classify_relations_mp1 (R, L, gap_mark, check: bool = False):
+def classify_relations_mp1 (R, L, gap_mark, pool: WorkerPool = None, check: bool = False):
     """
     takes two Patterns, classify their relation and returns the list of is-a cases.
 
@@ -86,9 +87,7 @@ def classify_relations_mp1 (R, L, gap_mark, check: bool = False):
     L2 = sorted (L, key = lambda x: len(x), reverse = False)
     from itertools import product
     #pairs = product (R2, L2) # cannot be reused
-    import multiprocess as mp
-    import os
-    with mp.Pool(max(os.cpu_count(), 1)) as pool:
+    with use_worker_pool (pool) as pool:
         test_values = pool.starmap (test_pairs_for_ISA, product (R2, L2))
     #print (f"test_values: {test_values}")
     true_pairs = [ pair for pair, t in zip ([ (l, r) for r, l in product (R2, L2) ], test_values) if t is True ]
@@ -168,19 +167,227 @@ def classify_pairs (r: list, l: list, check: bool = False) -> list:
     return sub_pairs
 
 ## The following fails to work properly because multiprocess can't reserve object attributes
-def classify_relations_mp2 (R, L, gap_mark: str, check: bool = False):
+def classify_relations_mp2 (R, L, gap_mark: str, pool: WorkerPool = None, check: bool = False):
     ## generates a list of Boolean values
     from itertools import product
     R2 = sorted (R, key = lambda x: len(x), reverse = False)
     L2 = sorted (L, key = lambda x: len(x), reverse = False)
     #pairs = product (R2, L2) # cannot be reused
-    import os
-    import multiprocess as mp
-    with mp.Pool(max(os.cpu_count(), 1)) as pool:
+    with use_worker_pool (pool) as pool:
         sub_pairs = pool.starmap (classify_pairs, product (R2, L2)) # seems to work
     ##
     return [ PatternLink (*p) for p in sub_pairs if p is not None and len(p) > 0 ] # Crucially, len(p) > 0
 
+##
+def encode_forms (P: list, gap_mark: str) -> tuple:
+    """
+    takes a list of Patterns and returns a pair of (sizes, codes), two int arrays, in which
+    segment i of pattern j is codes[j * width + i], gaps are 0, and positions beyond the size are -1
+    """
+    import array
+    vocab  = { gap_mark: 0 }
+    width  = max([ len(p.form) for p in P ], default = 0)
+    sizes  = array.array ('i', [ len(p.form) for p in P ])
+    codes  = array.array ('i', [ -1 ]) * (len(P) * width)
+    for j, p in enumerate (P):
+        for i, seg in enumerate (p.form):
+            try:
+                codes[j * width + i] = vocab[seg]
+            except KeyError:
+                codes[j * width + i] = vocab[seg] = len(vocab)
+    return sizes, codes
+
+##
+def test_encoded_pair (r: tuple, l: tuple) -> bool:
+    "tests if an int-encoded pair of forms (gap = 0) is in IS-A relation, the same way classify_pairs(..) does"
+    r_size, l_size = len(r), len(l)
+    if l_size == r_size + 1:
+        return (l[-1] == 0 and l[:-1] == r) or (l[0] == 0 and l[1:] == r)
+    if l_size != r_size or l == r:
+        return False
+    r_gaps, l_gaps = r.count(0), l.count(0)
+    ## is-a:T0
+    if r_gaps == 0 and l_gaps == 1:
+        r_substance = set(r)
+        return all(x in r_substance for x in l if x != 0)
+    ## check_for_instantiation
+    if abs(r_gaps - l_gaps) > 1:
+        return False
+    for r_seg, l_seg in zip (r, l):
+        if l_seg != r_seg and l_seg != 0:
+            return False
+    return True
+
+## the int-encoded forms last loaded by a worker, kept across tasks on the same file, and the ParentIndexes built on them
+_loaded_forms   = { }
+_loaded_indexes = { }
+
+##
+def load_encoded_forms (path: str, n_forms: int, width: int) -> list:
+    "reads int-encoded forms from a file written by classify_relations_shm(..) through a memory map"
+    import os
+    import mmap
+    ## a file name can be reused by a later call, so the key includes the file's identity
+    stat = os.stat (path)
+    key  = (path, stat.st_ino, stat.st_mtime_ns, n_forms, width)
+    try:
+        return _loaded_forms[key]
+    except KeyError:
+        pass
+    with open (path, "rb") as f:
+        with mmap.mmap (f.fileno(), 0, access = mmap.ACCESS_READ) as m:
+            data  = memoryview (m).cast ('i')
+            sizes = data[:n_forms]
+            codes = data[n_forms:]
+            forms = [ tuple(codes[j * width: j * width + sizes[j]]) for j in range (n_forms) ]
+            del sizes, codes, data
+    _loaded_forms.clear ()
+    _loaded_indexes.clear ()
+    _loaded_forms[key] = forms
+    return forms
+
+##
+def classify_encoded_pairs (path: str, n_R: int, n_L: int, width: int, r_start: int, r_stop: int, offset: int = 0, n_forms: int = None, method: str = "pairwise"):
+    """
+    worker function: finds the parents in L of R[r_start:r_stop] and returns the flattened (r, l) index pairs as an int array.
+    R and L are the n_R + n_L forms from offset in the file of n_forms forms.
+    With method "pairwise", each r is tested against all of L; with "indexed", it is looked up in a ParentIndex of L,
+    built once per block and worker.
+    """
+    import array
+    if n_forms is None:
+        n_forms = n_R + n_L
+    forms = load_encoded_forms (path, n_forms, width)
+    R     = forms[offset: offset + n_R]
+    L     = forms[offset + n_R: offset + n_R + n_L]
+    pairs = array.array ('i')
+    if method == "indexed":
+        try:
+            index = _loaded_indexes[(offset, n_R, n_L)]
+        except KeyError:
+            index = _loaded_indexes[(offset, n_R, n_L)] = ParentIndex (L, gap_mark = 0)
+        for ri in range (r_start, r_stop):
+            for li in index.lookup (R[ri]):
+                pairs.append (ri)
+                pairs.append (li)
+        return pairs
+    for ri in range (r_start, r_stop):
+        r = R[ri]
+        for li, l in enumerate (L):
+            if test_encoded_pair (r, l):
+                pairs.append (ri)
+                pairs.append (li)
+    return pairs
+
+##
+def classify_encoded_tile (*args):
+    "worker function: runs classify_encoded_pairs(..) and returns the result with the worker's pid and busy time"
+    import os
+    import time
+    start = time.perf_counter()
+    pairs = classify_encoded_pairs (*args)
+    return os.getpid(), time.perf_counter() - start, pairs
+
+##
+def schedule_tiles (block_sizes: list, n_workers: int, tiles_per_worker: int = 4) -> list:
+    """
+    takes a list of (n_R, row_cost), e.g., (n_R, n_L) for pairwise testing, and returns tiles (block, r_start, r_stop, cost)
+    that split the blocks into similar costs, ordered by decreasing cost so that the largest tiles start first.
+    The cost of a tile is the number of candidate pairs it tests; rank populations are binomial, so blocks differ a lot.
+    """
+    total  = sum(n_R * row_cost for n_R, row_cost in block_sizes)
+    target = max(1, total / max(1, n_workers * tiles_per_worker))
+    tiles  = [ ]
+    for b, (n_R, row_cost) in enumerate (block_sizes):
+        if n_R == 0 or row_cost == 0:
+            continue
+        step = max(1, int(target // row_cost))
+        for r_start in range (0, n_R, step):
+            r_stop = min(r_start + step, n_R)
+            tiles.append ((b, r_start, r_stop, (r_stop - r_start) * row_cost))
+    return sorted (tiles, key = lambda x: x[3], reverse = True)
+
+##
+def classify_blocks_shm (blocks: list, gap_mark: str, pool: WorkerPool = None, tiles_per_worker: int = 4, per_block: bool = False, method: str = "pairwise", check: bool = False) -> list:
+    """
+    multiprocess version of classify_relations(..) over a list of (R, L) blocks, e.g., one per rank, run on one pool at once.
+    Forms of all blocks are int-encoded into one memory-mapped file (in /dev/shm if available) that workers read directly;
+    blocks are split into tiles by schedule_tiles(..), and workers return only index pairs, from which PatternLinks are rebuilt.
+    With per_block, each block is a task of its own instead, so ranks are classified in parallel but never split.
+    method is "pairwise" or "indexed", as classify_encoded_pairs(..) takes it.
+    Returns a list of link lists, one per block, each in the order classify_relations(..) gives.
+    IPC bytes and per-worker busy time are recorded on pool.
+    """
+    import os
+    import pickle
+    import tempfile
+    blocks = [ (sorted (R, key = lambda x: len(x)), sorted (L, key = lambda x: len(x))) for R, L in blocks ]
+    block_sizes = [ (len(R2), len(L2)) for R2, L2 in blocks ]
+    all_forms   = [ p for R2, L2 in blocks for p in R2 + L2 ]
+    if sum(n_R * n_L for n_R, n_L in block_sizes) == 0:
+        return [ [ ] for _ in blocks ]
+    ## encode and write forms
+    sizes, codes = encode_forms (all_forms, gap_mark)
+    width   = len(codes) // len(sizes)
+    ## an indexed lookup costs about one probe per segment of r, whatever the size of L
+    if method == "indexed":
+        block_costs = [ (n_R, width + 1 if n_L > 0 else 0) for n_R, n_L in block_sizes ]
+    else:
+        block_costs = block_sizes
+    offsets = [ ]
+    offset  = 0
+    for n_R, n_L in block_sizes:
+        offsets.append (offset)
+        offset += n_R + n_L
+    shm_dir = "/dev/shm" if os.path.isdir ("/dev/shm") else None
+    with tempfile.NamedTemporaryFile (prefix = "pyPLB-", suffix = ".forms", dir = shm_dir, delete = False) as f:
+        sizes.tofile (f)
+        codes.tofile (f)
+        path = f.name
+    ##
+    try:
+        with use_worker_pool (pool) as pool:
+            if per_block:
+                tiles = sorted ([ (b, 0, n_R, n_R * row_cost) for b, (n_R, row_cost) in enumerate (block_costs) if n_R * row_cost > 0 ], key = lambda x: x[3], reverse = True)
+            else:
+                tiles = schedule_tiles (block_costs, pool.n_workers, tiles_per_worker = tiles_per_worker)
+            tasks = [ (path, block_sizes[b][0], block_sizes[b][1], width, r_start, r_stop, offsets[b], len(all_forms), method) for b, r_start, r_stop, cost in tiles ]
+            ## chunksize 1 lets idle workers take the next tile
+            results = pool.starmap (classify_encoded_tile, tasks, chunksize = 1)
+            for pid, busy, pairs in results:
+                pool.record_busy (pid, busy)
+            ## rebuild links of each block in the order of r
+            found = [ [ ] for _ in blocks ]
+            for (b, r_start, r_stop, cost), (pid, busy, pairs) in zip (tiles, results):
+                found[b].append ((r_start, pairs))
+            selected_links = [ ]
+            for b, tile_results in enumerate (found):
+                R2, L2 = blocks[b]
+                links  = [ ]
+                for r_start, pairs in sorted (tile_results, key = lambda x: x[0]):
+                    for k in range (0, len(pairs), 2):
+                        links.append (PatternLink ((L2[pairs[k+1]], R2[pairs[k]])))
+                selected_links.append (links)
+            pool.record_ipc (sum(len(pickle.dumps(x)) for x in tasks) + sum(len(pickle.dumps(x)) for x in results), sum(len(x) for x in selected_links))
+    finally:
+        os.remove (path)
+    if check:
+        for links in selected_links:
+            for link in links:
+                print(f"#is-a:S; {link.left.form} <- {link.right.form}")
+    return selected_links
+
+##
+def classify_relations_shm (R, L, gap_mark: str, pool: WorkerPool = None, tiles_per_worker: int = 4, method: str = "pairwise", check: bool = False):
+    """
+    multiprocess version of classify_relations(..) that ships no Pattern to workers.
+    Forms are int-encoded into a memory-mapped file (in /dev/shm if available) that workers read directly;
+    tasks carry only the file path and a range of R, and workers return only index pairs,
+    from which PatternLinks are rebuilt in the order classify_relations(..) gives.
+    Bytes sent and received are recorded on pool.
+    """
+    return classify_blocks_shm ([ (R, L) ], gap_mark, pool = pool, tiles_per_worker = tiles_per_worker, method = method, check = check)[0]
+
 ##
 def classify_relations (R, L, check: bool = False):
     """
@@ -190,11 +397,11 @@ def classify_relations (R, L, check: bool = False):
     """
 
     sub_links = [ ]
-    seen      = [ ]
+    seen      = set()
     def register_link (link, sub_links = sub_links, seen = seen):
-        if len(link) > 0 and not link in sub_links and not link in seen:
+        if len(link) > 0 and not link in seen:
             sub_links.append (link)
-            seen.append (link)
+            seen.add (link)
     ##
     for r in sorted (R, key = lambda x: len(x)):
         for l in sorted (L, key = lambda x: len(x)):
@@ -254,19 +461,317 @@ def classify_relations (R, L, check: bool = False):
     return sub_links
 
 ##
-def draw_network (N: dict, layout: str, fig_size: tuple = None, node_size: int = None, label_size: int = None, label_sample_n: int = None, zscores: dict = None, use_robust_zscore: bool = False, zscore_lb = None, zscore_ub = None, scale_factor: float = 3, font_name: str = None, generalized: bool = True, test: bool = False, use_directed_graph: bool = True, reverse_direction: bool = False, mark_instances: bool = True, auto_figsize_adjust: bool = True, check: bool = False) -> None:
+def gen_parent_forms (form: tuple, gap_mark: str) -> list:
+    "takes a form and returns the forms of its possible parents in a single-source lattice"
+    gap = (gap_mark,)
+    ## the same-sized form with one more gap
+    R = [ form[:i] + gap + form[i+1:] for i, seg in enumerate (form) if seg != gap_mark ]
+    ## the form extended with a gap at either edge
+    R.append (form + gap)
+    R.append (gap + form)
+    return R
+
+##
+def classify_relations_by_construction (R, L, check: bool = False):
+    """
+    takes two lists of Patterns from a single-source lattice and returns the list of is-a cases,
+    deriving the parents of each r in R from its form instead of testing it against every l in L.
+    This gives the same links in the same order as classify_relations(..) does, provided that
+    all nodes come from a single source, where no content-based (is-a:T0) link can cross sources.
+    """
+    R2 = sorted (R, key = lambda x: len(x))
+    L2 = sorted (L, key = lambda x: len(x))
+    ## index of forms in L2, whose order determines the order of links
+    L_index = { l.form: i for i, l in enumerate (L2) }
+    ##
+    sub_links = [ ]
+    for r in R2:
+        gap_mark = r.gap_mark
+        found = set()
+        for form in gen_parent_forms (r.form, gap_mark):
+            try:
+                found.add (L_index[form])
+            except KeyError:
+                pass
+        for i in sorted (found):
+            l = L2[i]
+            if check:
+                print(f"#is-a:C; {l.form} <- {r.form}")
+            sub_links.append (PatternLink ((l, r)))
+    ##
+    return sub_links
+
+##
+class ParentIndex:
     """
-    draw layered graph under multi-partite setting
+    gap-signature index of a list of forms of L, which are candidate parents of patterns one rank up.
+    A parent l of r is either r with one more gap, found by the form of r with position i replaced by a gap,
+    or r extended with an edge gap, found by the form of l with the edge gap dropped.
+    One-gapped forms are also indexed by size for is-a:T0 tests, which are not positional.
+    Forms can be tuples of segments or of int codes, as long as gap_mark matches them.
     """
+    def __init__ (self, forms: list, gap_mark):
+        self.gap_mark   = gap_mark
+        self.forms      = forms
+        self.by_form    = { }
+        self.by_stem    = { }
+        self.one_gapped = { }
+        for i, form in enumerate (forms):
+            self.by_form[form] = i
+            if len(form) > 0 and form[-1] == gap_mark:
+                self.by_stem.setdefault (form[:-1], []).append (i)
+            if len(form) > 0 and form[0] == gap_mark:
+                self.by_stem.setdefault (form[1:], []).append (i)
+            if count_items (form, gap_mark) == 1:
+                self.one_gapped.setdefault (len(form), []).append (i)
 
-    #print(f"N with {len(N)} keys")
-    #for rank, links in N: print(f"{rank}:\n{links}")
+    ##
+    def lookup (self, form: tuple) -> list:
+        "returns the sorted indices of forms in L that form instantiates"
+        gap_mark = self.gap_mark
+        found    = set (self.by_stem.get (form, []))
+        if count_items (form, gap_mark) == 0:
+            ## is-a:T0 holds on inclusion of substance regardless of positions
+            for i in self.one_gapped.get (len(form), []):
+                if all(x in form for x in self.forms[i] if x != gap_mark):
+                    found.add (i)
+        else:
+            gap = (gap_mark,)
+            for i, seg in enumerate (form):
+                if seg != gap_mark:
+                    try:
+                        found.add (self.by_form[form[:i] + gap + form[i+1:]])
+                    except KeyError:
+                        pass
+        return sorted (found)
+
+##
+def classify_relations_indexed (R, L, check: bool = False):
+    """
+    takes two lists of Patterns and returns the list of is-a cases, looking up the candidate parents of each r in R
+    in a ParentIndex of L instead of testing it against every l in L.
+    This gives the same links in the same order as classify_relations(..) does, on merged lattices as well.
+    """
+    R2 = sorted (R, key = lambda x: len(x))
+    L2 = sorted (L, key = lambda x: len(x))
+    if len(L2) == 0:
+        return [ ]
+    index = ParentIndex ([ l.form for l in L2 ], gap_mark = L2[0].gap_mark)
+    ##
+    sub_links = [ ]
+    for r in R2:
+        for i in index.lookup (r.form):
+            l = L2[i]
+            if check:
+                print(f"#is-a:I; {l.form} <- {r.form}")
+            sub_links.append (PatternLink ((l, r)))
+    ##
+    return sub_links
+
+##
+def estimate_candidate_pairs (R, L, method: str, gap_mark: str) -> int:
+    """
+    takes a (R, L) block and returns the number of candidate pairs that classifying it by method tests:
+    |R| x |L| for "pairwise", and about one probe per segment of r, plus is-a:T0 tests of gapless r, for "construction" and "indexed"
+    """
+    if len(R) == 0 or len(L) == 0:
+        return 0
+    if method == "pairwise":
+        return len(R) * len(L)
+    probes = sum(len(r.form) + 1 for r in R)
+    if method == "indexed":
+        one_gapped = { }
+        for l in L:
+            if count_items (l.form, gap_mark) == 1:
+                one_gapped[len(l.form)] = one_gapped.get (len(l.form), 0) + 1
+        probes += sum(one_gapped.get (len(r.form), 0) for r in R if count_items (r.form, gap_mark) == 0)
+    return probes
+
+##
+class LinkPlanner:
+    """
+    chooses how to run link classification: "serial", on "thread"s, or on "process"es of a WorkerPool,
+    which can also take one task per rank as "ranks" mode, though that is run only when forced,
+    from the number of candidate pairs estimated for the blocks of all ranks.
+    thresholds[method][mode] is the least number of candidate pairs from which mode beats serial for method,
+    or None if it never does; calibrate_link_planner(..) measures them on the host and save(..) keeps them for later runs.
+    """
+    methods = ("construction", "indexed", "pairwise")
+    modes   = ("serial", "thread", "process", "ranks")
+    ## threads share the GIL, so they are never chosen until calibration shows otherwise
+    default_thresholds = {
+        "construction": { "thread": None, "process": 2_000_000 },
+        "indexed":      { "thread": None, "process": 2_000_000 },
+        "pairwise":     { "thread": None, "process":    50_000 },
+    }
+
+    def __init__ (self, thresholds: dict = None, calibrated_on: dict = None):
+        import copy
+        self.thresholds = copy.deepcopy (self.default_thresholds)
+        for method, limits in (thresholds or { }).items():
+            self.thresholds.setdefault (method, { }).update (limits)
+        self.calibrated_on = calibrated_on
+
+    ##
+    def __repr__ (self):
+        return f"{type(self).__name__} ({self.thresholds!r}; calibrated_on: {self.calibrated_on!r})"
+
+    ##
+    @staticmethod
+    def get_default_path () -> str:
+        "returns the file where thresholds are kept: $PYPLB_LINK_PLANNER, or ~/.pyPLB/link_planner.json"
+        import os
+        return os.environ.get ("PYPLB_LINK_PLANNER", os.path.join (os.path.expanduser ("~"), ".pyPLB", "link_planner.json"))
+
+    ##
+    @classmethod
+    def load (cls, path: str = None):
+        "returns a LinkPlanner with thresholds read from path, or with the default ones if there is no such file"
+        import json
+        if path is None:
+            path = cls.get_default_path ()
+        try:
+            with open (path) as f:
+                data = json.load (f)
+        except (OSError, ValueError):
+            return cls ()
+        return cls (thresholds = data.get ("thresholds"), calibrated_on = data.get ("calibrated_on"))
+
+    ##
+    def save (self, path: str = None) -> str:
+        "writes thresholds to path and returns it"
+        import os
+        import json
+        if path is None:
+            path = self.get_default_path ()
+        os.makedirs (os.path.dirname (os.path.abspath (path)), exist_ok = True)
+        with open (path, "w") as f:
+            json.dump ({ "thresholds": self.thresholds, "calibrated_on": self.calibrated_on }, f, indent = 2)
+        return path
+
+    ##
+    def choose (self, estimate: int, method: str, n_workers: int) -> str:
+        "returns the mode to run a method on estimate candidate pairs with n_workers"
+        if n_workers < 2:
+            return "serial"
+        limits = self.thresholds.get (method, { })
+        for mode in ("process", "thread"):
+            threshold = limits.get (mode)
+            if threshold is not None and estimate >= threshold:
+                return mode
+        return "serial"
+
+    ##
+    def plan (self, blocks: list, method: str, gap_mark: str, n_workers: int, execution: str = "auto") -> dict:
+        """
+        takes (R, L) blocks and returns a plan, a dict of mode, method, estimate, per-rank estimates and n_workers.
+        execution other than "auto" forces the mode.
+        """
+        per_rank = [ estimate_candidate_pairs (R, L, method, gap_mark) for R, L in blocks ]
+        estimate = sum(per_rank)
+        if execution == "auto":
+            mode = self.choose (estimate, method, n_workers)
+        elif execution in self.modes:
+            mode = execution
+        else:
+            raise ValueError (f"unknown execution: {execution}")
+        return { "mode": mode, "method": method, "estimate": estimate, "per_rank": per_rank, "n_workers": n_workers, "forced": execution != "auto" }
+
+    ##
+    @staticmethod
+    def describe (plan: dict) -> str:
+        "returns a line that logs a plan"
+        how = "forced" if plan["forced"] else "chosen"
+        return f"{plan['mode']} ({how}) for {plan['method']} links on {plan['estimate']} estimated candidate pairs with {plan['n_workers']} workers; per rank: {plan['per_rank']}"
 
+## the LinkPlanner used when none is given, loaded once per process
+_link_planner = None
+
+##
+def get_link_planner () -> LinkPlanner:
+    "returns the LinkPlanner loaded from LinkPlanner.get_default_path(), loading it at the first call"
+    global _link_planner
+    if _link_planner is None:
+        _link_planner = LinkPlanner.load ()
+    return _link_planner
+
+##
+def calibrate_link_planner (n_workers: int = None, source_size: int = 6, max_sources: int = 64, max_pairs: int = 2_000_000, repeat: int = 2, margin: float = 0.9, seed: int = 1, check: bool = False) -> LinkPlanner:
+    """
+    measures, on this host, from how many candidate pairs thread and process execution beat serial execution,
+    on single-source lattices of growing size for "construction" and on merged lattices of a growing number of
+    random sources for "indexed" and "pairwise", and returns a LinkPlanner with the thresholds found.
+    Pool startup is included in the time of process execution, since a run pays it once.
+    Each time is the best of repeat runs, and a mode beats serial if it takes less than margin times as long.
+    Workloads with more than max_pairs candidate pairs are not measured.
+    """
+    import os
+    import time
+    import random
+    import platform
+    import functools
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    rand     = random.Random (seed)
+    alphabet = "abcdefgh"
+    def random_source (size):
+        return [ rand.choice (alphabet) for _ in range (size) ]
+    ## workloads of growing size
+    workloads = { "construction": [ ], "indexed": [ ], "pairwise": [ ] }
+    for size in range (3, 2 * source_size + 1):
+        lattice = PatternLattice (Pattern (random_source (size), gap_mark = "_"), generalized = False)
+        workloads["construction"].append (lattice)
+    n_sources = 2
+    while n_sources <= max_sources:
+        lattices = [ PatternLattice (Pattern (random_source (source_size), gap_mark = "_"), generalized = False) for _ in range (n_sources) ]
+        params   = dict (gen_links_internally = False, use_mp = False, generalized = False, reflexive = True, reductive = True, check = False)
+        merged   = functools.reduce (lambda La, Lb: La.merge_lattices (Lb, **params), lattices)
+        workloads["indexed"].append (merged)
+        workloads["pairwise"].append (merged)
+        n_sources *= 2
+    ##
+    thresholds = { }
+    for method, lattices in workloads.items():
+        timings = [ ]
+        for lattice in lattices:
+            blocks   = lattice.gen_link_blocks (reflexive = True)
+            estimate = sum(estimate_candidate_pairs (R, L, method, lattice.gap_mark) for R, L in blocks)
+            if estimate > max_pairs:
+                break
+            spent = { }
+            for mode in ("serial", "thread", "process"):
+                for _ in range (repeat):
+                    with WorkerPool (n_workers) as pool:
+                        start = time.perf_counter()
+                        lattice.classify_link_blocks (blocks, method, mode, pool = pool)
+                        pool.close ()
+                        spent[mode] = min(spent.get (mode, float("inf")), time.perf_counter() - start)
+            if check:
+                print(f"#calibration: {method} on {estimate} candidate pairs: " + ", ".join (f"{mode} {t:.4f}s" for mode, t in spent.items()))
+            timings.append ((estimate, spent))
+        ## the least estimate from which a mode stays faster than serial
+        thresholds[method] = { }
+        for mode in ("thread", "process"):
+            threshold = None
+            for estimate, spent in reversed (timings):
+                if spent[mode] < margin * spent["serial"]:
+                    threshold = estimate
+                else:
+                    break
+            thresholds[method][mode] = threshold
+    calibrated_on = { "host": platform.node (), "n_workers": n_workers, "date": time.strftime ("%Y-%m-%d") }
+    return LinkPlanner (thresholds = thresholds, calibrated_on = calibrated_on)
+
+##
+def assemble_lattice_graph (N: dict, zscores: dict = None, zscore_lb = None, zscore_ub = None, use_directed_graph: bool = True, check: bool = False) -> tuple:
+    """
+    takes (rank, links) pairs and returns a triple of a networkx graph of the nodes and links left by z-score pruning,
+    the list of instances (nodes without gaps) in the order met, and the number of nodes pruned, for draw_network(..).
+    Links are scanned once, from the highest rank down: nodes go into L (rank) and R (rank + 1) and edges into E
+    as they did in draw_network(..), but lists are checked through sets, and the rank and the gap count of a form
+    are computed once. Nodes are added to the graph per rank, R before L, with the "rank" attribute of layers.
+    """
     import networkx as nx
-    import math
-    import matplotlib.pyplot as plt
-    from matplotlib import colormaps
-    #import seaborn as sns # dependency is removed on 2025/01/07
 
     ## define graph
     if use_directed_graph:
@@ -279,184 +784,174 @@ def draw_network (N: dict, layout: str, fig_size: tuple = None, node_size: int =
     except ValueError:
         rank_max = 3
     ##
-    node_dict = { }
-    instances = [ ] # register instances
+    if zscores is None:
+        zscores = { }
+    ranks, gap_counts = { }, { }
+    instances, instance_set = [ ], set()
     pruned_node_count = 0
+    edge = None
     for rank, links in sorted (N, reverse = True): # be careful on list up direction
         L, R, E = [], [], []
+        L_set, R_set, E_set = set(), set(), set()
         for link in links:
             if check:
                 print(f"#adding link at rank {rank}: {link}")
             ## process nodes
             gap_mark      = link.gap_mark
             node1, node2  = link.form_paired
-            node1_rank    = get_rank_of_list (node1, gap_mark)
-            node2_rank    = get_rank_of_list (node2, gap_mark)
-
-            ## register node for instances
-            if count_items (node1, gap_mark) == 0 and node1 not in instances:
-                instances.append (node1)
-            if count_items (node2, gap_mark) == 0 and node2 not in instances:
-                instances.append (node2)
+            for node in (node1, node2):
+                if node not in ranks:
+                    ranks[node]      = get_rank_of_list (node, gap_mark)
+                    gap_counts[node] = count_items (node, gap_mark)
+                ## register node for instances
+                if gap_counts[node] == 0 and node not in instance_set:
+                    instance_set.add (node)
+                    instances.append (node)
+            node1_rank, node2_rank = ranks[node1], ranks[node2]
 
             ## assign z-scores
-            try:
-                node1_zscore = zscores[node1]
-            except KeyError:
-                node1_zscore = 0
-            try:
-                node2_zscore = zscores[node2]
-            except KeyError:
-                node2_zscore = 0
+            node1_zscore = zscores.get (node1, 0)
+            node2_zscore = zscores.get (node2, 0)
 
-            ## add nodes
-            ## when lowerbound and upperbound z-score pruning is applied
+            ## add nodes, as draw_network(..) did, pruned or not
             if zscore_ub is not None and zscore_lb is not None: # z-score pruning
+                node1_kept = zscore_lb <= node1_zscore <= zscore_ub
+                node2_kept = zscore_lb <= node2_zscore <= zscore_ub
                 ## node1
-                if node1_zscore >= zscore_lb and node1_zscore <= zscore_ub and node1_rank == rank and not node1 in L:
-                    L.append (node1)
+                if node1_kept and node1_rank == rank and node1 not in L_set:
+                    L.append (node1); L_set.add (node1)
                 else:
                     print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
                     pruned_node_count += 1
                 ## node2
-                if node2_zscore >= zscore_lb and node2_zscore <= zscore_ub:
-                    if node2_rank == rank + 1 and not node2 in R:
-                        R.append (node2)
-                    elif not node2 in L:
-                        L.append (node2)
+                if node2_kept:
+                    if node2_rank == rank + 1 and node2 not in R_set:
+                        R.append (node2); R_set.add (node2)
+                    elif node2 not in L_set:
+                        L.append (node2); L_set.add (node2)
                 else:
                     print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
                     pruned_node_count += 1
-                ## process edges
-                if node1_zscore >= zscore_lb and node1_zscore <= zscore_ub and node2_zscore >= zscore_lb and node2_zscore <= zscore_ub:
-                    edge = (node1, node2)
-                    #edge = (node2, node1)
-                try:
-                    if edge and not edge in E:
-                        E.append (edge)
-                except UnboundLocalError:
-                    pass
-            ## when upperbound z-score pruning is applied
-            elif not zscore_ub is None: # z-score pruning
-                ## node1
-                if node1_zscore <= zscore_ub and not node1 in L:
-                    L.append (node1)
-                else:
-                    print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
-                    pruned_node_count += 1
-                ## node2
-                if node2_zscore <= zscore_ub and get_rank_of_list (node2, gap_mark) == rank and not node2 in R:
-                    R.append (node2)
-                elif node2_zscore <= zscore_ub and not node2 in L:
-                    R.append (node2)
+            elif zscore_ub is not None or zscore_lb is not None: # one-sided z-score pruning
+                if zscore_ub is not None:
+                    node1_kept = node1_zscore <= zscore_ub
+                    node2_kept = node2_zscore <= zscore_ub
                 else:
-                    print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
-                    pruned_node_count += 1
-                ## register instance nodes
-                if count_items (node2, gap_mark) == 0 and node2 not in instances:
-                    instances.append (node2)
-                ## process edges
-                if node1_zscore <= zscore_ub and node2_zscore <= zscore_ub:
-                    edge = (node1, node2)
-                try:
-                    if edge and not edge in E:
-                        E.append (edge)
-                except UnboundLocalError:
-                    pass
-            ## when lowerbound z-score pruning is applied
-            elif not zscore_lb is None: # z-score pruning applied
+                    node1_kept = node1_zscore >= zscore_lb
+                    node2_kept = node2_zscore >= zscore_lb
                 ## node1
-                if node1_zscore >= zscore_lb and not node1 in L:
-                    L.append (node1)
+                if node1_kept and node1 not in L_set:
+                    L.append (node1); L_set.add (node1)
                 else:
                     print(f"pruned node {node1} with z-score {node1_zscore: 0.4f}")
                     pruned_node_count += 1
-                ## node2
-                if node2_zscore >= zscore_lb and get_rank_of_list (node2, gap_mark) == rank and not node2 in R:
-                    R.append (node2)
-                elif node2_zscore >= zscore_lb and not node2 in L:
-                    R.append (node2)
+                ## node2 goes into R either way
+                if node2_kept and node2_rank == rank and node2 not in R_set:
+                    R.append (node2); R_set.add (node2)
+                elif node2_kept and node2 not in L_set:
+                    R.append (node2); R_set.add (node2)
                 else:
                     print(f"pruned node {node2} with z-score {node2_zscore: 0.4f}")
                     pruned_node_count += 1
-                ## process edges
-                if node1_zscore >= zscore_lb and node2_zscore >= zscore_lb:
-                    edge = (node1, node2)
-                try:
-                    if edge and not edge in E:
-                        E.append (edge)
-                except UnboundLocalError:
-                    pass
-            ## when z-score pruning not applied
-            else:
+            else: # z-score pruning not applied
+                node1_kept = node2_kept = True
                 ## node1
-                if node1_rank == rank and not node1 in L:
-                    L.append (node1)
+                if node1_rank == rank and node1 not in L_set:
+                    L.append (node1); L_set.add (node1)
                 ## node2
                 if node2_rank == rank + 1:
-                    if not node2 in R:
-                        R.append (node2)
-                elif node2_rank == rank and not node2 in L:
-                    L.append (node2)
-                ## process edges
-                if node1 and node2:
-                    edge = (node1, node2)
-                if edge and not edge in E:
-                    E.append (edge)
+                    if node2 not in R_set:
+                        R.append (node2); R_set.add (node2)
+                elif node2_rank == rank and node2 not in L_set:
+                    L.append (node2); L_set.add (node2)
+            ## process edges; a link pruned leaves the last edge kept, which is in E or the graph already
+            if node1_kept and node2_kept:
+                edge = (node1, node2)
+            if edge is not None and edge not in E_set:
+                E.append (edge); E_set.add (edge)
         ## L, R, E created
         ## populates nodes for G
-        ## forward rank scan = rank increments
-        #G.add_nodes_from (L, rank = rank)
-        #G.add_nodes_from (R, rank = rank + 1)
         ## backward rank scan = rank decrements
         G.add_nodes_from (R, rank = (rank_max - rank - 1))
         G.add_nodes_from (L, rank = (rank_max - rank))
-        #G.add_nodes_from (R, rank = rank + 1)
-        #G.add_nodes_from (L, rank = rank)
-
         ## populates edges for G
         G.add_edges_from (E)
+    ## nodes added through edges alone, e.g., the all-gap node when no link has rank 0, go to the layer of their rank
+    for node, layer in G.nodes (data = "rank"):
+        if layer is None:
+            G.nodes[node]["rank"] = rank_max - ranks[node]
+    ##
+    return G, instances, pruned_node_count
 
-    ## post-process for z-score pruning
-    print(f"#pruned {pruned_node_count} nodes")
-
-    ## node color setting
-    if mark_instances:
-        padding_val = 0.25
-    else:
-        padding_val = 0
-    values_for_color = []
-    for node in G:
-        ## process for mark_instances
-        if node in instances:
-            values_for_color.append (0)
-        else:
-            try:
-                z_value = zscores[node]
-                if check:
-                    print(f"#z_value: {z_value: 0.4f}")
-                z_normalized = normalize_zscore(z_value, use_robust_zscore = use_robust_zscore)
-                if check:
-                    print(f"#z_normalized: {z_normalized: 0.4f}")
-                values_for_color.append (z_normalized + padding_val)
-            except KeyError:
-                # normalized value falls between 0 and 1.0
-                values_for_color.append (0.5 + padding_val)
+##
+def layered_layout (G, subset_key: str = "rank", sweeps: int = 4, scale: float = 1) -> dict:
+    """
+    takes a graph whose nodes have a layer in subset_key, e.g., one made by assemble_lattice_graph(..), and returns
+    positions of nodes, with layers placed from left to right as nx.multipartite_layout(..) does, but each layer ordered
+    to reduce edge crossings by sweeps of the barycenter heuristic, down and up the layers, with NumPy arrays:
+    a node moves to the mean position of its neighbors in the layer just visited, ties kept in the current order.
+    """
+    import numpy as np
+    import networkx as nx
 
-    ## relabeling nodes: this needs to come after color setting
-    new_labels = { x: as_label(x, sep = " ", add_sep_at_end = True) for x in G }
-    G = nx.relabel_nodes (G, new_labels, copy = False)
+    nodes = list(G)
+    if len(nodes) == 0:
+        return { }
+    node_ids = { node: i for i, node in enumerate(nodes) }
+    n = len(nodes)
+    ## layers, numbered from 0
+    layer_values = np.array([ G.nodes[node][subset_key] for node in nodes ])
+    _, layers = np.unique (layer_values, return_inverse = True)
+    layers = layers.reshape (-1)
+    n_layers = int(layers.max()) + 1
+    members = [ np.flatnonzero (layers == k) for k in range (n_layers) ] # in insertion order
+    ## edges in both directions
+    edges = np.array([ (node_ids[u], node_ids[v]) for u, v in G.edges() ], dtype = np.int64).reshape (-1, 2)
+    sources = np.concatenate ([ edges[:,0], edges[:,1] ])
+    targets = np.concatenate ([ edges[:,1], edges[:,0] ])
+    ## edges into each layer from the layer before it and from the layer after it
+    source_layers, target_layers = layers[sources], layers[targets]
+    from_before = { k: np.flatnonzero ((target_layers == k) & (source_layers == k - 1)) for k in range (1, n_layers) }
+    from_after  = { k: np.flatnonzero ((target_layers == k) & (source_layers == k + 1)) for k in range (n_layers - 1) }
+    ## positions in layers, centered
+    positions = np.zeros (n)
+    for group in members:
+        positions[group] = np.arange (len(group)) - (len(group) - 1) / 2
+    ##
+    def order_layer (k: int, selected):
+        "reorders layer k by barycenters of the sources of selected edges into it"
+        s, t = sources[selected], targets[selected]
+        group = members[k]
+        degrees = np.bincount (t, minlength = n)[group]
+        sums = np.bincount (t, weights = positions[s], minlength = n)[group]
+        barycenters = np.where (degrees > 0, sums / np.maximum (degrees, 1), positions[group])
+        order = np.lexsort ((positions[group], barycenters))
+        positions[group[order]] = np.arange (len(group)) - (len(group) - 1) / 2
+    ##
+    for _ in range (sweeps):
+        for k in range (1, n_layers):
+            order_layer (k, from_before[k])
+        for k in range (n_layers - 2, -1, -1):
+            order_layer (k, from_after[k])
+    ##
+    pos = np.column_stack ([ layers.astype (float), positions ])
+    pos = nx.rescale_layout (pos, scale = scale)
+    return dict (zip (nodes, pos))
 
-    ## set positions
-    #if use_pyGraphviz:
-    #    nx.nx_agraph.view_pygraphviz(G, prog = 'fdp')
-    #else:
-    ## select layout
+##
+def compute_layout (G, layout: str, scale_factor: float = 3) -> tuple:
+    "returns a pair of the name of a layout selected by layout and the positions of nodes of G under it"
+    import networkx as nx
+    ##
     if layout in [ 'Multipartite', 'Multi_partite', 'multi_partite', 'M', 'MP', 'mp' ]:
         layout_name = "Multi-partite"
         ## scale parameter suddenly gets crucial on 2024/10/30
         positions   = nx.multipartite_layout (G, subset_key = "rank", scale = -1)
     ##
+    elif layout in [ 'Layered', 'layered', 'Ly' ]:
+        layout_name = "Layered"
+        positions   = layered_layout (G, subset_key = "rank", scale = -1)
+    ##
     elif layout in [ 'Graphviz', 'graphviz', 'G' ] :
         layout_name = "Graphviz"
         positions   = nx.nx_pydot.graphviz_layout(G, prog = 'fdp')
@@ -501,91 +996,294 @@ def draw_network (N: dict, layout: str, fig_size: tuple = None, node_size: int =
         print(f"Layout is unknown: Multi-partite (default) is used")
         layout_name = "Multi-partite"
         positions   = nx.multipartite_layout (G, subset_key = "rank", scale = -1)
+    ##
+    return layout_name, positions
 
-    ### draw
-    ## set connection
-    if layout_name == "Multi-partite":
-        connectionstyle = "arc, angleA=0, angleB=180, armA=50, armB=50, rad=15"
-    else:
-        connectionstyle = "arc"
+##
+class LayoutCache:
+    """
+    keeps positions computed by compute_layout(..), keyed by a hash of the structure of a graph, the set of nodes
+    with their layers and the set of edges, and the layout parameters, so that a diagram drawn again with other
+    colors or z-score bounds reuses them. Positions are kept in memory, up to max_entries, and, if cache_dir is given,
+    in files there, one per key, for later runs.
+    """
+    def __init__ (self, cache_dir: str = None, max_entries: int = 32):
+        self.cache_dir   = cache_dir
+        self.max_entries = max_entries
+        self.entries     = { } # in the order of use
+        self.hits        = 0
+        self.misses      = 0
 
-    ## set colormap
-    my_cmap = colormaps['coolwarm']
-    ## The following requires Seaborn and made obsolete
-    #my_cmap = sns.color_palette("coolwarm", 24, as_cmap = True) # Crucially, as_cmap
+    ##
+    def __repr__ (self):
+        return f"{type(self).__name__} ({len(self.entries)} entries; hits: {self.hits}; misses: {self.misses}; cache_dir: {self.cache_dir})"
 
-    ## set figure size
-    n_items = len(instances)
-    print(f"#n_items: {n_items}")
-    max_item_size = max([ len(list(x)) for x in instances ])
-    print(f"#max_item_size: {max_item_size}")
-    max_n_segs = max([ len(x) for x in instances ])
-    print(f"#max_n_segs: {max_n_segs}")
-    if fig_size is None:
-        if auto_figsize_adjust:
-            #graph_width   = max_item_size + 4 + round (9 * math.log(1 + n_items))
-            #graph_height  = 3 + round (9 * max_n_segs)
-            if generalized:
-                width_step = 5
-                height_step = 5
-            else:
-                width_step = 2
-                height_step = 2
-            graph_width   = max_item_size + 3 + round (width_step * math.log(1 + n_items))
-            graph_height  = 3 + round (height_step * max_n_segs)
-            fig_size = (graph_width, graph_height)
-        else:
-            fig_size = (10, 8) # default value
-    print(f"#fig_size: {fig_size}")
-    plt.figure(figsize = fig_size)
+    ##
+    @staticmethod
+    def get_default_dir () -> str:
+        "returns the directory where positions are kept: $PYPLB_LAYOUT_CACHE, or ~/.pyPLB/layouts"
+        import os
+        return os.environ.get ("PYPLB_LAYOUT_CACHE", os.path.join (os.path.expanduser ("~"), ".pyPLB", "layouts"))
 
-    ## set label size
-    if label_size is None:
-        if auto_figsize_adjust:
-            label_size = 4 + round(3 * math.log(1 + n_items))
-        else:
-            label_size = 6 # default value
-    print(f"#label_size: {label_size}")
+    ##
+    @staticmethod
+    def make_key (G, **params) -> str:
+        "returns a hash of the nodes with their layers, the edges and params, independent of the order of nodes and edges"
+        import hashlib
+        h = hashlib.sha1 ()
+        h.update (repr (sorted ((repr(node), repr(layer)) for node, layer in G.nodes (data = "rank"))).encode ())
+        h.update (repr (sorted ((repr(u), repr(v)) for u, v in G.edges ())).encode ())
+        h.update (repr ((G.is_directed (), sorted (params.items ()))).encode ())
+        return h.hexdigest ()
 
-    ## set node size
-    if node_size is None:
-        if auto_figsize_adjust:
-            node_size = 5 + round(3 * math.log (1 + n_items))
-        else:
-            node_size = 7 # default value
-    print(f"#node_size: {node_size}")
+    ##
+    def get_path (self, key: str) -> str:
+        import os
+        return os.path.join (self.cache_dir, f"{key}.pkl")
 
-    ## set font name
-    if font_name is None:
-        font_family = "Sans-serif" # default value
-    else:
-        font_family = font_name
+    ##
+    def get (self, key: str):
+        "returns the (layout_name, positions) pair kept for key, or None"
+        if key in self.entries:
+            self.entries[key] = self.entries.pop (key)
+            return self.entries[key]
+        if self.cache_dir is not None:
+            import pickle
+            try:
+                with open (self.get_path (key), "rb") as f:
+                    entry = pickle.load (f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                return None
+            self.put (key, entry, save = False)
+            return entry
+        return None
 
-    ## revserse the arrows
-    if use_directed_graph and reverse_direction:
-        G = G.reverse(copy = False) # offensive?
+    ##
+    def put (self, key: str, entry: tuple, save: bool = True) -> None:
+        "keeps a (layout_name, positions) pair for key, dropping the least recently used one beyond max_entries"
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+        if save and self.cache_dir is not None:
+            import os
+            import pickle
+            os.makedirs (self.cache_dir, exist_ok = True)
+            path = self.get_path (key)
+            with open (f"{path}.tmp", "wb") as f:
+                pickle.dump (entry, f)
+            os.replace (f"{path}.tmp", path) # readers never see a partial file
 
-    ## finally draw
-    nx.draw_networkx (G, positions,
-        font_family = font_family,
-        font_color = 'darkblue', # label font color
-        verticalalignment = "top", # verticalalignment = "bottom",
-        horizontalalignment = "left", # horizontalalignment = "right",
-        min_source_margin = 12, min_target_margin = 12,
-        font_size = label_size, node_size = node_size,
-        node_color = values_for_color, cmap = my_cmap,
-        edge_color = 'gray', width = 0.1, arrowsize = 6,
-        arrows = True, connectionstyle = connectionstyle,
-    )
+    ##
+    def get_layout (self, G, layout: str, scale_factor: float = 3) -> tuple:
+        "returns a pair of the name of a layout and positions of nodes of G, from the cache or computed by compute_layout(..)"
+        key = self.make_key (G, layout = layout, scale_factor = scale_factor)
+        entry = self.get (key)
+        if entry is None:
+            self.misses += 1
+            entry = compute_layout (G, layout, scale_factor = scale_factor)
+            self.put (key, entry)
+        else:
+            self.hits += 1
+        return entry
 
-    ## set labels used in title
-    instance_labels = [ as_label (x, sep = ",") for x in instances ]
-    label_count = len (instance_labels)
-    if label_sample_n is not None and label_count > label_sample_n:
-        new_instance_labels = instance_labels[:label_sample_n - 1]
-        new_instance_labels.append("…")
-        new_instance_labels.append(instance_labels[-1])
-        instance_labels = new_instance_labels
+##
+def draw_lattice_collections (G, positions: dict, node_color: list, cmap, node_size: int, label_size: int, font_family: str, arcs: bool = True, ax = None) -> None:
+    """
+    draws G with all edges in one LineCollection and all nodes in one scatter, for graphs too large for nx.draw_networkx(..),
+    which makes a patch per edge. With arcs, edges are polylines that leave and enter nodes horizontally, after the
+    connectionstyle of layered layouts, and straight lines otherwise. Nodes are colored and labeled as nx.draw_networkx(..)
+    does, but edges have no arrowheads.
+    """
+    import numpy as np
+    import networkx as nx
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    if ax is None:
+        ax = plt.gca()
+    ## edges
+    edges = list(G.edges())
+    if len(edges) > 0:
+        starts = np.array([ positions[u] for u, _ in edges ], dtype = float)
+        ends   = np.array([ positions[v] for _, v in edges ], dtype = float)
+        if arcs:
+            arms = 0.25 * (ends[:,0] - starts[:,0])
+            bend_out, bend_in = starts.copy(), ends.copy()
+            bend_out[:,0] += arms
+            bend_in[:,0]  -= arms
+            segments = np.stack ([ starts, bend_out, bend_in, ends ], axis = 1)
+        else:
+            segments = np.stack ([ starts, ends ], axis = 1)
+        ax.add_collection (LineCollection (segments, colors = 'gray', linewidths = 0.1, zorder = 1))
+    ## nodes
+    nodes = list(G)
+    xy = np.array([ positions[node] for node in nodes ], dtype = float).reshape (-1, 2)
+    ax.scatter (xy[:,0], xy[:,1], s = node_size, c = node_color, cmap = cmap, zorder = 2)
+    ## labels
+    nx.draw_networkx_labels (G, positions, ax = ax, font_size = label_size, font_family = font_family, font_color = 'darkblue', verticalalignment = "top", horizontalalignment = "left")
+    ##
+    ax.autoscale_view ()
+    ax.tick_params (axis = "both", which = "both", bottom = False, left = False, labelbottom = False, labelleft = False)
+
+##
+def draw_network (N: dict, layout: str, fig_size: tuple = None, node_size: int = None, label_size: int = None, label_sample_n: int = None, zscores: dict = None, use_robust_zscore: bool = False, zscore_lb = None, zscore_ub = None, scale_factor: float = 3, font_name: str = None, generalized: bool = True, test: bool = False, use_directed_graph: bool = True, reverse_direction: bool = False, mark_instances: bool = True, auto_figsize_adjust: bool = True, output_files: list = None, collection_threshold: int = 2000, layout_cache = None, check: bool = False) -> list:
+    """
+    draw layered graph under multi-partite setting.
+    With layout_cache, a LayoutCache, positions are laid out on the graph without z-score pruning and reused.
+    Graphs with more edges than collection_threshold are drawn by draw_lattice_collections(..) instead of nx.draw_networkx(..).
+    With output_files, the figure is saved to each of the files, in the format their extensions tell, and closed
+    instead of shown, which works under a non-interactive backend, e.g., Agg; the files are returned.
+    """
+
+    #print(f"N with {len(N)} keys")
+    #for rank, links in N: print(f"{rank}:\n{links}")
+
+    import networkx as nx
+    import math
+    import matplotlib.pyplot as plt
+    from matplotlib import colormaps
+    #import seaborn as sns # dependency is removed on 2025/01/07
+
+    ## assemble graph
+    G, instances, pruned_node_count = assemble_lattice_graph (N, zscores = zscores, zscore_lb = zscore_lb, zscore_ub = zscore_ub, use_directed_graph = use_directed_graph, check = check)
+
+    ## post-process for z-score pruning
+    print(f"#pruned {pruned_node_count} nodes")
+
+    ## node color setting
+    if mark_instances:
+        padding_val = 0.25
+    else:
+        padding_val = 0
+    values_for_color = []
+    instance_set = set(instances)
+    for node in G:
+        ## process for mark_instances
+        if node in instance_set:
+            values_for_color.append (0)
+        else:
+            try:
+                z_value = zscores[node]
+                if check:
+                    print(f"#z_value: {z_value: 0.4f}")
+                z_normalized = normalize_zscore(z_value, use_robust_zscore = use_robust_zscore)
+                if check:
+                    print(f"#z_normalized: {z_normalized: 0.4f}")
+                values_for_color.append (z_normalized + padding_val)
+            except KeyError:
+                # normalized value falls between 0 and 1.0
+                values_for_color.append (0.5 + padding_val)
+
+    ## relabeling nodes: this needs to come after color setting
+    new_labels = { x: as_label(x, sep = " ", add_sep_at_end = True) for x in G }
+    G = nx.relabel_nodes (G, new_labels, copy = False)
+
+    ## set positions
+    #if use_pyGraphviz:
+    #    nx.nx_agraph.view_pygraphviz(G, prog = 'fdp')
+    #else:
+    ## select layout
+    if layout_cache is None:
+        layout_name, positions = compute_layout (G, layout, scale_factor = scale_factor)
+    else:
+        ## positions come from the graph without pruning, so that they do not change with z-score bounds
+        if zscore_lb is None and zscore_ub is None:
+            G_full = G
+        else:
+            G_full, _, _ = assemble_lattice_graph (N, use_directed_graph = use_directed_graph)
+            G_full = nx.relabel_nodes (G_full, { x: as_label(x, sep = " ", add_sep_at_end = True) for x in G_full }, copy = False)
+        layout_name, positions = layout_cache.get_layout (G_full, layout, scale_factor = scale_factor)
+        positions = { node: positions[node] for node in G }
+        print(f"#layout cache: {layout_cache}")
+
+    ### draw
+    ## set connection
+    if layout_name in [ "Multi-partite", "Layered" ]:
+        connectionstyle = "arc, angleA=0, angleB=180, armA=50, armB=50, rad=15"
+    else:
+        connectionstyle = "arc"
+
+    ## set colormap
+    my_cmap = colormaps['coolwarm']
+    ## The following requires Seaborn and made obsolete
+    #my_cmap = sns.color_palette("coolwarm", 24, as_cmap = True) # Crucially, as_cmap
+
+    ## set figure size
+    n_items = len(instances)
+    print(f"#n_items: {n_items}")
+    max_item_size = max([ len(list(x)) for x in instances ])
+    print(f"#max_item_size: {max_item_size}")
+    max_n_segs = max([ len(x) for x in instances ])
+    print(f"#max_n_segs: {max_n_segs}")
+    if fig_size is None:
+        if auto_figsize_adjust:
+            #graph_width   = max_item_size + 4 + round (9 * math.log(1 + n_items))
+            #graph_height  = 3 + round (9 * max_n_segs)
+            if generalized:
+                width_step = 5
+                height_step = 5
+            else:
+                width_step = 2
+                height_step = 2
+            graph_width   = max_item_size + 3 + round (width_step * math.log(1 + n_items))
+            graph_height  = 3 + round (height_step * max_n_segs)
+            fig_size = (graph_width, graph_height)
+        else:
+            fig_size = (10, 8) # default value
+    print(f"#fig_size: {fig_size}")
+    plt.figure(figsize = fig_size)
+
+    ## set label size
+    if label_size is None:
+        if auto_figsize_adjust:
+            label_size = 4 + round(3 * math.log(1 + n_items))
+        else:
+            label_size = 6 # default value
+    print(f"#label_size: {label_size}")
+
+    ## set node size
+    if node_size is None:
+        if auto_figsize_adjust:
+            node_size = 5 + round(3 * math.log (1 + n_items))
+        else:
+            node_size = 7 # default value
+    print(f"#node_size: {node_size}")
+
+    ## set font name
+    if font_name is None:
+        font_family = "Sans-serif" # default value
+    else:
+        font_family = font_name
+
+    ## revserse the arrows
+    if use_directed_graph and reverse_direction:
+        G = G.reverse(copy = False) # offensive?
+
+    ## finally draw
+    if collection_threshold is not None and G.number_of_edges() > collection_threshold:
+        print(f"#drawing {G.number_of_edges()} edges in a collection")
+        draw_lattice_collections (G, positions, node_color = values_for_color, cmap = my_cmap, node_size = node_size, label_size = label_size, font_family = font_family, arcs = layout_name in [ "Multi-partite", "Layered" ])
+    else:
+        nx.draw_networkx (G, positions,
+            font_family = font_family,
+            font_color = 'darkblue', # label font color
+            verticalalignment = "top", # verticalalignment = "bottom",
+            horizontalalignment = "left", # horizontalalignment = "right",
+            min_source_margin = 12, min_target_margin = 12,
+            font_size = label_size, node_size = node_size,
+            node_color = values_for_color, cmap = my_cmap,
+            edge_color = 'gray', width = 0.1, arrowsize = 6,
+            arrows = True, connectionstyle = connectionstyle,
+        )
+
+    ## set labels used in title
+    instance_labels = [ as_label (x, sep = ",") for x in instances ]
+    label_count = len (instance_labels)
+    if label_sample_n is not None and label_count > label_sample_n:
+        new_instance_labels = instance_labels[:label_sample_n - 1]
+        new_instance_labels.append("…")
+        new_instance_labels.append(instance_labels[-1])
+        instance_labels = new_instance_labels
     print(f"#instance_labels {label_count}: {instance_labels}")
 
     ### set title
@@ -601,7 +1299,64 @@ def draw_network (N: dict, layout: str, fig_size: tuple = None, node_size: int =
             title_val = f"PatternLattice (layout: {layout_name}; normal z-scores: {zscore_lb} – {zscore_ub}) built from\n{instance_labels} ({label_count} in all)"
     plt.title(title_val)
     ##
+    if output_files:
+        figure = plt.gcf() # plt.savefig(..) would draw the figure once more after saving it
+        for output_file in output_files:
+            figure.savefig (output_file)
+            print(f"#saved {output_file}")
+        plt.close ()
+        return list(output_files)
+    ##
     plt.show()
+    return [ ]
+
+##
+def make_figure_stem (index: int, lattice, prefix: str = "lattice") -> str:
+    "returns a file name without extension for the diagram of the index-th lattice, from its index and the form of its origin"
+    import re
+    try:
+        label = as_label (lattice.origin.form, sep = "-")
+    except AttributeError:
+        label = ""
+    label = re.sub (r"[^\w-]+", "_", label)[:48]
+    if len(label) > 0:
+        return f"{prefix}{index:03d}_{label}"
+    return f"{prefix}{index:03d}"
+
+##
+def render_diagram_to_files (lattice, output_files: list, params: dict) -> tuple:
+    "draws the diagram of a lattice into output_files under the Agg backend and returns a pair of the files and the seconds spent"
+    import time
+    import matplotlib
+    matplotlib.use ("Agg") # no display is needed
+    start = time.perf_counter()
+    output_files = lattice.draw_diagrams (output_files = output_files, **params)
+    return output_files, time.perf_counter() - start
+
+##
+def render_lattices (lattices: list, output_dir: str, formats: list = ("png",), prefix: str = "lattice", pool = None, check: bool = False, **params) -> list:
+    """
+    draws the diagrams of lattices into files in output_dir without a display, one file per format, e.g., png, svg, pdf,
+    with names made by make_figure_stem(..) from the index (from 1) and the origin of each lattice, and returns a list of
+    pairs of the files and the seconds spent per lattice. Lattices are drawn in the workers of pool, a WorkerPool,
+    if given and there are more than one, and one after another otherwise. params go to draw_diagrams(..).
+    """
+    import os
+    os.makedirs (output_dir, exist_ok = True)
+    tasks = [ ]
+    for i, lattice in enumerate(lattices):
+        stem = make_figure_stem (i + 1, lattice, prefix = prefix)
+        tasks.append ((lattice, [ os.path.join (output_dir, f"{stem}.{fmt}") for fmt in formats ], params))
+    ##
+    if pool is not None and len(tasks) > 1:
+        results = pool.starmap (render_diagram_to_files, tasks)
+    else:
+        results = [ render_diagram_to_files (*task) for task in tasks ]
+    ##
+    if check:
+        for output_files, spent in results:
+            print(f"#rendered {output_files} in {spent:.3f}s")
+    return results
 
 ##
 def make_ranked_dict (L: list, gap_mark: str) -> dict:
@@ -621,27 +1376,30 @@ def make_ranked_dict (L: list, gap_mark: str) -> dict:
 def make_links_ranked (L: list, safe: bool = False, check: bool = False) -> list:
     "takes a list of PatternLinks and returns a dictionary of {rank: [link1, link2, ...]}"
     ranked_links = {}
+    seen         = set()
     if safe:
         for link in L:
             if check:
                 print(f"type(link): {type(link)}")
             try:
                 rank = link.get_link_rank ()
-                try:
-                    if not link in ranked_links[rank]:
+                if not link in seen:
+                    seen.add (link)
+                    try:
                         ranked_links[rank].append(link)
-                except KeyError:
-                    ranked_links[rank] = [link]
+                    except KeyError:
+                        ranked_links[rank] = [link]
             except AttributeError:
                 print (f"failed link: {link}")
     else:
         for link in L:
             rank = link.get_link_rank ()
-            try:
-                if not link in ranked_links[rank]:
+            if not link in seen:
+                seen.add (link)
+                try:
                     ranked_links[rank].append(link)
-            except KeyError:
-                ranked_links[rank] = [link]
+                except KeyError:
+                    ranked_links[rank] = [link]
     ##
     return ranked_links
 
@@ -776,33 +1534,86 @@ def normalize_zscore (x: float, use_robust_zscore: bool = False, min_val: float
     normalizer = colors.Normalize (vmin = min_val, vmax = max_val)
     return normalizer (x)
 
+##
+def calc_group_medians (values, starts, counts):
+    "takes values sorted within groups, and the starts and sizes of groups, and returns the medians of groups as np.median(..) does"
+    lower = starts + (counts - 1) // 2
+    upper = starts + counts // 2
+    return (values[lower] + values[upper]) / 2
+
+##
+def calc_zscores_by_group (values, groups) -> tuple:
+    """
+    takes arrays of values and of the groups they belong to, and returns a pair of arrays of plain and robust z-scores
+    of values against the mean, stdev, median and MAD of their groups, as calc_zscore(..) gives them from
+    calc_averages_by_rank(..), calc_stdevs_by_rank(..), calc_medians_by_rank(..) and calc_MADs_by_rank(..).
+    All groups are done at once: values are sorted by group once for medians and once for MADs.
+    """
+    import numpy as np
+    robust_coeff = 0.6745
+    values = np.asarray (values, dtype = float)
+    _, group_of, counts = np.unique (groups, return_inverse = True, return_counts = True)
+    group_of = group_of.reshape (-1)
+    starts   = np.concatenate (([ 0 ], np.cumsum (counts)[:-1]))
+    ## mean and population stdev, as np.std(..) gives
+    means    = np.bincount (group_of, weights = values, minlength = len(counts)) / counts
+    devs     = values - means[group_of]
+    stdevs   = np.sqrt (np.bincount (group_of, weights = devs * devs, minlength = len(counts)) / counts)
+    ## median and median absolute deviation
+    medians  = calc_group_medians (values[np.lexsort ((values, group_of))], starts, counts)
+    abs_devs = np.abs (values - medians[group_of])
+    MADs     = calc_group_medians (abs_devs[np.lexsort ((abs_devs, group_of))], starts, counts)
+    ## z-scores are 0 in groups with no spread
+    flat     = (stdevs == 0) | (MADs == 0)
+    with np.errstate (divide = 'ignore', invalid = 'ignore'):
+        plain  = np.where (flat[group_of], 0.0, devs / stdevs[group_of])
+        robust = np.where (flat[group_of], 0.0, robust_coeff * (values - medians[group_of]) / MADs[group_of])
+    return plain, robust
+
+##
+def calc_zscores_by_rank (link_dict: dict, gap_mark: str, ranks: set = None) -> tuple:
+    """
+    takes a dict of link counts of forms, and returns a pair of dicts of plain and robust z-scores of the forms
+    against the counts of forms of the same rank, computed by calc_zscores_by_group(..).
+    If ranks are given, only forms of those ranks are scored.
+    """
+    import numpy as np
+    members = [ ]
+    member_ranks = [ ]
+    for member in link_dict:
+        ## the count of get_rank_of_list(..), of segments neither gaps nor empty, by tuple.count
+        rank = len(member) - member.count (gap_mark) - member.count ("")
+        if ranks is None or rank in ranks:
+            members.append (member)
+            member_ranks.append (rank)
+    if len(members) == 0:
+        return {}, {}
+    values = np.fromiter ((link_dict[m] for m in members), dtype = float, count = len(members))
+    plain, robust = calc_zscores_by_group (values, np.array (member_ranks))
+    return dict (zip (members, plain.tolist ())), dict (zip (members, robust.tolist ()))
+
 ##
 def gen_zscores_from_sources (M, gap_mark: str, use_robust_zscore: bool, check: bool = False):
     ## adding link source z-scores to M
     Link_sources     = M.link_sources
     if check:
         print(f"##Link_sources")
-    ranked_links     = make_ranked_dict (Link_sources, gap_mark = gap_mark)
-    averages_by_rank = calc_averages_by_rank (Link_sources, ranked_links) # returns dict
-    stdevs_by_rank   = calc_stdevs_by_rank (Link_sources, ranked_links) # returns dict
-    medians_by_rank  = calc_medians_by_rank (Link_sources, ranked_links) # returns dict
-    MADs_by_rank     = calc_MADs_by_rank (Link_sources, ranked_links) # returns dict
-
-    source_zscores = {}
-    for i, link_source in enumerate (Link_sources):
-        value  = Link_sources[link_source]
-        rank   = get_rank_of_list (link_source, gap_mark = gap_mark)
-        if use_robust_zscore:
-            zscore = calc_zscore (value, averages_by_rank[rank], stdevs_by_rank[rank], medians_by_rank[rank], MADs_by_rank[rank], robust = True)
-        else:
-            zscore = calc_zscore (value, averages_by_rank[rank], stdevs_by_rank[rank], medians_by_rank[rank], MADs_by_rank[rank], robust = False)
-        ##
-        source_zscores[link_source] = zscore
-        if check:
-            print(f"#source {i:3d}: {link_source} has {value} out-going link(s) [{source_zscores[link_source]: .4f} at rank {rank}]")
-
-    ## attach source_zscores to M
+    plain_zscores, robust_zscores = calc_zscores_by_rank (Link_sources, gap_mark = gap_mark)
+    if use_robust_zscore:
+        source_zscores = robust_zscores
+    else:
+        source_zscores = plain_zscores
+    if check:
+        for i, link_source in enumerate (Link_sources):
+            rank = get_rank_of_list (link_source, gap_mark = gap_mark)
+            print(f"#source {i:3d}: {link_source} has {Link_sources[link_source]} out-going link(s) [{source_zscores[link_source]: .4f} at rank {rank}]")
+
+    ## attach source_zscores to M, in place of streamed ones
+    if getattr (M, 'zscore_streams', None) is not None:
+        M.zscore_streams = None
+        M.source_zscores, M.target_zscores = dict (M.source_zscores), dict (M.target_zscores)
     M.source_zscores.update(source_zscores)
+    M.robust_zscores = use_robust_zscore
     if check:
         print(f"M.source_zscores: {M.source_zscores}")
     ##
@@ -813,51 +1624,851 @@ def gen_zscores_from_targets (M, gap_mark: str, use_robust_zscore: bool, check:
     Link_targets     = M.link_targets
     if check:
         print(f"##Link_targets")
-    ranked_links     = make_ranked_dict (Link_targets, gap_mark = gap_mark)
-    averages_by_rank = calc_averages_by_rank (Link_targets, ranked_links) # returns dict
-    stdevs_by_rank   = calc_stdevs_by_rank (Link_targets, ranked_links) # returns dict
-    medians_by_rank  = calc_medians_by_rank (Link_targets, ranked_links) # returns dict
-    MADs_by_rank     = calc_MADs_by_rank (Link_targets, ranked_links) # returns dict
-
-    target_zscores = {}
-    for i, link_target in enumerate(Link_targets):
-        value  = Link_targets[link_target]
-        rank   = get_rank_of_list (link_target, gap_mark = gap_mark)
-        if use_robust_zscore:
-            zscore = calc_zscore (value, averages_by_rank[rank], stdevs_by_rank[rank], medians_by_rank[rank], MADs_by_rank[rank], robust = True)
-        else:
-            zscore = calc_zscore (value, averages_by_rank[rank], stdevs_by_rank[rank], medians_by_rank[rank], MADs_by_rank[rank], robust = False)
-        target_zscores[link_target] = zscore
-        if check:
-            print(f"#target {i:3d}: {link_target} has {value} in-coming link(s) [{target_zscores[link_target]: .4f} at rank {rank}]")
-
-    ## attach source_zscores to M
+    plain_zscores, robust_zscores = calc_zscores_by_rank (Link_targets, gap_mark = gap_mark)
+    if use_robust_zscore:
+        target_zscores = robust_zscores
+    else:
+        target_zscores = plain_zscores
+    if check:
+        for i, link_target in enumerate (Link_targets):
+            rank = get_rank_of_list (link_target, gap_mark = gap_mark)
+            print(f"#target {i:3d}: {link_target} has {Link_targets[link_target]} in-coming link(s) [{target_zscores[link_target]: .4f} at rank {rank}]")
+
+    ## attach source_zscores to M, in place of streamed ones
+    if getattr (M, 'zscore_streams', None) is not None:
+        M.zscore_streams = None
+        M.source_zscores, M.target_zscores = dict (M.source_zscores), dict (M.target_zscores)
     M.target_zscores.update(target_zscores)
+    M.robust_zscores = use_robust_zscore
     if check:
         print(f"M.target_zscores: {M.target_zscores}")
     ##
     #return M
 
+##
+def update_zscores_of_ranks (link_dict: dict, zscores: dict, ranks: set, gap_mark: str, use_robust_zscore: bool) -> dict:
+    "recalculates into zscores the z-scores of the members of link_dict at ranks given, as gen_zscores_from_sources(..) does at all ranks"
+    plain_zscores, robust_zscores = calc_zscores_by_rank (link_dict, gap_mark = gap_mark, ranks = ranks)
+    zscores.update (robust_zscores if use_robust_zscore else plain_zscores)
+    return zscores
+
+##
+class QuantileSketch:
+    """
+    mergeable sketch of a distribution of non-negative values, for median and MAD, from which values can be removed.
+    Values are held exactly, as counts of values, while there are at most max_bins distinct values, which link counts,
+    being small integers, mostly are; beyond that, they are held in logarithmic bins of relative accuracy alpha,
+    as DDSketch holds them, so that a quantile is off by at most alpha of its value. With exact, bins are never collapsed.
+    """
+    def __init__ (self, alpha: float = 0.01, max_bins: int = 1024, exact: bool = False):
+        import math
+        self.alpha     = alpha
+        self.max_bins  = max_bins
+        self.exact     = exact
+        self.gamma     = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log (self.gamma)
+        self.collapsed = False
+        self.bins      = { }
+        self.n         = 0
+
+    ##
+    def __len__ (self):
+        return self.n
+
+    ##
+    def get_key (self, value: float):
+        "returns the bin of a value: the value itself, or the index of its logarithmic bin, None for 0"
+        import math
+        if not self.collapsed:
+            return value
+        if value == 0:
+            return None
+        return math.ceil (math.log (value) / self.log_gamma)
+
+    ##
+    def get_value (self, key) -> float:
+        "returns the value that a bin stands for, off by at most alpha of any value in the bin"
+        if not self.collapsed:
+            return key
+        if key is None:
+            return 0
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    ##
+    def collapse (self):
+        "moves values into logarithmic bins"
+        bins = self.bins
+        self.collapsed = True
+        self.bins = { }
+        for value, count in bins.items():
+            key = self.get_key (value)
+            self.bins[key] = self.bins.get (key, 0) + count
+
+    ##
+    def add (self, value: float, count: int = 1):
+        key = self.get_key (value)
+        self.bins[key] = self.bins.get (key, 0) + count
+        self.n += count
+        if not self.collapsed and not self.exact and len(self.bins) > self.max_bins:
+            self.collapse ()
+
+    ##
+    def remove (self, value: float, count: int = 1):
+        key = self.get_key (value)
+        left = self.bins[key] - count
+        if left < 0:
+            raise ValueError (f"{value} is not in the sketch {count} times")
+        if left == 0:
+            del self.bins[key]
+        else:
+            self.bins[key] = left
+        self.n -= count
+
+    ##
+    def merge (self, other):
+        "adds the values of another sketch of the same alpha"
+        if other.collapsed and not self.collapsed:
+            self.collapse ()
+        for key, count in other.bins.items():
+            if other.collapsed:
+                self.bins[key] = self.bins.get (key, 0) + count
+                self.n += count
+            else:
+                self.add (key, count)
+        return self
+
+    ##
+    @staticmethod
+    def get_weighted_median (pairs: list) -> float:
+        "takes (value, count) pairs sorted by value and returns their median, as np.median(..) gives it"
+        n = sum(count for _, count in pairs)
+        lower_k, upper_k = (n - 1) // 2, n // 2
+        lower, seen = None, 0
+        for value, count in pairs:
+            seen += count
+            if lower is None and seen > lower_k:
+                lower = value
+            if seen > upper_k:
+                return (lower + value) / 2
+
+    ##
+    def get_median (self) -> float:
+        return self.get_weighted_median (sorted ((self.get_value (key), count) for key, count in self.bins.items()))
+
+    ##
+    def get_MAD (self, median: float = None) -> float:
+        "returns the median absolute deviation, as stats.median_abs_deviation(..) gives it"
+        if median is None:
+            median = self.get_median ()
+        return self.get_weighted_median (sorted ((abs(self.get_value (key) - median), count) for key, count in self.bins.items()))
+
+##
+class WelfordStats:
+    "running count, mean and sum of squared deviations of values, by Welford's updates, from which values can be removed"
+    def __init__ (self):
+        self.n    = 0
+        self.mean = 0.0
+        self.M2   = 0.0
+
+    ##
+    def add (self, value: float):
+        self.n   += 1
+        delta     = value - self.mean
+        self.mean += delta / self.n
+        self.M2  += delta * (value - self.mean)
+
+    ##
+    def remove (self, value: float):
+        if self.n <= 1:
+            self.n, self.mean, self.M2 = 0, 0.0, 0.0
+            return
+        delta     = value - self.mean
+        self.n   -= 1
+        self.mean -= delta / self.n
+        self.M2  -= delta * (value - self.mean)
+        ## guard against rounding below 0
+        self.M2   = max(self.M2, 0.0)
+
+    ##
+    def merge (self, other):
+        "adds the values of another WelfordStats, as Chan et al. combine them"
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta     = other.mean - self.mean
+        self.M2  += other.M2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n    = n
+        return self
+
+    ##
+    def get_stdev (self) -> float:
+        "returns the population stdev, as np.std(..) gives it"
+        import math
+        return math.sqrt (self.M2 / self.n) if self.n > 0 else 0.0
+
+##
+class StreamingZScores:
+    """
+    online statistics of the distribution of link counts per rank, for link_sources or link_targets that change by batches.
+    Changes of counts are fed by update(..), which keeps a WelfordStats for mean and stdev and a QuantileSketch
+    for median and MAD per rank; refresh() recalculates the summaries of ranks changed, from the bins of sketches,
+    after which the z-score of any form is read in O(1) by get_zscore(..), or through a StreamedZScores view.
+    With exact, sketches never collapse, and medians and MADs are those of calc_zscores_by_rank(..).
+    """
+    def __init__ (self, gap_mark: str, alpha: float = 0.01, max_bins: int = 1024, exact: bool = False):
+        self.gap_mark  = gap_mark
+        self.alpha     = alpha
+        self.max_bins  = max_bins
+        self.exact     = exact
+        self.values    = { }
+        self.members   = { }
+        self.stats     = { }
+        self.sketches  = { }
+        self.summaries = { }
+        self.changed   = set()
+
+    ##
+    @classmethod
+    def from_counts (cls, link_dict: dict, gap_mark: str, **params):
+        "returns a StreamingZScores fed with link counts, refreshed"
+        stream = cls (gap_mark, **params).update (link_dict)
+        stream.refresh ()
+        return stream
+
+    ##
+    def update (self, changes: dict):
+        "takes a dict of the new link counts of forms, 0 for forms without links any longer, and feeds the changes"
+        for form, value in changes.items():
+            rank = len(form) - form.count (self.gap_mark) - form.count ("")
+            if rank not in self.stats:
+                self.stats[rank]    = WelfordStats ()
+                self.sketches[rank] = QuantileSketch (alpha = self.alpha, max_bins = self.max_bins, exact = self.exact)
+                self.members[rank]  = { }
+            old = self.values.pop (form, 0)
+            if old > 0:
+                self.stats[rank].remove (old)
+                self.sketches[rank].remove (old)
+                del self.members[rank][form]
+            if value > 0:
+                self.values[form] = value
+                self.stats[rank].add (value)
+                self.sketches[rank].add (value)
+                self.members[rank][form] = None
+            self.changed.add (rank)
+        return self
+
+    ##
+    def refresh (self) -> set:
+        "recalculates the summaries (mean, stdev, median, MAD) of ranks changed, and returns those ranks"
+        changed, self.changed = self.changed, set()
+        for rank in changed:
+            stats, sketch = self.stats[rank], self.sketches[rank]
+            if stats.n == 0:
+                self.summaries.pop (rank, None)
+                continue
+            median = sketch.get_median ()
+            self.summaries[rank] = (stats.mean, stats.get_stdev (), median, sketch.get_MAD (median))
+        return changed
+
+    ##
+    def get_zscore (self, form: tuple, robust: bool) -> float:
+        "returns the z-score of a form with links as calc_zscore(..) does, from the summary of its rank"
+        rank = len(form) - form.count (self.gap_mark) - form.count ("")
+        average, stdev, median, MAD = self.summaries[rank]
+        ## calc_zscore(..) inlined, since it imports modules per call
+        if stdev == 0 or MAD == 0:
+            return 0
+        if robust:
+            return 0.6745 * (self.values[form] - median) / MAD
+        return (self.values[form] - average) / stdev
+
+    ##
+    def get_zscores (self, robust: bool, ranks: set = None) -> dict:
+        "returns a dict of the z-scores of forms, at ranks given or at all ranks"
+        if ranks is None:
+            ranks = self.summaries.keys()
+        return { form: self.get_zscore (form, robust) for rank in ranks if rank in self.summaries for form in self.members[rank] }
+
+##
+class StreamedZScores (Mapping):
+    "read-only dict-like view of the z-scores of forms with links in a StreamingZScores, each computed on access"
+    def __init__ (self, stream: StreamingZScores, robust: bool):
+        self.stream = stream
+        self.robust = robust
+
+    def __getitem__ (self, form):
+        if form not in self.stream.values:
+            raise KeyError (form)
+        return self.stream.get_zscore (form, self.robust)
+
+    def __iter__ (self):
+        return iter (self.stream.values)
+
+    def __len__ (self):
+        return len (self.stream.values)
+
+##
+def gen_zscores_streaming (M, gap_mark: str, use_robust_zscore: bool, alpha: float = 0.01, max_bins: int = 1024, exact: bool = False):
+    """
+    makes M.source_zscores and M.target_zscores StreamedZScores views of StreamingZScores of M.link_sources and M.link_targets,
+    kept in M.zscore_streams, which a LinkMaintainer updates as links change, so that z-scores are never recalculated in full
+    """
+    params = dict (alpha = alpha, max_bins = max_bins, exact = exact)
+    M.zscore_streams = (StreamingZScores.from_counts (M.link_sources, gap_mark, **params), StreamingZScores.from_counts (M.link_targets, gap_mark, **params))
+    M.source_zscores = StreamedZScores (M.zscore_streams[0], use_robust_zscore)
+    M.target_zscores = StreamedZScores (M.zscore_streams[1], use_robust_zscore)
+    M.robust_zscores = use_robust_zscore
+
+##
+def merge_node_lists (A: tuple, B: tuple) -> tuple:
+    """
+    worker function: merges two (nodes, counts) pairs of node lists and the numbers of sources supporting them
+    by form, as NodeIndex does, and returns the merged pair
+    """
+    index = NodeIndex (*A)
+    index.merge (*B)
+    return index.nodes, index.get_counts ()
+
+##
+def merge_pickled_node_lists (A: tuple, B: tuple) -> tuple:
+    """
+    worker function: merge_node_lists(..) on (size, bytes) pairs of (nodes, counts) pickled with the standard pickler,
+    returning the merged list in the same way. Patterns pickled so cross the pool as bytes, which dill ships
+    much faster than it pickles Patterns itself.
+    """
+    import pickle
+    merged = merge_node_lists (pickle.loads (A[1]), pickle.loads (B[1]))
+    return len(merged[0]), pickle.dumps (merged, protocol = pickle.HIGHEST_PROTOCOL)
+
+##
+def merge_lattices_in_tree (lattices: list, **params):
+    """
+    takes a list of PatternLattices and merges them in a balanced binary tree instead of the left-deep chain of
+    functools.reduce(..), giving the same nodes, though in another order.
+    At each level, node lists are sorted by size and paired from the smallest, so smaller lattices are combined first,
+    and the pairs of a level are merged in parallel on pool, a WorkerPool, if use_mp is True.
+    Only pickled node lists go to workers, and they stay pickled between levels; the merged PatternLattice is built
+    at the root, where links are generated once if gen_links_internally is True.
+    params are those of PatternLattice.merge_lattices(..).
+    """
+    import pickle
+    generalized          = params['generalized']
+    reductive            = params.get('reductive', True)
+    use_mp               = params.get('use_mp', False)
+    gen_links_internally = params.get('gen_links_internally', False)
+    check                = params.get('check', False)
+    pool                 = params.get('pool', None)
+    ##
+    gap_mark   = lattices[0].gap_mark
+    node_lists = [ ]
+    for lattice in lattices:
+        nodes   = [ p for p in lattice.nodes if len(p) > 0 ]
+        support = lattice.get_support ()
+        node_lists.append ((nodes, [ support.get (p.form, 1) for p in nodes ]))
+    if use_mp:
+        items = [ (len(x[0]), pickle.dumps (x, protocol = pickle.HIGHEST_PROTOCOL)) for x in node_lists ]
+        size  = lambda item: item[0]
+        merge = merge_pickled_node_lists
+    else:
+        items = node_lists
+        size  = lambda item: len(item[0])
+        merge = merge_node_lists
+    items = sorted (items, key = size)
+    level = 0
+    ## a WorkerPool starts no process until it is used
+    with use_worker_pool (pool) as pool_used:
+        while len (items) > 1:
+            pairs = [ (items[i], items[i + 1]) for i in range (0, len(items) - 1, 2) ]
+            rest  = items[len(pairs) * 2:]
+            if use_mp and len(pairs) > 1:
+                merged_items = pool_used.starmap (merge, pairs, chunksize = 1)
+            else:
+                merged_items = [ merge (A, B) for A, B in pairs ]
+            items = sorted (merged_items + rest, key = size)
+            level += 1
+            if check:
+                print(f"#merger level {level}: {len(pairs)} pairs merged into {[ size(x) for x in items ]} nodes")
+    ##
+    nodes, counts = pickle.loads (items[0][1]) if use_mp else items[0]
+    merged = PatternLattice.from_nodes (nodes, gap_mark = gap_mark, generalized = generalized, reductive = reductive, counts = counts, check = check)
+    if gen_links_internally:
+        merged.update_links (reflexive = params['reflexive'], use_mp = use_mp, execution = params.get('execution', "auto"), planner = params.get('planner', None), pool = pool, check = check)
+    return merged
+
 ## Classes
+##
+class NodeIndex:
+    """
+    index of the nodes of a merged PatternLattice by form, through which patterns are merged into nodes and ranked_nodes in place.
+    positions maps a form to the position of its node in nodes and in ranked_nodes[rank],
+    and support maps it to the number of sources whose lattices have the node.
+    A pattern of a new form is appended; one of a known form has its content unioned into the node by union_content(..),
+    after the node is replaced once by a copy of its own, so that patterns of the lattices merged are never modified.
+    The forms of nodes so replaced are kept in replaced, until a LinkMaintainer or link generation clears them.
+    A merger thus costs O(M) for M patterns to merge, however many nodes there are.
+    Patterns are removed by remove(..), which discounts their support and deletes the nodes left without any.
+    With track_content, content_support counts the sources having each segment at each position of a node,
+    so that removal takes out of the content what no other source has, as if the patterns had never been merged.
+    """
+    def __init__ (self, patterns: list = None, counts: list = None, track_content: bool = False):
+        from collections import defaultdict
+        self.nodes        = [ ]
+        self.ranked_nodes = defaultdict(list)
+        self.positions    = { }
+        self.support      = { }
+        self.owned        = set()
+        self.replaced     = set()
+        self.content_support = { } if track_content else None
+        if patterns is not None:
+            self.merge (patterns, counts = counts)
+
+    ##
+    def __len__ (self):
+        return len (self.nodes)
+
+    ##
+    def add (self, pattern, count: int = 1) -> bool:
+        "merges a pattern supported by count sources and returns True if it is a new node"
+        form = pattern.form
+        try:
+            i, j = self.positions[form]
+        except KeyError:
+            rank = pattern.get_rank ()
+            self.positions[form] = (len(self.nodes), len(self.ranked_nodes[rank]))
+            self.support[form]   = count
+            self.nodes.append (pattern)
+            self.ranked_nodes[rank].append (pattern)
+            if self.content_support is not None:
+                self.content_support[form] = tuple([ { x: count for x in c } for c in pattern.content ])
+            return True
+        self.support[form] += count
+        if self.content_support is not None:
+            for counts, c in zip (self.content_support[form], pattern.content):
+                for x in c:
+                    counts[x] = counts.get (x, 0) + count
+        content = self.nodes[i].union_content (pattern)
+        if content is not None:
+            self.own (i, j).set_content (content)
+        return False
+
+    ##
+    def own (self, i: int, j: int):
+        "returns the node at position (i, j), replacing it by a copy of its own first if it is shared with a lattice merged"
+        node = self.nodes[i]
+        if i not in self.owned:
+            import copy
+            node = copy.copy (node)
+            self.nodes[i] = node
+            self.ranked_nodes[node.get_rank ()][j] = node
+            self.owned.add (i)
+            self.replaced.add (node.form)
+        return node
+
+    ##
+    def discount (self, pattern, count: int = 1) -> bool:
+        "discounts the support of the node of a pattern's form by count sources and returns True if no source is left"
+        form = pattern.form
+        try:
+            i, j = self.positions[form]
+        except KeyError:
+            raise ValueError (f"no node of form {form} to discount")
+        support = self.support[form] - count
+        if support < 0:
+            raise ValueError (f"node of form {form} has less support than {count}")
+        self.support[form] = support
+        if support == 0:
+            return True
+        if self.content_support is not None:
+            lost = False
+            for counts, c in zip (self.content_support[form], pattern.content):
+                for x in c:
+                    counts[x] -= count
+                    if counts[x] == 0:
+                        del counts[x]
+                        lost = True
+            if lost:
+                ## segments are kept in the order they were merged in
+                content = [ [ x for x in c if x in counts ] for counts, c in zip (self.content_support[form], self.nodes[i].content) ]
+                self.own (i, j).set_content (content)
+        return False
+
+    ##
+    def remove (self, patterns: list, counts: list = None) -> list:
+        """
+        discounts patterns, supported by counts sources each or by one, and returns the forms of nodes deleted.
+        Nothing is discounted if any pattern is not supported as much as it is to be discounted
+        """
+        if counts is None:
+            counts = [ 1 ] * len(patterns)
+        for pattern, count in zip (patterns, counts):
+            form = pattern.form
+            if self.support.get (form, 0) < count:
+                raise ValueError (f"node of form {form} has less support than {count}")
+            if self.content_support is not None:
+                for c_counts, c in zip (self.content_support[form], pattern.content):
+                    if any(c_counts.get (x, 0) < count for x in c):
+                        raise ValueError (f"node of form {form} has less support than {count} for content {c}")
+        dead = [ pattern.form for pattern, count in zip (patterns, counts) if self.discount (pattern, count) ]
+        if len(dead) > 0:
+            self.delete (dead)
+        return dead
+
+    ##
+    def delete (self, forms: list):
+        """
+        deletes the nodes of forms, keeping the order of the others. nodes and ranked_nodes are updated in place,
+        since a merged PatternLattice shares them, and positions are recalculated, in a pass over the nodes
+        """
+        dead  = set(forms)
+        owned = { self.nodes[i].form for i in self.owned }
+        ranks = { self.nodes[self.positions[form][0]].get_rank () for form in dead }
+        self.nodes[:] = [ p for p in self.nodes if p.form not in dead ]
+        for rank in ranks:
+            kept = [ p for p in self.ranked_nodes[rank] if p.form not in dead ]
+            if len(kept) > 0:
+                self.ranked_nodes[rank][:] = kept
+            else:
+                del self.ranked_nodes[rank]
+        for form in dead:
+            del self.positions[form]
+            del self.support[form]
+            self.replaced.discard (form)
+            if self.content_support is not None:
+                del self.content_support[form]
+        positions = self.positions
+        for i, p in enumerate (self.nodes):
+            positions[p.form] = (i, 0)
+        for nodes in self.ranked_nodes.values():
+            for j, p in enumerate (nodes):
+                positions[p.form] = (positions[p.form][0], j)
+        self.owned = { positions[form][0] for form in owned if form not in dead }
+        return self
+
+    ##
+    def merge (self, patterns: list, counts: list = None) -> int:
+        "merges patterns, supported by counts sources each or by one, and returns the number of new nodes"
+        added = 0
+        if counts is None:
+            for pattern in patterns:
+                if self.add (pattern):
+                    added += 1
+        else:
+            for pattern, count in zip (patterns, counts):
+                if self.add (pattern, count):
+                    added += 1
+        return added
+
+    ##
+    def get_counts (self) -> list:
+        "returns the support of nodes, in the order of nodes"
+        support = self.support
+        return [ support[p.form] for p in self.nodes ]
+
+##
+class LinkStats:
+    """
+    link counts of the nodes of a PatternLattice, accumulated block by block as gen_links(..) finds links.
+    out_degrees and in_degrees are int arrays indexed by node ID, the position of a node in P.nodes,
+    and ranked_links buckets links by rank as make_links_ranked(..) does, with ranks of nodes computed once.
+    They are those of the last generation of links, which a LinkMaintainer does not update.
+    """
+    def __init__ (self, nodes: list, gap_mark: str):
+        import numpy as np
+        self.nodes        = nodes
+        self.ranks        = [ len(p.form) - p.form.count (gap_mark) for p in nodes ]
+        self.out_degrees  = np.zeros (len(nodes), dtype = np.int32)
+        self.in_degrees   = np.zeros (len(nodes), dtype = np.int32)
+        self.ranked_links = { }
+        self.node_ids     = { p: i for i, p in enumerate (nodes) }
+
+    ##
+    def add (self, links: list):
+        "counts links, whose ends are nodes or copies of nodes sent back by workers"
+        import numpy as np
+        node_ids, ranks, ranked_links = self.node_ids, self.ranks, self.ranked_links
+        sources = [ node_ids[link.left] for link in links ]
+        targets = [ node_ids[link.right] for link in links ]
+        for link, i, j in zip (links, sources, targets):
+            rank = max(ranks[i], ranks[j])
+            try:
+                ranked_links[rank].append (link)
+            except KeyError:
+                ranked_links[rank] = [link]
+        n_nodes = len(self.nodes)
+        self.out_degrees += np.bincount (np.array (sources, dtype = np.intp), minlength = n_nodes).astype (np.int32)
+        self.in_degrees  += np.bincount (np.array (targets, dtype = np.intp), minlength = n_nodes).astype (np.int32)
+        return self
+
+    ##
+    def close (self):
+        "drops the index of nodes, which is only needed while links are added"
+        self.node_ids = None
+        return self
+
+    ##
+    def get_link_counts (self, degrees) -> dict:
+        "returns a dict of the degrees of nodes with any link by form, as P.link_sources and P.link_targets are"
+        from collections import defaultdict
+        import numpy as np
+        nodes  = self.nodes
+        counts = defaultdict(int)
+        for i in np.flatnonzero (degrees).tolist ():
+            counts[nodes[i].form] = int(degrees[i])
+        return counts
+
+    ##
+    def get_link_sources (self) -> dict:
+        return self.get_link_counts (self.out_degrees)
+
+    ##
+    def get_link_targets (self) -> dict:
+        return self.get_link_counts (self.in_degrees)
+
+##
+class LinkMaintainer:
+    """
+    keeps the links of a merged PatternLattice up to date as patterns are merged into its NodeIndex,
+    classifying only pairs that involve nodes appended to the index since links were last generated or updated.
+    Parents of a new node are found by form as ParentIndex(..) finds them, and its children through the inverse indexes:
+    children maps a form with one more gap to the gapped forms it generalizes, and gapless maps sizes to gapless forms
+    for is-a:T0. Links so found are those gen_links(..) finds, though appended in another order.
+    Links to nodes replaced in the index by copies are repointed to the copies.
+    Links of nodes deleted from the index are deleted by remove(..), and cached z-scores are recalculated
+    only at the ranks where link counts changed.
+    """
+    def __init__ (self, lattice, reflexive: bool = True):
+        self.lattice       = lattice
+        self.reflexive     = reflexive
+        self.gap_mark      = lattice.gap_mark
+        self.index         = lattice.get_node_index ()
+        self.one_gapped    = { }
+        self.gapless       = { }
+        self.children      = { }
+        self.links_by_form = { }
+        for link in lattice.links:
+            self.links_by_form.setdefault (link.left.form, []).append (link)
+            self.links_by_form.setdefault (link.right.form, []).append (link)
+        ## nodes that links were generated for are indexed without being classified again
+        self.n_indexed = 0
+        self.index_forms (lattice.n_linked_nodes)
+
+    ##
+    def index_forms (self, n_nodes: int) -> list:
+        "indexes the forms of nodes up to n_nodes and returns those indexed newly"
+        gap_mark = self.gap_mark
+        gap      = (gap_mark,)
+        forms    = [ p.form for p in self.index.nodes[self.n_indexed: n_nodes] ]
+        for form in forms:
+            n_gaps = count_items (form, gap_mark)
+            ## dicts keep the order of lists, and let forms be unindexed
+            if n_gaps == 0:
+                self.gapless.setdefault (len(form), {})[form] = None
+            else:
+                if n_gaps == 1:
+                    self.one_gapped.setdefault (len(form), {})[form] = None
+                for i, seg in enumerate (form):
+                    if seg != gap_mark:
+                        self.children.setdefault (form[:i] + gap + form[i+1:], {})[form] = None
+        self.n_indexed = max(self.n_indexed, n_nodes)
+        return forms
+
+    ##
+    def unindex_forms (self, forms: list):
+        "unindexes the forms of nodes deleted"
+        gap_mark = self.gap_mark
+        gap      = (gap_mark,)
+        for form in forms:
+            n_gaps = count_items (form, gap_mark)
+            if n_gaps == 0:
+                self.gapless[len(form)].pop (form, None)
+            else:
+                if n_gaps == 1:
+                    self.one_gapped[len(form)].pop (form, None)
+                for i, seg in enumerate (form):
+                    if seg != gap_mark:
+                        self.children[form[:i] + gap + form[i+1:]].pop (form, None)
+
+    ##
+    def find_parents (self, form: tuple) -> list:
+        "returns the forms of nodes that a node of form instantiates"
+        gap_mark  = self.gap_mark
+        gap       = (gap_mark,)
+        positions = self.index.positions
+        found     = [ ]
+        if self.reflexive:
+            for stem in (form + gap, gap + form):
+                if stem in positions:
+                    found.append (stem)
+        if count_items (form, gap_mark) == 0:
+            ## is-a:T0 holds on inclusion of substance regardless of positions
+            for l in self.one_gapped.get (len(form), []):
+                if all(x in form for x in l if x != gap_mark):
+                    found.append (l)
+        else:
+            for i, seg in enumerate (form):
+                if seg != gap_mark:
+                    l = form[:i] + gap + form[i+1:]
+                    if l in positions:
+                        found.append (l)
+        return remove_duplicates (found)
+
+    ##
+    def find_children (self, form: tuple) -> list:
+        "returns the forms of nodes that instantiate a node of form"
+        gap_mark  = self.gap_mark
+        positions = self.index.positions
+        found     = [ ]
+        if self.reflexive and len(form) > 0:
+            if form[-1] == gap_mark and form[:-1] in positions:
+                found.append (form[:-1])
+            if form[0] == gap_mark and form[1:] in positions:
+                found.append (form[1:])
+        if count_items (form, gap_mark) == 1:
+            substance = [ x for x in form if x != gap_mark ]
+            for r in self.gapless.get (len(form), []):
+                if all(x in r for x in substance):
+                    found.append (r)
+        found.extend (self.children.get (form, []))
+        return remove_duplicates (found)
+
+    ##
+    def repoint (self):
+        "repoints links to the nodes replaced in the index by copies"
+        index = self.index
+        for form in index.replaced:
+            node = index.nodes[index.positions[form][0]]
+            for link in self.links_by_form.get (form, []):
+                if link.left.form == form:
+                    link.left = node
+                if link.right.form == form:
+                    link.right = node
+                link.paired = (link.left, link.right)
+        index.replaced.clear ()
+
+    ##
+    def update (self, check: bool = False) -> list:
+        "adds the links of nodes new to the lattice to P.links, P.ranked_links, P.link_sources and P.link_targets, and returns them"
+        lattice, index = self.lattice, self.index
+        nodes, positions = index.nodes, index.positions
+        node_of = lambda form: nodes[positions[form][0]]
+        self.repoint ()
+        ## new nodes are indexed first, so that links among them are found
+        new_forms = self.index_forms (len(nodes))
+        pairs, seen = [ ], set()
+        for form in new_forms:
+            for pair in [ (l, form) for l in self.find_parents (form) ] + [ (form, r) for r in self.find_children (form) ]:
+                if pair not in seen:
+                    seen.add (pair)
+                    pairs.append (pair)
+        ## patch links and the data derived from them
+        new_links = [ PatternLink ((node_of (l), node_of (r))) for l, r in pairs ]
+        ranked_links = lattice.ranked_links
+        for link in new_links:
+            if check:
+                print(f"#is-a:U; {link.left.form} <- {link.right.form}")
+            l_form, r_form = link.form_paired
+            self.links_by_form.setdefault (l_form, []).append (link)
+            self.links_by_form.setdefault (r_form, []).append (link)
+            ranked_links.setdefault (link.get_link_rank (), []).append (link)
+            lattice.link_sources[l_form] += 1
+            lattice.link_targets[r_form] += 1
+        lattice.links.extend (new_links)
+        lattice.ranked_links   = dict (sorted (ranked_links.items()))
+        lattice.n_linked_nodes = len(nodes)
+        self.refresh_zscores ({ form for link in new_links for form in link.form_paired })
+        return new_links
+
+    ##
+    def remove (self, forms: list, check: bool = False) -> list:
+        """
+        deletes from P.links, P.ranked_links, P.link_sources and P.link_targets the links of the nodes of forms,
+        which the index has deleted, and returns them
+        """
+        lattice = self.lattice
+        self.repoint ()
+        self.unindex_forms (forms)
+        ## links are told by id, since links of the same forms are equal
+        doomed = { }
+        for form in forms:
+            for link in self.links_by_form.pop (form, []):
+                doomed[id(link)] = link
+        touched = set(forms)
+        for link in doomed.values():
+            if check:
+                print(f"#deleted link: {link.left.form} <- {link.right.form}")
+            l_form, r_form = link.form_paired
+            touched.update ((l_form, r_form))
+            for stats, form in [ (lattice.link_sources, l_form), (lattice.link_targets, r_form) ]:
+                stats[form] -= 1
+                if stats[form] == 0:
+                    del stats[form]
+        for form in touched:
+            if form in self.links_by_form:
+                self.links_by_form[form] = [ link for link in self.links_by_form[form] if id(link) not in doomed ]
+        ## links and ranked links keep their order, in a pass over them
+        if len(doomed) > 0:
+            lattice.links[:] = [ link for link in lattice.links if id(link) not in doomed ]
+            for rank in { link.get_link_rank () for link in doomed.values() }:
+                kept = [ link for link in lattice.ranked_links[rank] if id(link) not in doomed ]
+                if len(kept) > 0:
+                    lattice.ranked_links[rank] = kept
+                else:
+                    del lattice.ranked_links[rank]
+        self.n_indexed         = len(self.index.nodes)
+        lattice.n_linked_nodes = len(self.index.nodes)
+        self.refresh_zscores (touched)
+        return list (doomed.values())
+
+    ##
+    def refresh_zscores (self, forms: set):
+        """
+        recalculates cached z-scores at the ranks of forms whose link counts changed,
+        from P.zscore_streams if gen_zscores_streaming(..) made them, and exactly otherwise;
+        z-scores are dropped if it is unknown whether they are robust
+        """
+        lattice  = self.lattice
+        robust   = getattr (lattice, 'robust_zscores', None)
+        streams  = getattr (lattice, 'zscore_streams', None)
+        if streams is not None:
+            ## streams are fed the new counts, and only summaries of ranks changed are recalculated
+            for stats, stream in zip ([ lattice.link_sources, lattice.link_targets ], streams):
+                stream.update ({ form: stats.get (form, 0) for form in forms })
+                stream.refresh ()
+            return
+        ranks    = { get_rank_of_list (form, gap_mark = self.gap_mark) for form in forms }
+        for stats, zscores in [ (lattice.link_sources, lattice.source_zscores), (lattice.link_targets, lattice.target_zscores) ]:
+            if len(zscores) == 0:
+                continue
+            if robust is None:
+                zscores.clear ()
+                continue
+            for form in forms:
+                if form not in stats:
+                    zscores.pop (form, None)
+            update_zscores_of_ranks (stats, zscores, ranks, gap_mark = self.gap_mark, use_robust_zscore = robust)
+
 ##
 class PatternLattice():
     "definition of PatternLattice class"
     ##
-    def __init__ (self, pattern, generalized: bool, reflexive: bool = True, reductive: bool = True, check: bool = False):
+    def __init__ (self, pattern, generalized: bool, reflexive: bool = True, reductive: bool = True, execution: str = "auto", pool: WorkerPool = None, check: bool = False):
         "initialization of a PatternLattice"
         if check:
             print(f"pattern.paired: {pattern.paired}")
         ##
         self.origin       = pattern
         self.generalized  = generalized
+        self.single_source = True
+        self.node_index   = None
         self.nodes        = pattern.build_lattice_nodes (generalized = generalized, check = check)
         self.gap_mark     = self.nodes[0].gap_mark
         self.ranked_nodes = self.group_nodes_by_rank (check = check)
         ## old code
         #self.links, self.link_sources, self.link_targets = self.gen_links (reflexive = reflexive, check = check)
-        self.links          = self.gen_links (reflexive = reflexive, check = check)
-        self.ranked_links   = make_links_ranked (self.links, check = check)
-        self.link_sources, self.link_targets = self.get_link_stats (check = check)
+        self.links          = self.gen_links (reflexive = reflexive, execution = execution, pool = pool, check = check)
+        self.ranked_links   = self.link_stats.ranked_links
+        self.link_sources, self.link_targets = self.link_stats.get_link_sources (), self.link_stats.get_link_targets ()
         self.source_zscores = {}
         self.target_zscores = {}
         #return self # This may not be run
@@ -906,20 +2517,18 @@ class PatternLattice():
         return ranked_nodes
 
     ## generate links
-    def gen_links (self: object, reflexive: bool = True, use_mp: bool = True, check: bool = False) -> list:
+    def gen_link_blocks (self, reflexive: bool = True, check: bool = False) -> list:
         """
-        takes a PatternLattice P, and generates data for for P.links
+        takes a PatternLattice P, and returns the list of (R, L) blocks to classify, in rank order,
+        where L are the nodes of a rank and R those of the next rank, supplemented with L if reflexive
         """
-        ##
-        gap_mark     = self.gap_mark
         ranked_nodes = self.ranked_nodes
         if len (ranked_nodes) == 0:
             ranked_nodes = make_ranked_dict (self.nodes)
         ##
-        links =  [ ]
-        ranks = ranked_nodes.keys()
+        blocks = [ ]
+        ranks  = ranked_nodes.keys()
         for rank in sorted (ranks, reverse = False):
-            selected_links = [ ]
             try:
                 L = simplify_list (ranked_nodes[rank])
                 if check:
@@ -930,38 +2539,118 @@ class PatternLattice():
                 ## make R reflexive
                 if reflexive:
                     supplement = [ ]
+                    R_register = set(R)
                     for node in L:
-                        if len(node) > 0 and node not in R:
+                        if len(node) > 0 and node not in R_register:
                             supplement.append (node)
                     R.extend (supplement)
-                ## main
-                use_mp2 = True
-                if use_mp:
-                    if use_mp2:
-                        classify_relations_mp = classify_relations_mp2
-                    else:
-                        classify_relations_mp = classify_relations_mp1
-                    selected_links = classify_relations_mp (R, L, gap_mark, check = check)
-                else:
-                    selected_links = classify_relations (R, L, check = check)
-                #print (f"selected_links: {selected_links}")
-                links.extend (selected_links)
+                blocks.append ((R, L))
             except KeyError:
                pass
+        return blocks
+
+    ##
+    def classify_link_blocks (self, blocks: list, method: str, mode: str, use_shm: bool = True, balance: bool = True, pool: WorkerPool = None, check: bool = False) -> list:
+        """
+        takes (R, L) blocks and returns a list of link lists, one per block, found by method
+        ("construction", "indexed" or "pairwise") and run in mode ("serial", "thread", "process" or "ranks").
+        Threads run one block each, and so do processes in "ranks" mode, while "process" mode splits blocks into tiles.
+        Processes run on pool, a WorkerPool, or on a temporary pool when pool is None,
+        looking up int-encoded forms in a ParentIndex for "construction" and "indexed", since workers see no Pattern.
+        Pairwise testing on processes ships int-encoded forms through shared memory when use_shm is True,
+        and Pattern pairs otherwise; with use_shm and balance, tiles of all ranks are run on the pool at once.
+        """
+        gap_mark = self.gap_mark
+        classify = { "construction": classify_relations_by_construction, "indexed": classify_relations_indexed, "pairwise": classify_relations }[method]
+        if mode == "serial":
+            return [ classify (R, L, check = check) for R, L in blocks ]
+        if mode == "thread":
+            from concurrent.futures import ThreadPoolExecutor
+            n_workers = pool.n_workers if pool is not None else None
+            with ThreadPoolExecutor (max_workers = n_workers) as executor:
+                return list (executor.map (lambda block: classify (*block, check = check), blocks))
+        if mode == "ranks":
+            return classify_blocks_shm (blocks, gap_mark, pool = pool, per_block = True, method = "pairwise" if method == "pairwise" else "indexed", check = check)
+        ## mode == "process"
+        use_mp2 = True
+        if method != "pairwise":
+            return classify_blocks_shm (blocks, gap_mark, pool = pool, method = "indexed", check = check)
+        if use_shm and balance:
+            return classify_blocks_shm (blocks, gap_mark, pool = pool, check = check)
+        if use_shm:
+            return [ classify_relations_shm (R, L, gap_mark, pool = pool, check = check) for R, L in blocks ]
+        if use_mp2:
+            classify_relations_mp = classify_relations_mp2
+        else:
+            classify_relations_mp = classify_relations_mp1
+        return [ classify_relations_mp (R, L, gap_mark, pool = pool, check = check) for R, L in blocks ]
+
+    ##
+    def gen_links (self: object, reflexive: bool = True, use_mp: bool = True, by_construction: bool = True, use_index: bool = True, use_shm: bool = True, balance: bool = True, execution: str = "auto", planner: LinkPlanner = None, pool: WorkerPool = None, check: bool = False) -> list:
+        """
+        takes a PatternLattice P, and generates data for for P.links.
+        Links of a single-source lattice are derived from node forms when by_construction is True;
+        those of a merged lattice are looked up in a ParentIndex when use_index is True, and found by pairwise testing otherwise.
+        Where they are classified is planned by planner, a LinkPlanner (the one of get_link_planner() when None),
+        from the candidate pairs estimated for all ranks: serially, on threads, or on processes of pool,
+        which use_mp allows; execution other than "auto" forces the mode. The plan is kept in P.link_plan.
+        Links are counted by node and by rank as they come, block by block, into P.link_stats, a LinkStats.
+        """
+        import os
+        ## collect the pairs of R (rank + 1) and L (rank) to classify
+        blocks = self.gen_link_blocks (reflexive = reflexive, check = check)
+        ## plan
+        if by_construction and self.single_source:
+            method = "construction"
+        elif use_index:
+            method = "indexed"
+        else:
+            method = "pairwise"
+        if planner is None:
+            planner = get_link_planner ()
+        if not use_mp:
+            n_workers = 1
+        elif pool is not None:
+            n_workers = pool.n_workers
+        else:
+            n_workers = os.cpu_count() or 1
+        self.link_plan = planner.plan (blocks, method, self.gap_mark, n_workers, execution = execution)
+        if check:
+            print(f"#link plan: {planner.describe (self.link_plan)}")
+        ## main
+        selected_links = self.classify_link_blocks (blocks, method, self.link_plan["mode"], use_shm = use_shm, balance = balance, pool = pool, check = check)
+        ## join links in rank order, counting them
+        link_stats = LinkStats (self.nodes, self.gap_mark)
+        links =  [ ]
+        for sub_links in selected_links:
+            #print (f"sub_links: {sub_links}")
+            links.extend (sub_links)
+            link_stats.add (sub_links)
+        self.link_stats = link_stats.close ()
         ##
         return links
 
     ##
-    def update_links (self, reflexive: bool, use_mp: bool = False, check: bool = False):
+    def update_links (self, reflexive: bool, use_mp: bool = False, by_construction: bool = True, use_index: bool = True, use_shm: bool = True, balance: bool = True, execution: str = "auto", planner: LinkPlanner = None, incremental: bool = False, pool: WorkerPool = None, check: bool = False):
         """
         takes a PatternLattice P, and updates P.links, P.link_sources and P.link_targets.
+        With incremental, only the links of nodes merged since links were last generated are added, by a LinkMaintainer,
+        if P is a merged lattice with links to update; otherwise all links are generated again.
         """
+        if incremental and not self.single_source and getattr (self, 'n_linked_nodes', None) is not None:
+            self.get_link_maintainer (reflexive).update (check = check)
+            return self
         ## update links
-        self.links  = self.gen_links (reflexive = reflexive, use_mp = use_mp, check = check)
-        ## update ranked_links
-        self.ranked_links  = make_links_ranked (self.links, check = check)
-        ## update link_sources, link_targets
-        self.link_sources, self.link_targets = self.get_link_stats (check = check)
+        self.links  = self.gen_links (reflexive = reflexive, use_mp = use_mp, by_construction = by_construction, use_index = use_index, use_shm = use_shm, balance = balance, execution = execution, planner = planner, pool = pool, check = check)
+        ## update ranked_links, link_sources, link_targets, counted by gen_links(..)
+        self.ranked_links  = self.link_stats.ranked_links
+        self.link_sources, self.link_targets = self.link_stats.get_link_sources (), self.link_stats.get_link_targets ()
+        ## links now cover all nodes, with no replaced one, and counts are no longer those streamed
+        self.link_maintainer = None
+        self.zscore_streams  = None
+        self.n_linked_nodes  = len(self.nodes)
+        if getattr (self, 'node_index', None) is not None:
+            self.node_index.replaced.clear ()
         ## return result
         return self
 
@@ -973,7 +2662,7 @@ class PatternLattice():
         from collections import defaultdict
         ##
         link_sources, link_targets = defaultdict(int), defaultdict(int)
-        seen = [ ]
+        seen = set()
         for link in sorted (self.links, key = lambda x: len(x), reverse = False):
             if not link in seen:
                 l_form, r_form = link.left.form, link.right.form
@@ -981,14 +2670,131 @@ class PatternLattice():
                 #if link.right.count_gaps() > 0:
                 #    link_targets[r_form] += 1
                 link_targets[r_form] += 1
-                seen.append(link)
+                seen.add (link)
         ## return result
         return link_sources, link_targets
 
+    ##
+    def get_support (self) -> dict:
+        "returns a dict of the number of sources supporting each node, which is 1 for all nodes of a single-source lattice"
+        index = getattr (self, 'node_index', None)
+        if index is None or index.nodes is not self.nodes:
+            return { p.form: 1 for p in self.nodes if len(p) > 0 }
+        return index.support
+
+    ##
+    def get_link_maintainer (self, reflexive: bool = True) -> LinkMaintainer:
+        "returns the LinkMaintainer of a merged PatternLattice with links, creating one if there is none for reflexive and P's index"
+        maintainer = getattr (self, 'link_maintainer', None)
+        if maintainer is None or maintainer.reflexive != reflexive or maintainer.index is not self.get_node_index ():
+            maintainer = self.link_maintainer = LinkMaintainer (self, reflexive = reflexive)
+        return maintainer
+
+    ##
+    def add_source (self, source, reflexive: bool = True, check: bool = False) -> int:
+        """
+        takes a source, a Pattern or a list of segments, merges the nodes of its lattice into a merged PatternLattice,
+        updates its links incrementally if it has any, and returns the number of new nodes
+        """
+        if self.single_source:
+            raise ValueError ("sources are added to a merged PatternLattice")
+        if isinstance (source, (list, tuple)):
+            source = Pattern (source, gap_mark = self.gap_mark)
+        nodes = source.build_lattice_nodes (generalized = self.generalized, check = check)
+        added = self.get_node_index ().merge ([ p for p in nodes if len(p) > 0 ])
+        if self.n_linked_nodes is not None:
+            self.get_link_maintainer (reflexive).update (check = check)
+        return added
+
+    ##
+    def remove_source (self, source, reflexive: bool = True, check: bool = False) -> list:
+        """
+        takes a source, a Pattern or a list of segments, that was merged into a merged PatternLattice,
+        discounts the support of the nodes of its lattice, deletes the nodes that no other source supports,
+        with their links, and updates P.link_sources, P.link_targets and z-scores incrementally.
+        Returns the forms of nodes deleted. The content of nodes is restored if P's NodeIndex tracks content.
+        """
+        if self.single_source:
+            raise ValueError ("sources are removed from a merged PatternLattice")
+        if isinstance (source, (list, tuple)):
+            source = Pattern (source, gap_mark = self.gap_mark)
+        nodes = source.build_lattice_nodes (generalized = self.generalized, check = check)
+        index = self.get_node_index ()
+        ## links of nodes added since links were last made are made first, so that all are accounted for
+        maintainer = None
+        if self.n_linked_nodes is not None:
+            maintainer = self.get_link_maintainer (reflexive)
+            maintainer.update (check = check)
+        dead = index.remove ([ p for p in nodes if len(p) > 0 ])
+        if maintainer is not None:
+            maintainer.remove (dead, check = check)
+        if check:
+            print(f"#source {source} deleted {len(dead)} of {len(nodes)} nodes")
+        return dead
+
+    ##
+    def get_node_index (self) -> NodeIndex:
+        """
+        returns the NodeIndex of a merged PatternLattice, building it from P.nodes if there is none
+        or if P.nodes was replaced, in which case P.nodes and P.ranked_nodes become those of the index,
+        with the support of one source each
+        """
+        index = getattr (self, 'node_index', None)
+        if index is None or index.nodes is not self.nodes:
+            index = NodeIndex ([ p for p in self.nodes if len(p) > 0 ])
+            self.node_index   = index
+            self.nodes        = index.nodes
+            self.ranked_nodes = index.ranked_nodes
+        return index
+
+    ##
+    @classmethod
+    def from_nodes (cls, nodes: list, gap_mark: str, generalized: bool, reductive: bool = True, counts: list = None, track_content: bool = False, check: bool = False):
+        """
+        creates a merged PatternLattice without links from a list of nodes, merged by form through a NodeIndex,
+        where counts are the numbers of sources supporting nodes, one each when None
+        """
+        return cls.from_index (NodeIndex (nodes, counts = counts, track_content = track_content), gap_mark = gap_mark, generalized = generalized, reductive = reductive, check = check)
+
+    ##
+    @classmethod
+    def from_index (cls, index: NodeIndex, gap_mark: str, generalized: bool, reductive: bool = True, check: bool = False):
+        "creates a merged PatternLattice without links whose nodes are those of a NodeIndex, and are updated with it"
+        ## define a new pattern lattice and elaborates it
+        dummy_pattern = Pattern([], gap_mark = gap_mark, check = check)
+        merged = cls (dummy_pattern, generalized = generalized, reductive = reductive, check = check)
+        merged.origin        = dummy_pattern
+        merged.single_source = False
+        merged.node_index    = index
+        ## nodes and ranked nodes are those of index, updated with it
+        merged.nodes         = index.nodes
+        merged.ranked_nodes  = index.ranked_nodes
+        ## drops the links of the dummy pattern, which a generalized lattice has
+        merged.clear_links ()
+        return merged
+
+    ##
+    def clear_links (self):
+        "takes a PatternLattice P, and empties P.links and the data derived from them, until links are generated again"
+        self.links          =  []
+        self.ranked_links   =  {}
+        self.link_sources   =  []
+        self.link_targets   =  []
+        self.source_zscores =  {}
+        self.target_zscores =  {}
+        self.link_maintainer = None
+        self.n_linked_nodes  = None
+        self.zscore_streams  = None
+        return self
+
     ##
     def merge_lattices (self, other, **params):
         """
         take two PatternLattices and merge them into one.
+        Nodes are merged by form through a NodeIndex, the content of nodes of the same form being unioned.
+        A merged lattice is updated in place and returned, unless in_place is False;
+        a single-source one is left as it is, and a new merged lattice is returned,
+        whose NodeIndex tracks content for remove_source(..) if track_content is True.
         """
         gen_links_internally = params['gen_links_internally']
         generalized          = params['generalized']
@@ -996,38 +2802,38 @@ class PatternLattice():
         reflexive            = params['reflexive']
         use_mp               = params['use_mp']
         check                = params['check']
+        pool                 = params.get('pool', None)
+        execution            = params.get('execution', "auto")
+        planner              = params.get('planner', None)
+        in_place             = params.get('in_place', True)
+        incremental          = params.get('incremental', False)
+        track_content        = params.get('track_content', False)
 
         ## merger nodes of two pattern lattices given
-        main_nodes   = [ p for p in self.nodes if len(p) > 0 ]
         nodes_to_add = [ p for p in other.nodes if len(p) > 0 ]
         ##
-        gap_mark = main_nodes[0].gap_mark
+        gap_mark = self.gap_mark
         ##
-        if reductive:
-            pool_nodes   = simplify_list (main_nodes)
-            nodes_to_add = simplify_list (nodes_to_add)
+        support      = other.get_support ()
+        counts       = [ support.get (p.form, 1) for p in nodes_to_add ]
+        if in_place and not self.single_source:
+            merged = self
+        else:
+            main_nodes = [ p for p in self.nodes if len(p) > 0 ]
+            support    = self.get_support ()
+            merged = PatternLattice.from_nodes (main_nodes, gap_mark = gap_mark, generalized = generalized, reductive = reductive, counts = [ support.get (p.form, 1) for p in main_nodes ], track_content = track_content, check = check)
         ##
-        main_nodes = make_simplest_merger (main_nodes, nodes_to_add)
+        merged.get_node_index ().merge (nodes_to_add, counts = counts)
         if check:
-            for i, node in enumerate(main_nodes):
+            for i, node in enumerate(merged.nodes):
                 print(f"#main_node {i}: {node.separated_print()}")
-
-        ## define a new pattern lattice and elaborates it
-        dummy_pattern = Pattern([], gap_mark = gap_mark, check = check)
-        merged = PatternLattice (dummy_pattern, generalized = generalized, reductive = reductive, check = check)
-        ##
-        merged.origin        = dummy_pattern
-        merged.nodes         = main_nodes
-        ## The following was a seriously elusive bug
-        #merged.ranked_nodes  = group_nodes_by_rank (merged.nodes, gap_mark = gap_mark)
-        merged.ranked_nodes  = merged.group_nodes_by_rank (check = check)
-        merged.links         =  []
-        merged.link_source   =  []
-        merged.link_targets  =  []
+        ## links of a lattice merged in place are kept to be updated incrementally
+        if not (incremental and gen_links_internally and merged is self):
+            merged.clear_links ()
 
         ## generate links
         if gen_links_internally:
-            merged = merged.update_links (reflexive = reflexive, use_mp = use_mp, check = check)
+            merged = merged.update_links (reflexive = reflexive, use_mp = use_mp, execution = execution, planner = planner, incremental = incremental, pool = pool, check = check)
         ##
         if check:
             print(f"#merged lattice: {merged}")
@@ -1035,9 +2841,33 @@ class PatternLattice():
         return merged
 
     ##
-    def draw_diagrams (self, generalized: bool, zscores_from_targets: bool, layout: str = None, zscore_lb: float = None, zscore_ub: float = None, use_robust_zscore: bool = False, auto_figsize_adjust: bool = True, fig_size: tuple = None, node_size: int = None, label_size: int = None, label_sample_n: int = None, scale_factor: float = 3, font_name: str = None, test: bool = False, check: bool = False) -> None:
+    def export (self, path: str, format: str = None, check: bool = False) -> str:
+        """
+        writes the lattice to path in GraphML, GEXF, DOT or JSON Lines, by write_lattice(..), and returns the format
+        """
+        try:
+            from .lattice_export import write_lattice
+        except ImportError:
+            from lattice_export import write_lattice
+        return write_lattice (self, path, format = format, check = check)
+
+    ##
+    def export_html (self, path: str, zscores_from_targets: bool = False, use_robust_zscore: bool = False, title: str = None, max_bytes: int = None, check: bool = False) -> dict:
         """
-        draw a lattice digrams from a given PatternLattice L by extracting L.links
+        writes a single HTML file that shows the lattice offline in a browser, by write_lattice_viewer(..)
+        """
+        try:
+            from .lattice_viewer import write_lattice_viewer
+        except ImportError:
+            from lattice_viewer import write_lattice_viewer
+        zscores = self.target_zscores if zscores_from_targets else self.source_zscores
+        return write_lattice_viewer (self, path, zscores = zscores, use_robust_zscore = use_robust_zscore, title = title, max_bytes = max_bytes, check = check)
+
+    ##
+    def draw_diagrams (self, generalized: bool, zscores_from_targets: bool, layout: str = None, zscore_lb: float = None, zscore_ub: float = None, use_robust_zscore: bool = False, auto_figsize_adjust: bool = True, fig_size: tuple = None, node_size: int = None, label_size: int = None, label_sample_n: int = None, scale_factor: float = 3, font_name: str = None, test: bool = False, output_files: list = None, collection_threshold: int = 2000, layout_cache = None, check: bool = False) -> list:
+        """
+        draw a lattice digrams from a given PatternLattice L by extracting L.links,
+        saved to output_files, if given, rather than shown
         """
         ##
         links  = self.links
@@ -1066,7 +2896,80 @@ class PatternLattice():
                 print(f"node {i:4d} {node} has z-score {v:.4f}")
 
         ## draw PatternLattice
-        draw_network (ranked_links.items(), generalized = generalized, layout = layout, auto_figsize_adjust = auto_figsize_adjust, fig_size = fig_size, scale_factor = scale_factor, label_sample_n = label_sample_n, font_name = font_name, zscores = zscores, use_robust_zscore = use_robust_zscore, zscore_lb = zscore_lb, zscore_ub = zscore_ub, check = check)
+        return draw_network (ranked_links.items(), generalized = generalized, layout = layout, auto_figsize_adjust = auto_figsize_adjust, fig_size = fig_size, scale_factor = scale_factor, label_sample_n = label_sample_n, font_name = font_name, zscores = zscores, use_robust_zscore = use_robust_zscore, zscore_lb = zscore_lb, zscore_ub = zscore_ub, output_files = output_files, collection_threshold = collection_threshold, layout_cache = layout_cache, check = check)
+
+
+##
+class CorpusLatticeBuilder:
+    """
+    builds the merged PatternLattice of a corpus from sources taken one at a time, e.g., from a generator,
+    without building a PatternLattice per source: the lattice nodes of each source go straight into a NodeIndex,
+    which counts the sources supporting each node, and links are generated once, by build(..).
+    Memory is thus bounded by the number of unique nodes rather than by the sum of per-source lattices.
+    Sources are removed by remove_source(..), e.g., for a sliding window; with track_content, content is restored too.
+    """
+    def __init__ (self, generalized: bool, gap_mark: str = "_", pattern_class = Pattern, track_content: bool = False, check: bool = False):
+        self.generalized   = generalized
+        self.gap_mark      = gap_mark
+        self.pattern_class = pattern_class
+        self.index         = NodeIndex (track_content = track_content)
+        self.n_sources     = 0
+        self.check         = check
+
+    ##
+    def __len__ (self):
+        return len (self.index)
+
+    ##
+    def __repr__ (self):
+        return f"{type(self).__name__} ({self.n_sources} sources; {len(self.index)} nodes)"
+
+    ##
+    def add_source (self, source) -> int:
+        "takes a source, a Pattern or a list of segments, merges the nodes of its lattice, and returns the number of new nodes"
+        if isinstance (source, (list, tuple)):
+            source = self.pattern_class (source, gap_mark = self.gap_mark)
+        nodes = source.build_lattice_nodes (generalized = self.generalized, check = self.check)
+        self.n_sources += 1
+        added = self.index.merge ([ p for p in nodes if len(p) > 0 ])
+        if self.check:
+            print(f"#source {self.n_sources}: {source} added {added} of {len(nodes)} nodes")
+        return added
+
+    ##
+    def remove_source (self, source) -> list:
+        "takes a source added, a Pattern or a list of segments, discounts the nodes of its lattice, and returns the forms of nodes deleted"
+        if isinstance (source, (list, tuple)):
+            source = self.pattern_class (source, gap_mark = self.gap_mark)
+        nodes = source.build_lattice_nodes (generalized = self.generalized, check = self.check)
+        dead  = self.index.remove ([ p for p in nodes if len(p) > 0 ])
+        self.n_sources -= 1
+        if self.check:
+            print(f"#source {source} deleted {len(dead)} of {len(nodes)} nodes")
+        return dead
+
+    ##
+    def add_sources (self, sources):
+        "takes an iterable of sources and adds them one by one"
+        for source in sources:
+            self.add_source (source)
+        return self
+
+    ##
+    def get_support (self) -> dict:
+        "returns a dict of the number of sources supporting each node"
+        return self.index.support
+
+    ##
+    def build (self, gen_links: bool = True, reflexive: bool = True, use_mp: bool = True, execution: str = "auto", planner: LinkPlanner = None, pool: WorkerPool = None, check: bool = False):
+        """
+        returns the merged PatternLattice of the sources added, whose nodes are those of the builder's NodeIndex,
+        generating its links if gen_links is True
+        """
+        merged = PatternLattice.from_index (self.index, gap_mark = self.gap_mark, generalized = self.generalized, check = check)
+        if gen_links:
+            merged.update_links (reflexive = reflexive, use_mp = use_mp, execution = execution, planner = planner, pool = pool, check = check)
+        return merged
 
 
 ### end of file
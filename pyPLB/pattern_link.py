@@ -23,7 +23,12 @@ class PatternLink:
         self.link_type       = link_type
         self.paired          = (left, right)
         self.form_paired     = (left.form, right.form)
-        self.content_paired  = (left.content, right.content)
+        self.form_hash       = hash (self.form_paired)
+
+    ## content is read from the ends, since merger can add to the content of nodes
+    @property
+    def content_paired (self):
+        return (self.left.content, self.right.content)
 
     ## Unimplementation of this method seems the last cause for slow processing
     def __eq__ (self, other):
@@ -37,6 +42,16 @@ class PatternLink:
             else:
                 return True
 
+    ## PatternLinks are hashed by the forms of their ends, consistently with __eq__
+    def __hash__ (self):
+        return self.form_hash
+
+    ## a hash is salted per process, so it is recomputed on unpickling
+    def __setstate__ (self, state):
+        state.pop ('content_paired', None)
+        self.__dict__.update (state)
+        self.form_hash = hash (self.form_paired)
+
     ##
     def __len__ (self, use_min: bool = False):
         #assert len(self.left) == len(self.right)
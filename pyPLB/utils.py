@@ -1,22 +1,141 @@
+## imports
+from contextlib import contextmanager
+
+### Classes
+##
+class WorkerPool:
+    """
+    a multiprocess pool that is started once and reused across calls, e.g., for a whole run.
+    The pool is started lazily at the first call, and the time spent in starting and shutting it down
+    is recorded apart from the time spent in calls.
+    """
+    def __init__ (self, n_workers: int = None):
+        import os
+        if n_workers is None:
+            n_workers = os.cpu_count()
+        self.n_workers     = max(n_workers or 1, 1)
+        self.pool          = None
+        self.startup_time  = 0.0
+        self.shutdown_time = 0.0
+        self.compute_time  = 0.0
+        self.n_calls       = 0
+        self.ipc_bytes     = 0
+        self.ipc_items     = 0
+        self.busy_times    = { }
+
+    ##
+    def __enter__ (self):
+        return self
+
+    ##
+    def __exit__ (self, *exc_info):
+        self.close ()
+
+    ##
+    def __repr__ (self):
+        return f"{type(self).__name__} (n_workers: {self.n_workers}; started: {self.pool is not None})"
+
+    ##
+    def get_pool (self):
+        "returns the underlying pool, starting it if needed"
+        if self.pool is None:
+            import time
+            import multiprocess as mp
+            start = time.perf_counter()
+            self.pool = mp.Pool (self.n_workers)
+            self.startup_time += time.perf_counter() - start
+        return self.pool
+
+    ##
+    def run (self, method: str, func, iterable, chunksize: int = None) -> list:
+        "calls method (map or starmap) of the pool and records the time spent"
+        import time
+        pool  = self.get_pool ()
+        start = time.perf_counter()
+        result = getattr(pool, method) (func, iterable, chunksize)
+        self.compute_time += time.perf_counter() - start
+        self.n_calls += 1
+        return result
+
+    ##
+    def map (self, func, iterable, chunksize: int = None) -> list:
+        return self.run ("map", func, iterable, chunksize = chunksize)
+
+    ##
+    def starmap (self, func, iterable, chunksize: int = None) -> list:
+        return self.run ("starmap", func, iterable, chunksize = chunksize)
+
+    ##
+    def close (self):
+        "shuts down the pool, if started, waiting for its workers to exit"
+        if self.pool is not None:
+            import time
+            start = time.perf_counter()
+            self.pool.close ()
+            self.pool.join ()
+            self.shutdown_time += time.perf_counter() - start
+            self.pool = None
+
+    ##
+    def get_overhead (self) -> float:
+        "returns the time spent in starting and shutting down the pool"
+        return self.startup_time + self.shutdown_time
+
+    ##
+    def record_ipc (self, n_bytes: int, n_items: int):
+        "records the bytes sent to and received from workers for n_items results, e.g., links"
+        self.ipc_bytes += n_bytes
+        self.ipc_items += n_items
+
+    ##
+    def record_busy (self, worker_id: int, seconds: float):
+        "records the time a worker, e.g., identified by pid, spent on a task"
+        self.busy_times[worker_id] = self.busy_times.get (worker_id, 0.0) + seconds
+
+    ##
+    def report_busy (self) -> str:
+        "returns busy time per worker and the imbalance, i.e., the ratio of the maximum to the mean"
+        if len(self.busy_times) == 0:
+            return "no busy time recorded"
+        times = sorted (self.busy_times.values(), reverse = True)
+        mean  = sum(times) / len(times)
+        imbalance = times[0] / mean if mean > 0 else 1.0
+        return f"busy per worker: {', '.join([ f'{t:.3f}s' for t in times ])} (imbalance {imbalance:.2f})"
+
+    ##
+    def report (self) -> str:
+        out = f"{self.n_workers} workers; {self.n_calls} calls; overhead {self.get_overhead():.3f}s (startup {self.startup_time:.3f}s, shutdown {self.shutdown_time:.3f}s); compute {self.compute_time:.3f}s"
+        if self.ipc_bytes > 0:
+            out += f"; IPC {self.ipc_bytes} bytes for {self.ipc_items} items ({self.ipc_bytes / max(self.ipc_items, 1):.1f} B/item)"
+        if len(self.busy_times) > 0:
+            out += f"; {self.report_busy()}"
+        return out
+
 ### Functions
 
+##
+@contextmanager
+def use_worker_pool (pool: WorkerPool = None):
+    "yields the WorkerPool given, or a temporary one closed afterwards when none is given"
+    if pool is not None:
+        yield pool
+    else:
+        with WorkerPool () as temp_pool:
+            yield temp_pool
+
 ## parallel filter, or pfilter
-def mp_Filter (boolean_func, L: list):
+def mp_Filter (boolean_func, L: list, pool: WorkerPool = None):
     """
     multiprocess verions of Filter (..)
     """
-    import os
-    import multiprocess as mp
-    with mp.Pool (max(os.cpu_count(), 1)) as pool:
+    with use_worker_pool (pool) as pool:
         boolean_tests = pool.map (boolean_func, L)
     return [ r for r, t in zip (L, boolean_tests) if t ]
 
 ##
-def mp_test_for_inclusion (item, L: (list, tuple))-> bool:
+def mp_test_for_inclusion (item, L: (list, tuple), pool: WorkerPool = None)-> bool:
     "multiprocess-version of membership test: effective only with a large list"
-    import os
-    import multiprocess as mp
-    with mp.Pool(max(os.cpu_count(), 1)) as pool:
+    with use_worker_pool (pool) as pool:
         return any(pool.map (lambda x: x == item, L))
 ## alias
 mp_in_test = mp_test_for_inclusion
@@ -84,6 +203,19 @@ def sort_remove_duplicates (L: list, initial_value: object = None) -> list:
     ## return result
     return R
 
+##
+def remove_duplicates (L: list) -> list:
+    "takes a list and returns a list with duplicates removed, keeping the first occurrences in order"
+    try:
+        ## dict keeps insertion order and the first of equal keys
+        return list (dict.fromkeys (L))
+    except TypeError: # unhashable items
+        R = [ ]
+        for x in L:
+            if x not in R:
+                R.append (x)
+        return R
+
 ##
 def simplify_list (A: list, use_mp: bool = False) -> list:
     C = []
@@ -91,10 +223,7 @@ def simplify_list (A: list, use_mp: bool = False) -> list:
         ## the following turned out to be really slow
         return [ x for x in A if x is not None and len(x) > 0 and not mp_in_test (x, C) ]
     else:
-        return [ x for x in A if x is not None and len(x) > 0 and x not in C ]
-
-#def simplify_list (A:list) -> list:
-#    return remove_duplicates (A, None)
+        return remove_duplicates ([ x for x in A if x is not None and len(x) > 0 ])
 
 ## alises
 reduce_list         = simplify_list
@@ -106,18 +235,18 @@ def make_simplest_merger (A: list, B: list) -> list:
     C = [ ]
     for a in A:
         try:
-            if len(a) > 0 and a not in C:
+            if len(a) > 0:
                 C.append(a)
         except TypeError:
             pass
     for b in B:
         try:
-            if len(b) > 0 and not b in C:
+            if len(b) > 0:
                 C.append (b)
         except TypeError:
             pass
     ##
-    return C
+    return remove_duplicates (C)
 
 ## aliases
 make_simplest_list  = make_simplest_merger 